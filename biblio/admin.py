@@ -1,22 +1,269 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
 
 # Register your models here.
+from . import auditoria
 from .models import (
-    Roles, Permisos, RolPermiso, Usuarios, Bitacora,
-    Clientes, Libros, Ejemplares, ReglasPrestamo, 
-    Prestamos, Reservas, CatalogoPublico
+    Roles, Permisos, RolPermiso, Usuarios, Bitacora, BitacoraArchivo,
+    Clientes, Libros, Ejemplares, ReglasPrestamo,
+    Prestamos, Reservas, CatalogoPublico,
+    Proveedores, Compras, DetalleCompras, Ventas, DetalleVenta, SolicitudVenta,
 )
 
-# Registrar TODOS los modelos
+
+class PaginadorEstimado(Paginator):
+    """
+    Sin filtros, el total de filas sale de las estadísticas de la tabla en
+    lugar de un COUNT(*) que recorre millones de filas. Con filtros (que
+    reducen el conjunto) se cuenta normalmente.
+    """
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if getattr(qs, "query", None) is not None and not qs.query.where:
+            estimado = _filas_estimadas(qs.model._meta.db_table)
+            if estimado is not None and estimado > 10000:
+                return estimado
+        return super().count
+
+
+def _filas_estimadas(tabla):
+    with connection.cursor() as cursor:
+        if connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [tabla],
+            )
+        elif connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [tabla])
+        else:
+            return None
+        fila = cursor.fetchone()
+    return int(fila[0]) if fila and fila[0] is not None else None
+
+
+def filtro_fijo(campo, titulo, opciones):
+    """
+    Filtro con valores conocidos de antemano. El filtro por defecto de un
+    CharField hace SELECT DISTINCT sobre toda la tabla para armar la lista.
+    """
+
+    class Filtro(admin.SimpleListFilter):
+        title = titulo
+        parameter_name = campo
+
+        def lookups(self, request, model_admin):
+            return opciones
+
+        def queryset(self, request, queryset):
+            if self.value():
+                return queryset.filter(**{campo: self.value()})
+            return queryset
+
+    return Filtro
+
+
+FILTRO_ESTADO_PRESTAMO = filtro_fijo(
+    "estado", "estado", [("activo", "Activo"), ("devuelto", "Devuelto")],
+)
+FILTRO_ESTADO_RESERVA = filtro_fijo(
+    "estado", "estado", [("activa", "Activa"), ("facturada", "Facturada"), ("cancelada", "Cancelada")],
+)
+FILTRO_ESTADO_SOLICITUD = filtro_fijo(
+    "estado", "estado", [("pendiente", "Pendiente"), ("atendida", "Atendida"), ("cancelada", "Cancelada")],
+)
+FILTRO_ESTADO_VENTA = filtro_fijo(
+    "estado", "estado", [("pagada", "Pagada"), ("pendiente", "Pendiente"), ("anulada", "Anulada")],
+)
+FILTRO_ACTIVO = filtro_fijo("estado", "estado", [("activo", "Activo"), ("inactivo", "Inactivo")])
+FILTRO_METODO_PAGO = filtro_fijo(
+    "metodo_pago", "método de pago",
+    [(m, m) for m in ("Efectivo", "Tarjeta", "Transferencia", "Otro")],
+)
+FILTRO_CODIGO_BITACORA = filtro_fijo(
+    "codigo", "acción", sorted(auditoria.CODIGOS.items(), key=lambda par: par[1]),
+)
+FILTRO_ENTIDAD_BITACORA = filtro_fijo(
+    "entidad", "entidad", [(e, e) for e in auditoria.ENTIDADES],
+)
+
+
+class AdminTablaGrande(admin.ModelAdmin):
+    """Base para tablas que crecen sin límite (préstamos, ventas, bitácora…)."""
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+    list_per_page = 50
+
+
+# ---------- Catálogos pequeños ----------
+
 admin.site.register(Roles)
 admin.site.register(Permisos)
-admin.site.register(RolPermiso)
-admin.site.register(Usuarios)
-admin.site.register(Bitacora)
-admin.site.register(Clientes)
-admin.site.register(Libros)
-admin.site.register(Ejemplares)
 admin.site.register(ReglasPrestamo)
-admin.site.register(Prestamos)
-admin.site.register(Reservas)
-admin.site.register(CatalogoPublico)
\ No newline at end of file
+
+
+@admin.register(RolPermiso)
+class RolPermisoAdmin(admin.ModelAdmin):
+    list_display = ("rol", "permiso")
+    list_select_related = ("rol", "permiso")
+    list_filter = ("rol",)
+
+
+# ---------- Personas ----------
+
+@admin.register(Usuarios)
+class UsuariosAdmin(AdminTablaGrande):
+    list_display = ("id", "nombre", "apellido", "email", "rol", "estado", "fecha_creacion")
+    list_select_related = ("rol",)
+    list_filter = ("rol", FILTRO_ACTIVO)
+    search_fields = ("=id", "email", "nombre", "apellido")
+    exclude = ("clave",)
+
+
+@admin.register(Clientes)
+class ClientesAdmin(AdminTablaGrande):
+    list_display = ("id", "dni", "nombre", "estado", "bloqueado", "telefono")
+    list_select_related = ("usuario",)
+    list_filter = ("bloqueado", FILTRO_ACTIVO)
+    search_fields = ("=dni", "usuario__email", "usuario__nombre", "usuario__apellido")
+    raw_id_fields = ("usuario",)
+
+    @admin.display(description="Nombre", ordering="usuario__nombre")
+    def nombre(self, obj):
+        return f"{obj.usuario.nombre} {obj.usuario.apellido}"
+
+
+@admin.register(Proveedores)
+class ProveedoresAdmin(admin.ModelAdmin):
+    list_display = ("nombre_comercial", "rtn", "telefono", "estado")
+    list_filter = (FILTRO_ACTIVO,)
+    search_fields = ("nombre_comercial", "=rtn")
+
+
+# ---------- Libros y préstamos ----------
+
+@admin.register(Libros)
+class LibrosAdmin(AdminTablaGrande):
+    list_display = ("isbn", "titulo", "autor", "categoria", "stock_total", "precio_venta")
+    search_fields = ("=isbn", "titulo", "autor")
+
+
+@admin.register(Ejemplares)
+class EjemplaresAdmin(AdminTablaGrande):
+    list_display = ("codigo_interno", "libro", "ubicacion", "estado")
+    # __str__ de Ejemplares usa libro.titulo
+    list_select_related = ("libro",)
+    search_fields = ("=codigo_interno", "=libro__isbn", "libro__titulo")
+    autocomplete_fields = ("libro",)
+
+
+@admin.register(Prestamos)
+class PrestamosAdmin(AdminTablaGrande):
+    list_display = ("id", "cliente", "ejemplar", "fecha_inicio", "fecha_fin", "fecha_devolucion", "estado")
+    list_select_related = ("cliente__usuario", "ejemplar__libro")
+    list_filter = (FILTRO_ESTADO_PRESTAMO,)
+    date_hierarchy = "fecha_inicio"
+    search_fields = ("=id", "=cliente__dni", "=ejemplar__codigo_interno")
+    autocomplete_fields = ("cliente", "ejemplar")
+
+
+@admin.register(Reservas)
+class ReservasAdmin(AdminTablaGrande):
+    list_display = ("id", "cliente", "libro", "fecha_reserva", "fecha_vencimiento", "estado")
+    list_select_related = ("cliente__usuario", "libro")
+    list_filter = (FILTRO_ESTADO_RESERVA,)
+    date_hierarchy = "fecha_reserva"
+    search_fields = ("=id", "=cliente__dni", "=libro__isbn")
+    autocomplete_fields = ("cliente", "libro")
+
+
+@admin.register(CatalogoPublico)
+class CatalogoPublicoAdmin(AdminTablaGrande):
+    list_display = ("id_libro", "titulo", "autor", "total_ejemplares", "disponibles")
+    search_fields = ("titulo", "autor")
+
+
+# ---------- Ventas y compras ----------
+
+class DetalleVentaInline(admin.TabularInline):
+    model = DetalleVenta
+    extra = 0
+    raw_id_fields = ("libro",)
+
+
+@admin.register(Ventas)
+class VentasAdmin(AdminTablaGrande):
+    list_display = ("id", "numero_factura", "fecha_venta", "cliente", "vendedor", "metodo_pago", "total", "estado")
+    list_select_related = ("cliente__usuario", "vendedor")
+    list_filter = (FILTRO_ESTADO_VENTA, FILTRO_METODO_PAGO)
+    date_hierarchy = "fecha_venta"
+    search_fields = ("=id", "=numero_factura", "=cliente__dni")
+    raw_id_fields = ("cliente", "vendedor")
+    inlines = (DetalleVentaInline,)
+
+
+@admin.register(SolicitudVenta)
+class SolicitudVentaAdmin(AdminTablaGrande):
+    list_display = ("id", "cliente", "libro", "cantidad", "estado", "origen", "fecha_solicitud")
+    list_select_related = ("cliente__usuario", "libro")
+    list_filter = (FILTRO_ESTADO_SOLICITUD, "origen")
+    date_hierarchy = "fecha_solicitud"
+    raw_id_fields = ("cliente", "libro", "reserva")
+
+
+class DetalleComprasInline(admin.TabularInline):
+    model = DetalleCompras
+    extra = 0
+    raw_id_fields = ("libro",)
+
+
+@admin.register(Compras)
+class ComprasAdmin(AdminTablaGrande):
+    list_display = ("numero_factura", "fecha", "proveedor", "usuario", "metodo_pago", "total")
+    list_select_related = ("proveedor", "usuario")
+    list_filter = (FILTRO_METODO_PAGO,)
+    date_hierarchy = "fecha"
+    search_fields = ("=numero_factura", "proveedor__nombre_comercial")
+    raw_id_fields = ("usuario",)
+    autocomplete_fields = ("proveedor",)
+    inlines = (DetalleComprasInline,)
+
+
+# ---------- Bitácora (solo lectura; para buscar usar /bitacora/) ----------
+
+class BitacoraAdminBase(AdminTablaGrande):
+    list_display = ("id", "fecha", "usuario", "codigo", "entidad", "entidad_id", "accion")
+    list_select_related = ("usuario",)
+    list_filter = (FILTRO_CODIGO_BITACORA, FILTRO_ENTIDAD_BITACORA)
+    # Sin date_hierarchy: sus totales por año/mes recorren la tabla entera
+    search_fields = ("=entidad_id",)
+    raw_id_fields = ("usuario",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    # Ni el superusuario borra entradas: la bitácora es el registro de auditoría
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def get_actions(self, request):
+        acciones = super().get_actions(request)
+        acciones.pop("delete_selected", None)
+        return acciones
+
+
+@admin.register(Bitacora)
+class BitacoraAdmin(BitacoraAdminBase):
+    pass
+
+
+@admin.register(BitacoraArchivo)
+class BitacoraArchivoAdmin(BitacoraAdminBase):
+    pass
@@ -0,0 +1,210 @@
+# biblio/auditoria.py
+"""
+Registro de acciones en la bitácora.
+
+Las entradas normales no se insertan en el momento: se acumulan y se
+guardan todas juntas con un solo bulk_create al terminar la petición
+(AuditoriaMiddleware). Si se registran dentro de una transacción, solo
+pasan a la cola cuando esta se confirma; si se deshace, se descartan
+junto con la acción que describían.
+
+Las acciones con dinero de por medio (ventas, compras) usan
+duradero=True: la entrada se inserta en la misma transacción que los
+datos, de modo que no puede existir una venta sin su registro.
+
+Para no recorrer la tabla entera con LIKE, cada entrada lleva además
+codigo, entidad y entidad_id (indexados) y un JSON con los detalles.
+La tabla caliente solo guarda los últimos meses: rotar_bitacora mueve lo
+anterior a bitacora_archivo (ver archivar).
+"""
+import logging
+import threading
+from functools import partial
+
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from . import metricas
+from .models import Bitacora, BitacoraArchivo
+
+logger = logging.getLogger(__name__)
+
+# Con más entradas pendientes se guardan sin esperar al fin de la petición
+MAX_PENDIENTES = 200
+
+# Códigos que usa el sistema (filtro del navegador de bitácora)
+CODIGOS = {
+    "usuario.registrado": "Empleado registrado",
+    "cliente.bloqueado": "Cliente bloqueado",
+    "cliente.desbloqueado": "Cliente desbloqueado",
+    "reglas_prestamo.actualizadas": "Reglas de préstamo actualizadas",
+    "prestamo.registrado": "Préstamo registrado",
+    "prestamo.renovado": "Préstamo renovado",
+    "prestamo.devuelto": "Préstamo devuelto",
+    "prestamo.devuelto_con_mora": "Préstamo devuelto con mora",
+    "venta.facturada": "Venta facturada",
+    "compra.registrada": "Compra registrada",
+    "compra.importada": "Compra importada",
+    "compra.editada": "Compra editada",
+    "catalogo.importado": "Catálogo importado",
+}
+
+ENTIDADES = ("usuario", "cliente", "reglas_prestamo", "prestamo", "venta", "compra", "libro")
+
+_estado = threading.local()
+
+
+def _pendientes():
+    if not hasattr(_estado, "pendientes"):
+        _estado.pendientes = []
+    return _estado.pendientes
+
+
+def _en_peticion():
+    return getattr(_estado, "en_peticion", False)
+
+
+def entrada(usuario, accion, *, codigo="", entidad="", entidad_id=None, datos=None, fecha=None):
+    """
+    Bitacora sin guardar. `usuario` puede ser un Usuarios, su id o None.
+    `accion` es el texto legible; codigo/entidad/entidad_id son los que
+    se usan para buscar ("prestamo.renovado", "prestamo", 42).
+    """
+    usuario_id = getattr(usuario, "pk", usuario)
+    return Bitacora(
+        usuario_id=usuario_id,
+        accion=accion[:Bitacora._meta.get_field("accion").max_length],
+        fecha=fecha or timezone.now(),
+        codigo=codigo,
+        entidad=entidad,
+        entidad_id=entidad_id,
+        datos=datos,
+    )
+
+
+def registrar(usuario, accion, *, duradero=False, **estructura):
+    registrar_lote([entrada(usuario, accion, **estructura)], duradero=duradero)
+
+
+def registrar_lote(entradas, *, duradero=False):
+    entradas = list(entradas)
+    if not entradas:
+        return
+
+    if duradero:
+        Bitacora.objects.bulk_create(entradas)
+        transaction.on_commit(partial(_contar_eventos, entradas))
+    elif transaction.get_connection().in_atomic_block:
+        transaction.on_commit(partial(_encolar, entradas))
+    else:
+        _encolar(entradas)
+
+
+def _contar_eventos(entradas):
+    # Una métrica por código: préstamos, devoluciones, ventas, compras…
+    por_codigo = {}
+    for e in entradas:
+        if e.codigo:
+            por_codigo[e.codigo] = por_codigo.get(e.codigo, 0) + 1
+    for codigo, cantidad in por_codigo.items():
+        metricas.contar("eventos", cantidad, codigo=codigo)
+
+
+def _encolar(entradas):
+    _contar_eventos(entradas)
+    pendientes = _pendientes()
+    pendientes.extend(entradas)
+    # Fuera de una petición (comandos, shell) no hay quién vacíe la cola
+    if not _en_peticion() or len(pendientes) >= MAX_PENDIENTES:
+        vaciar()
+
+
+def vaciar():
+    """Guarda las entradas pendientes de este hilo con un solo INSERT."""
+    pendientes = _pendientes()
+    if not pendientes:
+        return 0
+
+    entradas = pendientes[:]
+    pendientes.clear()
+    try:
+        Bitacora.objects.bulk_create(entradas)
+    except DatabaseError:
+        # La bitácora no debe tumbar una acción que ya se confirmó
+        logger.exception("No se pudieron guardar %s entradas de bitácora", len(entradas))
+        return 0
+    return len(entradas)
+
+
+class AuditoriaMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _estado.en_peticion = True
+        try:
+            return self.get_response(request)
+        finally:
+            _estado.en_peticion = False
+            vaciar()
+
+
+# ---------- Consultas y rotación ----------
+
+CAMPOS = ("id", "usuario_id", "accion", "fecha", "codigo", "entidad", "entidad_id", "datos")
+
+
+def historial_entidad(entidad, entidad_id, incluir_archivo=True):
+    """Entradas de un préstamo, cliente, compra… (dicts), de la más reciente a la más antigua."""
+    qs = Bitacora.objects.filter(entidad=entidad, entidad_id=entidad_id).values(*CAMPOS)
+    if incluir_archivo:
+        qs = qs.union(
+            BitacoraArchivo.objects.filter(entidad=entidad, entidad_id=entidad_id).values(*CAMPOS),
+            all=True,
+        )
+    return qs.order_by("-fecha", "-id")
+
+
+def inicio_de_mes(meses_atras, ahora=None):
+    ahora = timezone.localtime(ahora)
+    anio, mes = ahora.year, ahora.month - meses_atras
+    while mes < 1:
+        mes += 12
+        anio -= 1
+    return ahora.replace(year=anio, month=mes, day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def archivar(antes_de, tamano_bloque=5000):
+    """
+    Mueve a bitacora_archivo las entradas con fecha anterior a `antes_de`.
+    Recorre la tabla por id desde el principio (la fecha crece con el id)
+    y se detiene en el primer bloque que ya tiene entradas recientes; cada
+    bloque va en su propia transacción para no bloquear la tabla.
+    """
+    movidas = 0
+    while True:
+        with transaction.atomic():
+            filas = list(Bitacora.objects.order_by("id").values(*CAMPOS)[:tamano_bloque])
+            viejas = [f for f in filas if f["fecha"] is None or f["fecha"] < antes_de]
+            if not viejas:
+                return movidas
+            BitacoraArchivo.objects.bulk_create(
+                [BitacoraArchivo(**f) for f in viejas], ignore_conflicts=True,
+            )
+            Bitacora.objects.filter(id__in=[f["id"] for f in viejas]).delete()
+        movidas += len(viejas)
+        if len(viejas) < len(filas):
+            return movidas
+
+
+def purgar_archivo(antes_de, tamano_bloque=5000):
+    """Borra del archivo las entradas con fecha anterior a `antes_de`."""
+    borradas = 0
+    while True:
+        ids = list(
+            BitacoraArchivo.objects.filter(fecha__lt=antes_de)
+            .values_list("id", flat=True)[:tamano_bloque]
+        )
+        if not ids:
+            return borradas
+        borradas += BitacoraArchivo.objects.filter(id__in=ids).delete()[0]
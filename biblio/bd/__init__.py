@@ -0,0 +1,48 @@
+# biblio/bd/__init__.py
+"""
+Backends de base de datos que cuentan sus conexiones para /metrics.
+
+Son los de Django (ENGINE "biblio.bd.mysql" o "biblio.bd.sqlite3") con
+ConexionMedida encima:
+
+- bd_conexiones{resultado="abierta"}: conexiones nuevas (TCP + login +
+  init_command), con su duración en bd_conexion_segundos.
+- bd_conexiones{resultado="fallida"}: intentos de conexión que fallaron.
+- bd_conexiones{resultado="reutilizada"}: peticiones que empezaron con la
+  conexión del hilo ya abierta (CONN_MAX_AGE > 0 y el chequeo de salud
+  la dio por buena), o sea, sin pagar la conexión.
+
+Con persistencia bien configurada, "abierta" crece con los workers y los
+hilos (y al vencer DB_CONN_MAX_AGE), no con las peticiones.
+"""
+import time
+
+from django.core.signals import request_started
+from django.db import connections
+
+from biblio import metricas
+
+
+class ConexionMedida:
+    """Mixin para el DatabaseWrapper de cada motor."""
+
+    def connect(self):
+        inicio = time.perf_counter()
+        try:
+            super().connect()
+        except Exception:
+            metricas.contar("bd_conexiones", alias=self.alias, resultado="fallida")
+            raise
+        metricas.contar("bd_conexiones", alias=self.alias, resultado="abierta")
+        metricas.observar("bd_conexion_segundos", time.perf_counter() - inicio, alias=self.alias)
+
+
+def _contar_reutilizadas(**kwargs):
+    # Se conecta después de close_old_connections (django.db), que ya cerró
+    # las conexiones vencidas o rotas: lo que queda abierto se reutiliza.
+    for conexion in connections.all(initialized_only=True):
+        if isinstance(conexion, ConexionMedida) and conexion.connection is not None:
+            metricas.contar("bd_conexiones", alias=conexion.alias, resultado="reutilizada")
+
+
+request_started.connect(_contar_reutilizadas, dispatch_uid="biblio.bd.reutilizadas")
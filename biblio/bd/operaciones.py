@@ -0,0 +1,24 @@
+# biblio/bd/operaciones.py
+"""
+Operaciones de migración para tablas grandes en producción.
+
+AgregarIndiceEnLinea es un AddIndex que en MySQL construye el índice con
+ALGORITHM=INPLACE LOCK=NONE: InnoDB lo arma mientras la tabla sigue
+aceptando lecturas y escrituras (solo bloquea un instante al principio y
+al final). Si el servidor no puede hacerlo así, MySQL falla en lugar de
+bloquear la tabla en silencio. En los demás motores es un AddIndex normal.
+"""
+from django.db import migrations
+
+
+class AgregarIndiceEnLinea(migrations.AddIndex):
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "mysql":
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        modelo = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, modelo):
+            sentencia = self.index.create_sql(modelo, schema_editor)
+            schema_editor.execute(f"{sentencia} ALGORITHM=INPLACE LOCK=NONE", params=None)
+
+    def describe(self):
+        return f"{super().describe()} (en línea)"
@@ -0,0 +1,7 @@
+from django.db.backends.sqlite3 import base
+
+from biblio.bd import ConexionMedida
+
+
+class DatabaseWrapper(ConexionMedida, base.DatabaseWrapper):
+    pass
@@ -0,0 +1,239 @@
+# biblio/estaticos.py
+"""
+Archivos estáticos de producción servidos desde el propio proceso.
+
+AlmacenEstaticos (STORAGES["staticfiles"]) hace que collectstatic deje en
+STATIC_ROOT, además de lo habitual de ManifestStaticFilesStorage
+(css/inventario.3f2a91c0b7de.css y staticfiles.json):
+
+- el CSS minificado (comentarios y espacios fuera),
+- una copia .gz de cada archivo de texto y, si está instalado el paquete
+  brotli, una .br. Solo se guardan si de verdad pesan menos.
+
+EstaticosMiddleware sirve esos archivos sin pasar por el resto de la
+pila. Elige la copia comprimida según Accept-Encoding y marca los nombres
+con hash como inmutables durante un año: como el nombre cambia cuando
+cambia el contenido, el navegador no vuelve a pedirlos. Los nombres sin
+hash se sirven con ESTATICOS_MAX_AGE segundos y ETag.
+
+El índice de archivos se arma una vez al arrancar, así que collectstatic
+se corre antes de levantar el servidor (como en el Dockerfile).
+"""
+import gzip
+import json
+import mimetypes
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:  # opcional: sin él solo se generan los .gz
+    brotli = None
+
+COMPRIMIBLES = {".css", ".js", ".svg", ".html", ".txt", ".json", ".xml", ".map", ".ico"}
+
+# Extensión de la copia comprimida -> valor de Content-Encoding
+CODIFICACIONES = {".br": "br", ".gz": "gzip"}
+
+UN_ANIO = 365 * 24 * 60 * 60
+
+
+# ---------- Minificación ----------
+
+# Las cadenas van primero para que un "/*" o un ";" entre comillas no se toque
+_TOKENS_CSS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|(/\*.*?\*/)|(\s+)', re.S)
+_ESPACIO_ALREDEDOR = re.compile(r"\s*([{};,])\s*")
+
+
+def minificar_css(texto):
+    """Quita comentarios y espacios sobrantes; no reescribe reglas ni valores."""
+    resultado, fuera, desde = [], [], 0
+    for m in _TOKENS_CSS.finditer(texto):
+        fuera.append(texto[desde:m.start()])
+        cadena, _comentario, _espacio = m.groups()
+        if cadena:
+            resultado += [_compactar("".join(fuera)), cadena]
+            fuera = []
+        else:
+            fuera.append(" ")
+        desde = m.end()
+    fuera.append(texto[desde:])
+    resultado.append(_compactar("".join(fuera)))
+    return "".join(resultado).strip()
+
+
+def _compactar(texto):
+    # Solo fuera de cadenas. "a :hover" y "a:hover" no son lo mismo, así
+    # que antes de ":" no se quita el espacio; después sí ("color: red").
+    texto = _ESPACIO_ALREDEDOR.sub(r"\1", texto)
+    return texto.replace(": ", ":").replace(";}", "}")
+
+
+# ---------- collectstatic ----------
+
+class AlmacenEstaticos(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        # El original y su versión con hash: ambos se pueden pedir
+        nombres = set(paths) | set(self.hashed_files.values())
+        for nombre in sorted(nombres):
+            ruta = Path(self.path(nombre))
+            if not ruta.is_file():
+                continue
+            if ruta.suffix == ".css":
+                texto = ruta.read_text(encoding="utf-8")
+                minificado = minificar_css(texto)
+                if minificado != texto:
+                    ruta.write_text(minificado, encoding="utf-8")
+            if ruta.suffix in COMPRIMIBLES:
+                comprimir(ruta)
+
+
+def comprimir(ruta):
+    """Escribe ruta.gz (y ruta.br con brotli) si ocupan menos que el original."""
+    datos = ruta.read_bytes()
+    copias = {".gz": gzip.compress(datos, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        copias[".br"] = brotli.compress(datos, quality=11)
+    for extension, comprimido in copias.items():
+        destino = ruta.with_name(ruta.name + extension)
+        if len(comprimido) < len(datos):
+            destino.write_bytes(comprimido)
+        elif destino.exists():
+            destino.unlink()
+
+
+# ---------- Middleware ----------
+
+@dataclass
+class Archivo:
+    tipo: str
+    inmutable: bool
+    # Content-Encoding ("" = sin comprimir) -> (ruta, tamaño, etag)
+    variantes: dict = field(default_factory=dict)
+    ultima_modificacion: float = 0
+
+
+def indexar(raiz, inmutables=()):
+    """URL relativa -> Archivo, para todo lo que hay bajo `raiz`."""
+    inmutables = set(inmutables)
+    archivos = {}
+    for carpeta, _, nombres in os.walk(raiz):
+        for nombre in nombres:
+            ruta = Path(carpeta, nombre)
+            base, extension = os.path.splitext(str(ruta))
+            codificacion = CODIFICACIONES.get(extension, "")
+            if codificacion and not os.path.exists(base):
+                codificacion = ""  # un .gz suelto es un archivo más
+            if codificacion:
+                ruta_base = Path(base)
+            else:
+                ruta_base = ruta
+            url = ruta_base.relative_to(raiz).as_posix()
+
+            archivo = archivos.get(url)
+            if archivo is None:
+                tipo, _ = mimetypes.guess_type(ruta_base.name)
+                archivo = archivos[url] = Archivo(
+                    tipo=_con_charset(tipo or "application/octet-stream"),
+                    inmutable=url in inmutables,
+                )
+            estado = ruta.stat()
+            etag = f'"{int(estado.st_mtime):x}-{estado.st_size:x}{"-" + codificacion if codificacion else ""}"'
+            archivo.variantes[codificacion] = (ruta, estado.st_size, etag)
+            if not codificacion:
+                archivo.ultima_modificacion = estado.st_mtime
+    return archivos
+
+
+def _con_charset(tipo):
+    if tipo.startswith("text/") or tipo in ("application/javascript", "image/svg+xml", "application/json"):
+        return f"{tipo}; charset=utf-8"
+    return tipo
+
+
+def elegir_codificacion(accept_encoding, disponibles):
+    """La codificación disponible con mayor q en Accept-Encoding ("" = sin comprimir)."""
+    pesos = {}
+    for parte in accept_encoding.split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        q = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith("q="):
+            try:
+                q = float(parametros[2:])
+            except ValueError:
+                q = 0.0
+        if nombre:
+            pesos[nombre.strip().lower()] = q
+    mejor, mejor_q = "", 0.0
+    for codificacion in ("br", "gzip"):  # a igual q, brotli pesa menos
+        if codificacion not in disponibles:
+            continue
+        q = pesos.get(codificacion, pesos.get("*", 0.0))
+        if q > mejor_q:
+            mejor, mejor_q = codificacion, q
+    return mejor
+
+
+class EstaticosMiddleware:
+    def __init__(self, get_response):
+        if not settings.ESTATICOS_VERSIONADOS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefijo = urlsplit(settings.STATIC_URL).path
+        raiz = Path(settings.STATIC_ROOT)
+        self.archivos = indexar(raiz, _nombres_con_hash(raiz)) if raiz.is_dir() else {}
+
+    def __call__(self, request):
+        if request.method in ("GET", "HEAD") and request.path_info.startswith(self.prefijo):
+            archivo = self.archivos.get(request.path_info[len(self.prefijo):])
+            if archivo is not None:
+                return self.servir(request, archivo)
+        return self.get_response(request)
+
+    def servir(self, request, archivo):
+        codificacion = elegir_codificacion(
+            request.META.get("HTTP_ACCEPT_ENCODING", ""), archivo.variantes,
+        )
+        ruta, tamano, etag = archivo.variantes[codificacion]
+
+        if etag in request.META.get("HTTP_IF_NONE_MATCH", ""):
+            respuesta = HttpResponseNotModified()
+        elif request.method == "HEAD":
+            respuesta = HttpResponse(content_type=archivo.tipo)
+            respuesta["Content-Length"] = str(tamano)
+        else:
+            respuesta = FileResponse(open(ruta, "rb"), content_type=archivo.tipo)
+            # FileResponse lo pone con el nombre en disco (p. ej. "x.css.gz")
+            del respuesta["Content-Disposition"]
+
+        respuesta["ETag"] = etag
+        respuesta["Last-Modified"] = http_date(archivo.ultima_modificacion)
+        if archivo.inmutable:
+            respuesta["Cache-Control"] = f"public, max-age={UN_ANIO}, immutable"
+        else:
+            respuesta["Cache-Control"] = f"public, max-age={settings.ESTATICOS_MAX_AGE}"
+        if len(archivo.variantes) > 1:
+            respuesta["Vary"] = "Accept-Encoding"
+        if codificacion and respuesta.status_code == 200:
+            respuesta["Content-Encoding"] = codificacion
+        return respuesta
+
+
+def _nombres_con_hash(raiz):
+    manifiesto = raiz / ManifestStaticFilesStorage.manifest_name
+    if not manifiesto.exists():
+        return ()
+    return json.loads(manifiesto.read_text(encoding="utf-8")).get("paths", {}).values()
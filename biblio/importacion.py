@@ -0,0 +1,323 @@
+# biblio/importacion.py
+"""
+Carga masiva del catálogo de libros (CSV, JSON Lines o MARC 21 / ISO 2709).
+
+Los registros se leen de a uno, se agrupan en bloques y cada bloque se
+guarda con un solo INSERT … ON CONFLICT / ON DUPLICATE KEY UPDATE por ISBN
+(bulk_create con update_conflicts). El ISBN se guarda en forma canónica
+(ISBN-13 sin guiones, ver biblio/isbn.py).
+"""
+import csv
+import json
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .isbn import canonico, es_valido, normalizar
+from .models import Libros
+
+FORMATO_CSV = "csv"
+FORMATO_JSONL = "jsonl"
+FORMATO_MARC = "marc"
+
+EXTENSIONES = {
+    ".csv": FORMATO_CSV,
+    ".jsonl": FORMATO_JSONL,
+    ".ndjson": FORMATO_JSONL,
+    ".mrc": FORMATO_MARC,
+    ".marc": FORMATO_MARC,
+}
+
+# Campos de Libros que se pueden importar (además del ISBN)
+CAMPOS = (
+    "titulo",
+    "autor",
+    "categoria",
+    "editorial",
+    "anio_publicacion",
+    "stock_total",
+    "precio_venta",
+    "impuesto_porcentaje",
+)
+# Encabezados alternativos aceptados en CSV / JSON
+ALIAS = {"stock": "stock_total", "precio": "precio_venta", "impuesto": "impuesto_porcentaje"}
+
+TAMANO_BLOQUE = 2000
+MAX_ERRORES_REPORTE = 200
+
+
+class ImportacionInvalida(Exception):
+    """El archivo no se puede leer (formato desconocido, columnas faltantes…)."""
+
+
+@dataclass
+class ReporteCatalogo:
+    leidos: int = 0
+    insertados: int = 0
+    actualizados: int = 0
+    rechazados: int = 0
+    # [(número de registro, mensaje)]
+    errores: list = field(default_factory=list)
+
+    def rechazar(self, numero, mensaje):
+        self.rechazados += 1
+        if len(self.errores) < MAX_ERRORES_REPORTE:
+            self.errores.append((numero, mensaje))
+
+
+def formato_por_nombre(nombre):
+    nombre = (nombre or "").lower()
+    for extension, formato in EXTENSIONES.items():
+        if nombre.endswith(extension):
+            return formato
+    raise ImportacionInvalida(
+        "Formato no reconocido: use .csv, .jsonl o .mrc."
+    )
+
+
+# ---------- Lectores: cada uno produce (número, dict) ----------
+
+def _limpiar(registro):
+    limpio = {}
+    for clave, valor in registro.items():
+        clave = (clave or "").strip().lower()
+        clave = ALIAS.get(clave, clave)
+        if clave == "isbn" or clave in CAMPOS:
+            limpio[clave] = valor.strip() if isinstance(valor, str) else valor
+    return limpio
+
+
+def leer_csv(lineas):
+    lector = csv.DictReader(lineas)
+    if "isbn" not in [(c or "").strip().lower() for c in (lector.fieldnames or [])]:
+        raise ImportacionInvalida("El CSV debe tener una columna isbn.")
+    for fila in lector:
+        yield lector.line_num, _limpiar(fila)
+
+
+def leer_jsonl(lineas):
+    for numero, linea in enumerate(lineas, start=1):
+        if not linea.strip():
+            continue
+        try:
+            registro = json.loads(linea)
+        except ValueError:
+            yield numero, {"_error": "La línea no es JSON válido."}
+            continue
+        if not isinstance(registro, dict):
+            yield numero, {"_error": "Cada línea debe ser un objeto JSON."}
+            continue
+        yield numero, _limpiar(registro)
+
+
+_FIN_REGISTRO = b"\x1d"
+_FIN_CAMPO = b"\x1e"
+_SUBCAMPO = b"\x1f"
+
+
+def _registros_iso2709(flujo, tamano_lectura=64 * 1024):
+    pendiente = b""
+    while True:
+        datos = flujo.read(tamano_lectura)
+        if not datos:
+            break
+        pendiente += datos
+        *completos, pendiente = pendiente.split(_FIN_REGISTRO)
+        yield from completos
+    if pendiente.strip():
+        yield pendiente
+
+
+def _campos_marc(crudo):
+    """{etiqueta: [{subcampo: valor}]} de un registro ISO 2709."""
+    base = int(crudo[12:17])
+    directorio = crudo[24:base - 1]
+    campos = {}
+    for i in range(0, len(directorio) - 11, 12):
+        etiqueta = directorio[i:i + 3].decode("ascii")
+        largo = int(directorio[i + 3:i + 7])
+        inicio = int(directorio[i + 7:i + 12])
+        if not etiqueta.isdigit() or int(etiqueta) < 10:
+            continue  # campos de control, sin subcampos
+        contenido = crudo[base + inicio:base + inicio + largo].rstrip(_FIN_CAMPO)
+        subcampos = {}
+        for parte in contenido.split(_SUBCAMPO)[1:]:
+            if parte:
+                codigo = chr(parte[0])
+                subcampos.setdefault(codigo, parte[1:].decode("utf-8", "replace").strip())
+        campos.setdefault(etiqueta, []).append(subcampos)
+    return campos
+
+
+def _subcampo(campos, etiquetas, codigo):
+    for etiqueta in etiquetas:
+        for subcampos in campos.get(etiqueta, []):
+            if subcampos.get(codigo):
+                return subcampos[codigo]
+    return ""
+
+
+def _sin_puntuacion_isbd(texto):
+    return texto.rstrip(" /:;,.").strip()
+
+
+def leer_marc(flujo):
+    """MARC 21 en ISO 2709: 020$a ISBN, 245$a$b título, 100/110/700$a autor,
+    260/264$b editorial, 260/264$c año y 650$a categoría."""
+    for numero, crudo in enumerate(_registros_iso2709(flujo), start=1):
+        try:
+            campos = _campos_marc(crudo.lstrip())
+        except (ValueError, UnicodeDecodeError):
+            yield numero, {"_error": "Registro MARC mal formado."}
+            continue
+
+        titulo = _sin_puntuacion_isbd(_subcampo(campos, ["245"], "a"))
+        subtitulo = _sin_puntuacion_isbd(_subcampo(campos, ["245"], "b"))
+        if titulo and subtitulo:
+            titulo = f"{titulo}: {subtitulo}"
+
+        anio = "".join(c for c in _subcampo(campos, ["264", "260"], "c") if c.isdigit())[:4]
+
+        registro = {
+            # 020$a puede traer calificadores: "9780306406157 (pbk.)"
+            "isbn": (_subcampo(campos, ["020"], "a").split() or [""])[0],
+            "titulo": titulo,
+            "autor": _sin_puntuacion_isbd(_subcampo(campos, ["100", "110", "700"], "a")),
+            "editorial": _sin_puntuacion_isbd(_subcampo(campos, ["264", "260"], "b")),
+            "anio_publicacion": anio,
+            "categoria": _sin_puntuacion_isbd(_subcampo(campos, ["650"], "a")),
+        }
+        yield numero, {k: v for k, v in registro.items() if v}
+
+
+# ---------- Conversión y guardado ----------
+
+def _decimal(valor, nombre):
+    try:
+        return Decimal(str(valor)).quantize(Decimal("0.01"))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"{nombre} debe ser numérico.")
+
+
+def _a_libro(registro, ahora):
+    """Devuelve (Libros sin guardar, campos presentes) o lanza ValueError."""
+    if "_error" in registro:
+        raise ValueError(registro["_error"])
+
+    isbn = canonico(str(registro.get("isbn") or ""))
+    if not isbn:
+        raise ValueError("Falta el ISBN.")
+    if not es_valido(isbn):
+        raise ValueError(f"ISBN inválido: {registro.get('isbn')}.")
+
+    presentes = [c for c in CAMPOS if registro.get(c) not in (None, "")]
+    if "titulo" not in presentes or "autor" not in presentes:
+        raise ValueError("Título y autor son obligatorios.")
+
+    libro = Libros(isbn=isbn, fecha_registro=ahora, stock_total=0)
+    for campo in presentes:
+        valor = registro[campo]
+        if campo == "stock_total":
+            try:
+                valor = int(valor)
+            except (TypeError, ValueError):
+                raise ValueError("El stock debe ser un número entero.")
+        elif campo in ("precio_venta", "impuesto_porcentaje"):
+            valor = _decimal(valor, campo)
+        else:
+            valor = str(valor)[:Libros._meta.get_field(campo).max_length or None]
+        setattr(libro, campo, valor)
+    return libro, tuple(presentes)
+
+
+def _guardar_bloque(bloque, reporte):
+    ahora = timezone.now()
+
+    # Si un ISBN se repite dentro del bloque gana el último
+    por_isbn = {}
+    for numero, registro in bloque:
+        try:
+            libro, presentes = _a_libro(registro, ahora)
+        except ValueError as error:
+            reporte.rechazar(numero, str(error))
+            continue
+        por_isbn[libro.isbn] = (libro, presentes)
+
+    if not por_isbn:
+        return
+
+    # Se busca también el ISBN tal como vino y sin guiones: filas antiguas
+    # que la migración 0014 no pudo pasar a la forma canónica.
+    buscados = set(por_isbn)
+    for _, registro in bloque:
+        crudo = str(registro.get("isbn") or "").strip()
+        buscados |= {crudo, normalizar(crudo)}
+    existentes = set()
+    sin_canonico = {}
+    for libro_id, isbn in Libros.objects.filter(isbn__in=buscados).values_list("id", "isbn"):
+        if isbn in por_isbn:
+            existentes.add(isbn)
+        elif canonico(isbn) in por_isbn:
+            sin_canonico[canonico(isbn)] = libro_id
+    # La fila guardada con otra forma pasa a la canónica y el upsert la actualiza
+    for isbn, libro_id in sin_canonico.items():
+        if isbn not in existentes:
+            Libros.objects.filter(id=libro_id).update(isbn=isbn)
+            existentes.add(isbn)
+
+    # Solo se actualizan las columnas que trae el registro; normalmente
+    # todos los del bloque traen las mismas y es un solo grupo.
+    grupos = {}
+    for libro, presentes in por_isbn.values():
+        grupos.setdefault(presentes, []).append(libro)
+
+    # MySQL (ON DUPLICATE KEY UPDATE) no admite indicar la columna única
+    unique_fields = (
+        ["isbn"] if connection.features.supports_update_conflicts_with_target else None
+    )
+    for presentes, libros in grupos.items():
+        Libros.objects.bulk_create(
+            libros,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=list(presentes),
+        )
+
+    reporte.actualizados += len(existentes)
+    reporte.insertados += len(por_isbn) - len(existentes)
+
+
+def importar(registros, tamano_bloque=TAMANO_BLOQUE):
+    """
+    registros: iterable de (número, dict) de los lectores de arriba.
+    Cada bloque se confirma por separado: un error de base de datos en
+    un bloque no deshace los anteriores.
+    """
+    reporte = ReporteCatalogo()
+    bloque = []
+    for numero, registro in registros:
+        reporte.leidos += 1
+        bloque.append((numero, registro))
+        if len(bloque) >= tamano_bloque:
+            with transaction.atomic():
+                _guardar_bloque(bloque, reporte)
+            bloque = []
+    if bloque:
+        with transaction.atomic():
+            _guardar_bloque(bloque, reporte)
+    return reporte
+
+
+def registros_de_archivo(formato, binario):
+    """Elige el lector según el formato; `binario` es un archivo abierto en modo bytes."""
+    if formato == FORMATO_MARC:
+        return leer_marc(binario)
+
+    lineas = (linea.decode("utf-8-sig") for linea in binario)
+    if formato == FORMATO_CSV:
+        return leer_csv(lineas)
+    if formato == FORMATO_JSONL:
+        return leer_jsonl(lineas)
+    raise ImportacionInvalida(f"Formato desconocido: {formato}.")
@@ -0,0 +1,191 @@
+# biblio/instrumentacion.py
+"""
+Cuántas consultas SQL hace cada petición y cuánto tardan.
+
+InstrumentacionMiddleware engancha connection.execute_wrapper durante la
+petición y anota, sin tocar la consulta: número de sentencias, tiempo en
+la base de datos y cuántas veces se repitió cada sentencia normalizada
+(su "huella"). Si una huella se repite más de INSTRUMENTACION_UMBRAL_N1
+veces en la misma petición es casi seguro un N+1 (una consulta por fila
+desde un bucle o una plantilla) y se deja un warning en el log.
+
+Cada petición queda en un buffer circular en memoria de tamaño fijo
+(por proceso); el administrador lo ve agregado por vista en
+/diagnostico/consultas/. Los mismos números alimentan /metrics
+(biblio/metricas.py), que sí suma todos los procesos. Al personal se le
+devuelve además un encabezado Server-Timing que las herramientas del
+navegador muestran en la pestaña de red.
+
+El costo por consulta es un perf_counter y una expresión regular sobre
+el SQL con placeholders (no sobre los parámetros), así que puede quedar
+encendido en producción. Las consultas de un StreamingHttpResponse se
+hacen después de salir del middleware y no se cuentan.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from . import metricas
+
+logger = logging.getLogger(__name__)
+
+ROLES_PERSONAL = ("administrador", "bibliotecario")
+
+_RE_LISTA_IN = re.compile(r"IN \((?:%s|\?)(?:, ?(?:%s|\?))*\)")
+_RE_NUMERO = re.compile(r"\b\d+\b")
+_RE_CADENA = re.compile(r"'(?:[^']|'')*'")
+_RE_ESPACIOS = re.compile(r"\s+")
+
+_buffer = deque(maxlen=getattr(settings, "INSTRUMENTACION_MAX_PETICIONES", 500))
+_candado = threading.Lock()
+
+
+def huella(sql):
+    """SQL sin literales ni listas IN, para agrupar la misma sentencia."""
+    sql = _RE_CADENA.sub("?", sql)
+    sql = _RE_NUMERO.sub("?", sql)
+    sql = _RE_LISTA_IN.sub("IN (...)", sql)
+    return _RE_ESPACIOS.sub(" ", sql).strip()
+
+
+class Medidor:
+    """execute_wrapper que cuenta y cronometra las consultas de una petición."""
+
+    def __init__(self):
+        self.consultas = 0
+        self.segundos = 0.0
+        self.huellas = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos += time.perf_counter() - inicio
+            self.consultas += 1
+            self.huellas[sql] += 1
+
+    def repetidas(self, umbral):
+        """[(huella, veces)] de las sentencias repetidas más de `umbral` veces."""
+        normalizadas = Counter()
+        for sql, veces in self.huellas.items():
+            normalizadas[huella(sql)] += veces
+        return [(h, veces) for h, veces in normalizadas.most_common() if veces > umbral]
+
+
+def _es_personal(request):
+    sesion = getattr(request, "session", None)
+    if sesion is None:
+        return False
+    if sesion.get("rol_usuario") in ROLES_PERSONAL:
+        return True
+    # Admin de Django: solo se consulta el usuario si hay uno en sesión
+    if "_auth_user_id" in sesion:
+        return getattr(request.user, "is_staff", False)
+    return False
+
+
+def _nombre_vista(request):
+    coincidencia = getattr(request, "resolver_match", None)
+    if coincidencia is None:
+        return "(sin vista)"
+    return coincidencia.view_name or coincidencia._func_path
+
+
+class InstrumentacionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.activa = getattr(settings, "INSTRUMENTACION_ACTIVA", True)
+        self.umbral = getattr(settings, "INSTRUMENTACION_UMBRAL_N1", 10)
+
+    def __call__(self, request):
+        if not self.activa:
+            return self.get_response(request)
+
+        medidor = Medidor()
+        inicio = time.perf_counter()
+        with ExitStack() as pila:
+            for alias in connections:
+                pila.enter_context(connections[alias].execute_wrapper(medidor))
+            response = self.get_response(request)
+        total = time.perf_counter() - inicio
+
+        vista = _nombre_vista(request)
+        metricas.peticion(
+            vista, request.method, response.status_code, total, medidor.consultas, medidor.segundos,
+        )
+        repetidas = medidor.repetidas(self.umbral)
+        if repetidas:
+            logger.warning(
+                "Posible N+1 en %s (%s %s): %s",
+                vista, request.method, request.path,
+                "; ".join(f"{veces}x {h[:200]}" for h, veces in repetidas[:3]),
+            )
+
+        with _candado:
+            _buffer.append({
+                "fecha": timezone.now(),
+                "vista": vista,
+                "metodo": request.method,
+                "ruta": request.path,
+                "estado": response.status_code,
+                "consultas": medidor.consultas,
+                "ms_bd": medidor.segundos * 1000,
+                "ms_total": total * 1000,
+                "repetidas": repetidas,
+            })
+
+        if _es_personal(request):
+            response["Server-Timing"] = (
+                f'db;dur={medidor.segundos * 1000:.1f};desc="{medidor.consultas} consultas", '
+                f"total;dur={total * 1000:.1f}"
+            )
+        return response
+
+
+# ---------- Consulta del buffer ----------
+
+def peticiones():
+    """Copia del buffer, de la más reciente a la más antigua."""
+    with _candado:
+        return list(reversed(_buffer))
+
+
+def resumen_por_vista():
+    """Agregado por vista de lo que hay en el buffer, las más costosas primero."""
+    vistas = {}
+    for p in peticiones():
+        v = vistas.setdefault(p["vista"], {
+            "vista": p["vista"],
+            "peticiones": 0,
+            "consultas": 0,
+            "max_consultas": 0,
+            "ms_bd": 0.0,
+            "ms_total": 0.0,
+            "con_n1": 0,
+        })
+        v["peticiones"] += 1
+        v["consultas"] += p["consultas"]
+        v["max_consultas"] = max(v["max_consultas"], p["consultas"])
+        v["ms_bd"] += p["ms_bd"]
+        v["ms_total"] += p["ms_total"]
+        v["con_n1"] += bool(p["repetidas"])
+
+    for v in vistas.values():
+        n = v["peticiones"]
+        v["prom_consultas"] = v["consultas"] / n
+        v["prom_ms_bd"] = v["ms_bd"] / n
+        v["prom_ms_total"] = v["ms_total"] / n
+    return sorted(vistas.values(), key=lambda v: v["ms_bd"], reverse=True)
+
+
+def limpiar():
+    with _candado:
+        _buffer.clear()
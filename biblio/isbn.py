@@ -0,0 +1,48 @@
+# biblio/isbn.py
+"""Normalización y validación de ISBN-10 / ISBN-13."""
+import re
+
+_SEPARADORES = re.compile(r"[\s\-]")
+
+
+def normalizar(isbn):
+    """Quita guiones y espacios; la X final del ISBN-10 queda en mayúscula."""
+    return _SEPARADORES.sub("", isbn or "").upper()
+
+
+def _valido_10(isbn):
+    if not re.fullmatch(r"\d{9}[\dX]", isbn):
+        return False
+    total = sum((10 - i) * (10 if c == "X" else int(c)) for i, c in enumerate(isbn))
+    return total % 11 == 0
+
+
+def _valido_13(isbn):
+    if not re.fullmatch(r"\d{13}", isbn):
+        return False
+    total = sum(int(c) * (1 if i % 2 == 0 else 3) for i, c in enumerate(isbn))
+    return total % 10 == 0
+
+
+def es_valido(isbn):
+    isbn = normalizar(isbn)
+    return _valido_13(isbn) if len(isbn) == 13 else _valido_10(isbn)
+
+
+def a_isbn13(isbn10):
+    """Convierte un ISBN-10 válido (ya normalizado) a ISBN-13 con prefijo 978."""
+    base = "978" + isbn10[:9]
+    total = sum(int(c) * (1 if i % 2 == 0 else 3) for i, c in enumerate(base))
+    return base + str((10 - total % 10) % 10)
+
+
+def canonico(isbn):
+    """
+    Forma con la que se guarda y se busca un ISBN: sin separadores y, si es
+    un ISBN-10 válido, convertido a ISBN-13. Lo que no sea un ISBN válido
+    se devuelve solo normalizado.
+    """
+    isbn = normalizar(isbn)
+    if len(isbn) == 10 and _valido_10(isbn):
+        return a_isbn13(isbn)
+    return isbn
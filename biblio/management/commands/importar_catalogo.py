@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from biblio.importacion import (
+    FORMATO_CSV,
+    FORMATO_JSONL,
+    FORMATO_MARC,
+    TAMANO_BLOQUE,
+    ImportacionInvalida,
+    formato_por_nombre,
+    importar,
+    registros_de_archivo,
+)
+
+
+class Command(BaseCommand):
+    help = "Importa o actualiza libros del catálogo desde CSV, JSON Lines o MARC 21 (ISO 2709)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("archivo", help="Ruta del archivo.")
+        parser.add_argument(
+            "--formato",
+            choices=[FORMATO_CSV, FORMATO_JSONL, FORMATO_MARC],
+            help="Por defecto se deduce de la extensión (.csv, .jsonl, .mrc).",
+        )
+        parser.add_argument("--bloque", type=int, default=TAMANO_BLOQUE)
+
+    def handle(self, *args, **options):
+        try:
+            formato = options["formato"] or formato_por_nombre(options["archivo"])
+            with open(options["archivo"], "rb") as archivo:
+                reporte = importar(
+                    registros_de_archivo(formato, archivo), tamano_bloque=options["bloque"],
+                )
+        except (OSError, ImportacionInvalida, UnicodeDecodeError) as error:
+            raise CommandError(str(error))
+
+        for numero, mensaje in reporte.errores:
+            self.stdout.write(self.style.ERROR(f"Registro {numero}: {mensaje}"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{reporte.leidos} registros: {reporte.insertados} nuevos, "
+            f"{reporte.actualizados} actualizados, {reporte.rechazados} rechazados"
+        ))
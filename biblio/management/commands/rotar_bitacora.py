@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from biblio.auditoria import archivar, inicio_de_mes, purgar_archivo
+
+
+class Command(BaseCommand):
+    help = "Mueve a bitacora_archivo las entradas más antiguas que la retención configurada"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--meses",
+            type=int,
+            default=settings.BITACORA_RETENCION_MESES,
+            help="Meses completos que se quedan en la tabla bitacora (además del actual).",
+        )
+        parser.add_argument(
+            "--purgar-anios",
+            type=int,
+            default=settings.BITACORA_ARCHIVO_ANIOS,
+            help="Borra del archivo lo anterior a esa cantidad de años (0 = nunca).",
+        )
+        parser.add_argument("--bloque", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options["meses"] < 0 or options["purgar_anios"] < 0:
+            raise CommandError("--meses y --purgar-anios no pueden ser negativos.")
+
+        corte = inicio_de_mes(options["meses"])
+        movidas = archivar(corte, tamano_bloque=options["bloque"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{movidas} entradas anteriores a {corte:%Y-%m-%d} movidas a bitacora_archivo"
+        ))
+
+        if options["purgar_anios"]:
+            corte_archivo = inicio_de_mes(options["purgar_anios"] * 12)
+            borradas = purgar_archivo(corte_archivo, tamano_bloque=options["bloque"])
+            self.stdout.write(self.style.SUCCESS(
+                f"{borradas} entradas anteriores a {corte_archivo:%Y-%m-%d} borradas del archivo"
+            ))
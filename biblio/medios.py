@@ -0,0 +1,178 @@
+# biblio/medios.py
+"""
+Archivos subidos (portadas de libros y fotos de perfil) en producción.
+
+Antes solo se servían con DEBUG=True (django.conf.urls.static). MediaMiddleware
+los atiende antes de sesiones, auditoría e instrumentación, y solo bajo
+las carpetas de MEDIA_PUBLICA: lo demás de MEDIA_ROOT (facturas, lotes
+ZIP) sigue saliendo únicamente por sus vistas con permisos.
+
+- FileResponse pasa el archivo abierto al servidor WSGI, que lo envía con
+  sendfile (gunicorn) sin copiarlo por Python.
+- Range de un solo tramo ("bytes=0-1023", "bytes=-500") -> 206; varios
+  tramos se responden con el archivo completo, como permite el RFC.
+- ETag y Last-Modified; If-None-Match / If-Modified-Since -> 304.
+- Los nombres nuevos son únicos (NombreUnico) y el almacenamiento nunca
+  sobrescribe un archivo, así que el contenido de una URL no cambia: se
+  cachea un año como immutable.
+- Con MEDIA_SENDFILE="x-accel-redirect" (o "x-sendfile") el envío lo hace
+  nginx (o Apache); Django solo resuelve la ruta y pone los encabezados.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+import uuid
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.http import FileResponse, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.deconstruct import deconstructible
+from django.utils.http import http_date
+from django.utils.text import get_valid_filename
+
+UN_ANIO = 365 * 24 * 60 * 60
+
+_RANGO = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+@deconstructible
+class NombreUnico:
+    """upload_to: "portadas/3f2a91c0b7de-portada.jpg"; la misma URL nunca cambia de contenido."""
+
+    def __init__(self, carpeta):
+        self.carpeta = carpeta
+
+    def __call__(self, instancia, nombre):
+        return f"{self.carpeta}/{uuid.uuid4().hex[:12]}-{get_valid_filename(os.path.basename(nombre))}"
+
+    def __eq__(self, otro):
+        return isinstance(otro, NombreUnico) and otro.carpeta == self.carpeta
+
+
+def rango_pedido(encabezado, tamano):
+    """
+    (inicio, fin) inclusivos del encabezado Range, None si no aplica (sin
+    Range o con varios tramos) y ValueError si no se puede satisfacer.
+    """
+    m = _RANGO.match(encabezado.replace(" ", ""))
+    if not m:
+        return None
+    desde, hasta = m.groups()
+    if not desde and not hasta:
+        return None
+    if not desde:  # los últimos N bytes
+        largo = int(hasta)
+        if largo == 0:
+            raise ValueError(encabezado)
+        return max(0, tamano - largo), tamano - 1
+    inicio = int(desde)
+    fin = min(int(hasta), tamano - 1) if hasta else tamano - 1
+    if inicio >= tamano or fin < inicio:
+        raise ValueError(encabezado)
+    return inicio, fin
+
+
+class _Tramo:
+    """
+    Vista de [inicio, inicio + largo) de un archivo abierto. Expone fileno()
+    para que el servidor use sendfile desde la posición actual, limitado
+    por el Content-Length de la respuesta.
+    """
+
+    def __init__(self, archivo, inicio, largo):
+        archivo.seek(inicio)
+        self._archivo = archivo
+        self._quedan = largo
+
+    def read(self, n=-1):
+        if self._quedan <= 0:
+            return b""
+        datos = self._archivo.read(self._quedan if n < 0 else min(n, self._quedan))
+        self._quedan -= len(datos)
+        return datos
+
+    def fileno(self):
+        return self._archivo.fileno()
+
+    def close(self):
+        self._archivo.close()
+
+
+def respuesta_media(request, relativa, ruta):
+    """Respuesta para el archivo `ruta` (ya validado), pedido como MEDIA_URL + `relativa`."""
+    estado = ruta.stat()
+    etag = f'"{int(estado.st_mtime):x}-{estado.st_size:x}"'
+    tipo = mimetypes.guess_type(ruta.name)[0] or "application/octet-stream"
+
+    respuesta = get_conditional_response(request, etag=etag, last_modified=int(estado.st_mtime))
+    if respuesta is None:
+        respuesta = _contenido(request, relativa, ruta, tipo, estado.st_size, etag)
+
+    respuesta["ETag"] = etag
+    respuesta["Last-Modified"] = http_date(estado.st_mtime)
+    respuesta["Cache-Control"] = f"public, max-age={UN_ANIO}, immutable"
+    return respuesta
+
+
+def _contenido(request, relativa, ruta, tipo, tamano, etag):
+    modo = (settings.MEDIA_SENDFILE or "").lower()
+    if modo in ("x-sendfile", "x-accel-redirect"):
+        # nginx/Apache atienden Range y condicionales por su cuenta
+        respuesta = HttpResponse(content_type=tipo)
+        if modo == "x-sendfile":
+            respuesta["X-Sendfile"] = str(ruta)
+        else:
+            respuesta["X-Accel-Redirect"] = f"{settings.MEDIA_ACCEL_PREFIX.rstrip('/')}/{relativa}"
+        return respuesta
+
+    rango = None
+    # If-Range con otro ETag: el archivo cambió, va completo
+    if "HTTP_RANGE" in request.META and request.META.get("HTTP_IF_RANGE", etag) == etag:
+        try:
+            rango = rango_pedido(request.META["HTTP_RANGE"], tamano)
+        except ValueError:
+            respuesta = HttpResponse(status=416)
+            respuesta["Content-Range"] = f"bytes */{tamano}"
+            return respuesta
+
+    if request.method == "HEAD":
+        respuesta = HttpResponse(content_type=tipo)
+        respuesta["Content-Length"] = str(tamano)
+    elif rango is None:
+        respuesta = FileResponse(open(ruta, "rb"), content_type=tipo)
+        del respuesta["Content-Disposition"]
+    else:
+        inicio, fin = rango
+        largo = fin - inicio + 1
+        respuesta = FileResponse(_Tramo(open(ruta, "rb"), inicio, largo), content_type=tipo, status=206)
+        respuesta["Content-Length"] = str(largo)
+        respuesta["Content-Range"] = f"bytes {inicio}-{fin}/{tamano}"
+    respuesta["Accept-Ranges"] = "bytes"
+    return respuesta
+
+
+class MediaMiddleware:
+    def __init__(self, get_response):
+        if not settings.MEDIA_PUBLICA:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefijo = urlsplit(settings.MEDIA_URL).path
+        self.carpetas = tuple(c.strip("/") + "/" for c in settings.MEDIA_PUBLICA)
+
+    def __call__(self, request):
+        if request.method in ("GET", "HEAD") and request.path_info.startswith(self.prefijo):
+            # Normalizada antes de mirar la carpeta: "portadas/../documentos/x"
+            relativa = posixpath.normpath(request.path_info[len(self.prefijo):])
+            if relativa.startswith(self.carpetas):
+                try:
+                    ruta = Path(safe_join(settings.MEDIA_ROOT, relativa))
+                except SuspiciousFileOperation:
+                    ruta = None
+                if ruta is not None and ruta.is_file():
+                    return respuesta_media(request, relativa, ruta)
+        return self.get_response(request)
@@ -0,0 +1,245 @@
+# biblio/metricas.py
+"""
+Métricas en formato de texto de Prometheus (/metrics).
+
+Cada proceso acumula sus contadores en memoria y, como mucho cada
+METRICAS_INTERVALO segundos, los vuelca a un archivo propio en
+METRICAS_DIR (escritura atómica: tmp + rename). Al servir /metrics se
+suman los archivos de todos los procesos, así da igual qué worker de
+gunicorn atienda la petición. Los archivos de workers que ya murieron se
+conservan: sus contadores siguen contando para el total, como exige
+Prometheus. El directorio se vacía al arrancar el servidor (ver la
+configuración de gunicorn); sin METRICAS_DIR solo se ve el proceso actual.
+
+Todo son contadores, incluidos los histogramas (buckets acumulados,
+_sum y _count), así que sumar procesos es siempre correcto.
+"""
+import atexit
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+
+PREFIJO = "biblionet"
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# nombre -> (tipo, ayuda)
+DEFINICIONES = {
+    "http_peticiones": ("counter", "Peticiones atendidas por vista, método y código HTTP."),
+    "http_duracion_segundos": ("histogram", "Duración de las peticiones por vista."),
+    "bd_consultas": ("counter", "Consultas SQL ejecutadas por vista."),
+    "bd_segundos": ("counter", "Tiempo total en la base de datos por vista."),
+    "bd_conexiones": ("counter", "Conexiones a la BD por resultado (abierta, reutilizada, fallida)."),
+    "bd_conexion_segundos": ("histogram", "Tiempo en abrir una conexión nueva a la BD."),
+    "cache_operaciones": ("counter", "Lecturas de caché por resultado (hit/miss)."),
+    "eventos": ("counter", "Acciones del negocio por código de bitácora (préstamos, devoluciones, ventas…)."),
+    "pdf_generados": ("counter", "PDF dibujados por tipo de documento (no cuenta los servidos desde disco)."),
+}
+
+
+class _Almacen:
+    def __init__(self):
+        self._candado = threading.Lock()
+        self._reiniciar()
+        atexit.register(self.guardar)
+
+    def _reiniciar(self):
+        # También tras un fork: el hijo no debe volver a sumar lo del padre
+        self._pid = os.getpid()
+        self._archivo = f"{self._pid}-{uuid.uuid4().hex[:8]}.json"
+        self._valores = {}
+        self._ultimo_guardado = time.monotonic()
+
+    def sumar(self, muestras):
+        """muestras: [(nombre, valor, etiquetas)], bajo un solo candado."""
+        with self._candado:
+            if self._pid != os.getpid():
+                self._reiniciar()
+            for nombre, valor, etiquetas in muestras:
+                clave = (nombre, tuple(sorted(etiquetas.items())))
+                self._valores[clave] = self._valores.get(clave, 0) + valor
+            toca = time.monotonic() - self._ultimo_guardado >= _intervalo()
+        if toca:
+            self.guardar()
+
+    def copia(self):
+        with self._candado:
+            if self._pid != os.getpid():
+                self._reiniciar()
+            return dict(self._valores)
+
+    def guardar(self):
+        directorio = _directorio()
+        if directorio is None:
+            return
+        with self._candado:
+            if self._pid != os.getpid():
+                return
+            filas = [[n, list(e), v] for (n, e), v in self._valores.items()]
+            self._ultimo_guardado = time.monotonic()
+            archivo = self._archivo
+        directorio.mkdir(parents=True, exist_ok=True)
+        temporal = directorio / f".{archivo}.tmp"
+        temporal.write_text(json.dumps(filas), encoding="utf-8")
+        os.replace(temporal, directorio / archivo)
+
+    def total(self):
+        """Suma de todos los procesos (este, en memoria; los demás, de disco)."""
+        totales = self.copia()
+        directorio = _directorio()
+        if directorio is None or not directorio.is_dir():
+            return totales
+        propio = self._archivo
+        for ruta in directorio.glob("*.json"):
+            if ruta.name == propio:
+                continue
+            try:
+                filas = json.loads(ruta.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            for nombre, etiquetas, valor in filas:
+                clave = (nombre, tuple(tuple(par) for par in etiquetas))
+                totales[clave] = totales.get(clave, 0) + valor
+        return totales
+
+
+def vaciar_directorio():
+    """
+    Borra los volcados de METRICAS_DIR. Se llama al arrancar el servidor
+    (core/gunicorn.conf.py, que lo omite en la re-ejecución con USR2),
+    nunca con workers vivos: los contadores de Prometheus solo pueden
+    volver a cero con un reinicio de verdad.
+    """
+    directorio = _directorio()
+    if directorio is None or not directorio.is_dir():
+        return 0
+    archivos = [*directorio.glob("*.json"), *directorio.glob(".*.json.tmp")]
+    for ruta in archivos:
+        ruta.unlink(missing_ok=True)
+    return len(archivos)
+
+
+def _directorio():
+    ruta = getattr(settings, "METRICAS_DIR", "")
+    return Path(ruta) if ruta else None
+
+
+def _intervalo():
+    return getattr(settings, "METRICAS_INTERVALO", 5)
+
+
+_almacen = _Almacen()
+
+
+# ---------- Registro ----------
+
+def contar(nombre, valor=1, **etiquetas):
+    _almacen.sumar([(nombre, valor, etiquetas)])
+
+
+def _histograma(nombre, segundos, etiquetas):
+    """Un contador por bucket (acumulado) + _sum + _count."""
+    muestras = [
+        (f"{nombre}_bucket", 1, {**etiquetas, "le": repr(limite)})
+        for limite in BUCKETS_SEGUNDOS
+        if segundos <= limite
+    ]
+    muestras.append((f"{nombre}_bucket", 1, {**etiquetas, "le": "+Inf"}))
+    muestras.append((f"{nombre}_sum", segundos, etiquetas))
+    muestras.append((f"{nombre}_count", 1, etiquetas))
+    return muestras
+
+
+def observar(nombre, segundos, **etiquetas):
+    _almacen.sumar(_histograma(nombre, segundos, etiquetas))
+
+
+def peticion(vista, metodo, estado, segundos, consultas, segundos_bd):
+    _almacen.sumar([
+        ("http_peticiones", 1, {"vista": vista, "metodo": metodo, "estado": str(estado)}),
+        ("bd_consultas", consultas, {"vista": vista}),
+        ("bd_segundos", segundos_bd, {"vista": vista}),
+        *_histograma("http_duracion_segundos", segundos, {"vista": vista}),
+    ])
+
+
+# ---------- Exposición ----------
+
+def _base(nombre):
+    for sufijo in ("_bucket", "_sum", "_count"):
+        if nombre.endswith(sufijo) and nombre[: -len(sufijo)] in DEFINICIONES:
+            return nombre[: -len(sufijo)]
+    return nombre
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _numero(valor):
+    if isinstance(valor, float) and not valor.is_integer():
+        return repr(valor)
+    return str(int(valor))
+
+
+def _orden_le(etiquetas):
+    le = dict(etiquetas).get("le")
+    if le is None:
+        return 0
+    return math.inf if le == "+Inf" else float(le)
+
+
+def exposicion():
+    """Texto para Prometheus (text/plain; version=0.0.4)."""
+    por_base = {}
+    for (nombre, etiquetas), valor in _almacen.total().items():
+        por_base.setdefault(_base(nombre), []).append((nombre, etiquetas, valor))
+
+    lineas = []
+    for base in sorted(por_base):
+        tipo, ayuda = DEFINICIONES.get(base, ("untyped", ""))
+        completo = f"{PREFIJO}_{base}_total" if tipo == "counter" else f"{PREFIJO}_{base}"
+        lineas.append(f"# HELP {completo} {ayuda}")
+        lineas.append(f"# TYPE {completo} {tipo}")
+        muestras = sorted(
+            por_base[base],
+            key=lambda m: (
+                [par for par in m[1] if par[0] != "le"], m[0], _orden_le(m[1]),
+            ),
+        )
+        for nombre, etiquetas, valor in muestras:
+            if tipo == "counter":
+                nombre = f"{nombre}_total"
+            # "le" al final, como lo escriben los clientes oficiales
+            ordenadas = sorted(etiquetas, key=lambda par: par[0] == "le")
+            texto = ",".join(f'{k}="{_escapar(v)}"' for k, v in ordenadas)
+            lineas.append(f"{PREFIJO}_{nombre}{{{texto}}} {_numero(valor)}")
+    return "\n".join(lineas) + "\n"
+
+
+# ---------- Caché ----------
+
+class CacheLocalMedida(LocMemCache):
+    """
+    LocMemCache que cuenta aciertos y fallos (cache_operaciones). get_many,
+    get_or_set, etc. pasan por get(), así que también quedan contados.
+    """
+
+    _FALTA = object()
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self._nombre = name or "default"
+
+    def get(self, key, default=None, version=None):
+        valor = super().get(key, self._FALTA, version)
+        resultado = "miss" if valor is self._FALTA else "hit"
+        contar("cache_operaciones", cache=self._nombre, resultado=resultado)
+        return default if valor is self._FALTA else valor
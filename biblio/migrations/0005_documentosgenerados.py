@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biblio', '0004_proveedores_clientes_telefono_usuarios_foto_perfil_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentosGenerados',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('factura', 'Factura de venta'), ('comprobante_compra', 'Comprobante de compra')], max_length=30)),
+                ('objeto_id', models.BigIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('ruta', models.CharField(max_length=255)),
+                ('tamano', models.PositiveIntegerField(default=0)),
+                ('fecha_generacion', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'documentos_generados',
+                'constraints': [models.UniqueConstraint(fields=('tipo', 'objeto_id'), name='documento_unico_por_objeto')],
+            },
+        ),
+    ]
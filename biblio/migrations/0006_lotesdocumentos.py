@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biblio', '0005_documentosgenerados'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LotesDocumentos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('factura', 'Factura de venta'), ('comprobante_compra', 'Comprobante de compra')], max_length=30)),
+                ('filtros', models.JSONField(blank=True, default=dict)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('terminado', 'Terminado'), ('error', 'Error')], default='pendiente', max_length=20)),
+                ('total', models.IntegerField(default=0)),
+                ('procesados', models.IntegerField(default=0)),
+                ('archivo', models.CharField(blank=True, max_length=255, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.DO_NOTHING, to='biblio.usuarios')),
+            ],
+            options={
+                'db_table': 'lotes_documentos',
+            },
+        ),
+    ]
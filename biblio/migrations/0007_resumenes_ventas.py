@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biblio', '0006_lotesdocumentos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenVentasDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('metodo_pago', models.CharField(max_length=50)),
+                ('categoria', models.CharField(blank=True, default='', max_length=100)),
+                ('num_ventas', models.IntegerField(default=0)),
+                ('unidades', models.IntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('vendedor', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, to='biblio.usuarios')),
+            ],
+            options={
+                'db_table': 'resumen_ventas_diario',
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'vendedor', 'metodo_pago', 'categoria'), name='resumen_diario_unico')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenVentasMensual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField()),
+                ('metodo_pago', models.CharField(max_length=50)),
+                ('categoria', models.CharField(blank=True, default='', max_length=100)),
+                ('num_ventas', models.IntegerField(default=0)),
+                ('unidades', models.IntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('vendedor', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, to='biblio.usuarios')),
+            ],
+            options={
+                'db_table': 'resumen_ventas_mensual',
+                'constraints': [models.UniqueConstraint(fields=('mes', 'vendedor', 'metodo_pago', 'categoria'), name='resumen_mensual_unico')],
+            },
+        ),
+    ]
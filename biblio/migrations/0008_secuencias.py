@@ -0,0 +1,49 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:16
+
+from django.db import migrations, models
+
+
+SERIES = [
+    # nombre, prefijo, relleno
+    ("FAC", "FAC-", 8),    # facturas de venta
+    ("COMP", "COMP-", 6),  # compras a proveedores
+    ("EJ", "EJ-", 8),      # código interno de ejemplares
+]
+
+
+def crear_series(apps, schema_editor):
+    Secuencias = apps.get_model("biblio", "Secuencias")
+    for nombre, prefijo, relleno in SERIES:
+        Secuencias.objects.get_or_create(
+            nombre=nombre, defaults={"prefijo": prefijo, "relleno": relleno},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biblio', '0007_resumenes_ventas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Secuencias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=20, unique=True)),
+                ('prefijo', models.CharField(blank=True, default='', max_length=20)),
+                ('relleno', models.PositiveSmallIntegerField(default=6)),
+                ('ultimo_valor', models.BigIntegerField(default=0)),
+                ('bloque', models.PositiveIntegerField(default=1)),
+            ],
+            options={
+                'db_table': 'secuencias',
+            },
+        ),
+        migrations.AddField(
+            model_name='ventas',
+            name='numero_factura',
+            field=models.CharField(blank=True, max_length=50, null=True, unique=True),
+        ),
+        migrations.RunPython(crear_series, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:26
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Textos que ya estaban en la bitácora -> (codigo, entidad, patrón del id)
+ACCIONES_ANTERIORES = [
+    ("REGISTRO EMPLEADO", "usuario.registrado", "usuario", None),
+    ("DESBLOQUEÓ CLIENTE", "cliente.desbloqueado", "cliente", r"ID=(\d+)"),
+    ("BLOQUEÓ CLIENTE", "cliente.bloqueado", "cliente", r"ID=(\d+)"),
+    ("ACTUALIZÓ REGLAS DE PRÉSTAMO", "reglas_prestamo.actualizadas", "reglas_prestamo", None),
+    ("REGISTRO PRÉSTAMO", "prestamo.registrado", "prestamo", r"id_prestamo=(\d+)"),
+    ("DEVOLVIÓ PRÉSTAMO CON MORA", "prestamo.devuelto_con_mora", "prestamo", r"id=(\d+)"),
+    ("DEVOLVIÓ PRÉSTAMO", "prestamo.devuelto", "prestamo", r"id=(\d+)"),
+    ("RENOVÓ PRÉSTAMO", "prestamo.renovado", "prestamo", r"id=(\d+)"),
+    ("REGISTRÓ COMPRA", "compra.registrada", "compra", r"id=(\d+)"),
+    ("IMPORTÓ COMPRA", "compra.importada", "compra", r"id=(\d+)"),
+    ("EDITÓ COMPRA", "compra.editada", "compra", r"id=(\d+)"),
+    ("FACTURÓ VENTA", "venta.facturada", "venta", r"id=(\d+)"),
+    ("IMPORTÓ CATÁLOGO", "catalogo.importado", "libro", None),
+]
+
+
+def completar_codigos(apps, schema_editor):
+    Bitacora = apps.get_model("biblio", "Bitacora")
+    ultimo_id = 0
+    while True:
+        bloque = list(
+            Bitacora.objects.filter(id__gt=ultimo_id, codigo="").order_by("id")[:5000]
+        )
+        if not bloque:
+            return
+        cambiadas = []
+        for fila in bloque:
+            for prefijo, codigo, entidad, patron in ACCIONES_ANTERIORES:
+                if not fila.accion.startswith(prefijo):
+                    continue
+                fila.codigo = codigo
+                fila.entidad = entidad
+                encontrado = re.search(patron, fila.accion) if patron else None
+                if encontrado:
+                    fila.entidad_id = int(encontrado.group(1))
+                cambiadas.append(fila)
+                break
+        Bitacora.objects.bulk_update(cambiadas, ["codigo", "entidad", "entidad_id"], batch_size=1000)
+        ultimo_id = bloque[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biblio', '0008_secuencias'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BitacoraArchivo',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('accion', models.CharField(max_length=255)),
+                ('fecha', models.DateTimeField(blank=True, null=True)),
+                ('codigo', models.CharField(blank=True, default='', max_length=40)),
+                ('entidad', models.CharField(blank=True, default='', max_length=30)),
+                ('entidad_id', models.BigIntegerField(blank=True, null=True)),
+                ('datos', models.JSONField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'bitacora_archivo',
+            },
+        ),
+        migrations.AddField(
+            model_name='bitacora',
+            name='codigo',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='bitacora',
+            name='datos',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='bitacora',
+            name='entidad',
+            field=models.CharField(blank=True, default='', max_length=30),
+        ),
+        migrations.AddField(
+            model_name='bitacora',
+            name='entidad_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='bitacora',
+            index=models.Index(fields=['entidad', 'entidad_id', 'fecha'], name='bitacora_entidad_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bitacora',
+            index=models.Index(fields=['usuario', 'fecha'], name='bitacora_usuario_fecha_idx'),
+        ),
+        migrations.RunPython(completar_codigos, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='bitacoraarchivo',
+            name='usuario',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='biblio.usuarios'),
+        ),
+        migrations.AddIndex(
+            model_name='bitacoraarchivo',
+            index=models.Index(fields=['entidad', 'entidad_id', 'fecha'], name='bitarch_entidad_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bitacoraarchivo',
+            index=models.Index(fields=['usuario', 'fecha'], name='bitarch_usuario_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bitacoraarchivo',
+            index=models.Index(fields=['fecha'], name='bitarch_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biblio', '0009_bitacora_estructurada'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='bitacoraarchivo',
+            name='bitarch_fecha_idx',
+        ),
+        migrations.AddIndex(
+            model_name='bitacora',
+            index=models.Index(fields=['codigo', 'fecha'], name='bitacora_codigo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bitacora',
+            index=models.Index(fields=['fecha', 'id'], name='bitacora_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bitacoraarchivo',
+            index=models.Index(fields=['codigo', 'fecha'], name='bitarch_codigo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bitacoraarchivo',
+            index=models.Index(fields=['fecha', 'id'], name='bitarch_fecha_id_idx'),
+        ),
+    ]
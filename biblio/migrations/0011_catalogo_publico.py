@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:02
+
+from django.db import migrations
+
+
+# Misma definición que en biblionet.sql.txt. CatalogoPublico es managed=False,
+# así que sin esta migración la vista solo existía en las BD creadas con el
+# script de MySQL (y no en SQLite ni en la BD de pruebas).
+SELECT_CATALOGO = """
+SELECT
+    l.id AS id_libro,
+    l.titulo,
+    l.autor,
+    l.categoria,
+    l.editorial,
+    l.anio_publicacion,
+    l.portada,
+    COUNT(e.id) AS total_ejemplares,
+    SUM(CASE WHEN e.estado = 'disponible' THEN 1 ELSE 0 END) AS disponibles
+FROM libros l
+LEFT JOIN ejemplares e ON l.id = e.libro_id
+GROUP BY l.id
+"""
+
+
+def crear_vista(apps, schema_editor):
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute("CREATE OR REPLACE VIEW catalogo_publico AS " + SELECT_CATALOGO)
+    else:
+        schema_editor.execute("DROP VIEW IF EXISTS catalogo_publico")
+        schema_editor.execute("CREATE VIEW catalogo_publico AS " + SELECT_CATALOGO)
+
+
+def borrar_vista(apps, schema_editor):
+    # En MySQL la vista viene del script de la BD: no se borra al revertir
+    if schema_editor.connection.vendor != "mysql":
+        schema_editor.execute("DROP VIEW IF EXISTS catalogo_publico")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biblio', '0010_bitacora_navegacion'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_vista, borrar_vista),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:46
+
+import biblio.medios
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biblio', '0011_catalogo_publico'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='libros',
+            name='portada',
+            field=models.ImageField(blank=True, null=True, upload_to=biblio.medios.NombreUnico('portadas')),
+        ),
+        migrations.AlterField(
+            model_name='usuarios',
+            name='foto_perfil',
+            field=models.ImageField(blank=True, null=True, upload_to=biblio.medios.NombreUnico('perfiles')),
+        ),
+    ]
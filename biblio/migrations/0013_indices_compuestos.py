@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:41
+
+from django.db import migrations, models
+
+from biblio.bd.operaciones import AgregarIndiceEnLinea
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biblio', '0012_nombres_unicos_media'),
+    ]
+
+    # En MySQL cada índice se construye sin bloquear la tabla (ver biblio/bd/operaciones.py)
+    operations = [
+        AgregarIndiceEnLinea(
+            model_name='compras',
+            index=models.Index(fields=['fecha', 'id'], name='compras_fecha_id_idx'),
+        ),
+        AgregarIndiceEnLinea(
+            model_name='libros',
+            index=models.Index(fields=['-fecha_registro', 'titulo'], name='libros_registro_titulo_idx'),
+        ),
+        AgregarIndiceEnLinea(
+            model_name='prestamos',
+            index=models.Index(fields=['estado', 'fecha_inicio'], name='prestamos_estado_inicio_idx'),
+        ),
+        AgregarIndiceEnLinea(
+            model_name='prestamos',
+            index=models.Index(fields=['cliente', 'estado'], name='prestamos_cliente_estado_idx'),
+        ),
+        AgregarIndiceEnLinea(
+            model_name='prestamos',
+            index=models.Index(fields=['cliente', 'fecha_devolucion', 'fecha_fin'], name='prestamos_cli_devol_fin_idx'),
+        ),
+        AgregarIndiceEnLinea(
+            model_name='reservas',
+            index=models.Index(fields=['cliente', 'libro', 'estado'], name='reservas_cli_libro_est_idx'),
+        ),
+        AgregarIndiceEnLinea(
+            model_name='solicitudventa',
+            index=models.Index(fields=['estado', 'fecha_solicitud'], name='solventa_estado_fecha_idx'),
+        ),
+        AgregarIndiceEnLinea(
+            model_name='ventas',
+            index=models.Index(fields=['cliente', 'estado', 'id'], name='ventas_cli_estado_id_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+from biblio.isbn import canonico
+
+
+def canonizar_isbn(apps, schema_editor):
+    """
+    Pasa los ISBN guardados a la forma canónica (ISBN-13 sin guiones) con la
+    que ahora se importan y se buscan. Si la forma canónica ya la tiene otro
+    libro, la fila se deja como está: la importación la sigue encontrando
+    por su ISBN original.
+    """
+    Libros = apps.get_model("biblio", "Libros")
+    guardados = dict(Libros.objects.values_list("isbn", "id"))
+    ocupados = set(guardados)
+    for isbn, libro_id in guardados.items():
+        nuevo = canonico(isbn)
+        if nuevo and nuevo != isbn and nuevo not in ocupados:
+            Libros.objects.filter(id=libro_id).update(isbn=nuevo)
+            ocupados.add(nuevo)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biblio', '0013_indices_compuestos'),
+    ]
+
+    operations = [
+        migrations.RunPython(canonizar_isbn, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.utils import timezone
+
+BLOQUE = 2000
+
+
+def _sumar(acumulado, clave, ventas, unidades, total):
+    fila = acumulado.setdefault(clave, [0, 0, Decimal("0.00")])
+    fila[0] += ventas
+    fila[1] += unidades
+    fila[2] += total
+
+
+def llenar_resumenes(apps, schema_editor):
+    """
+    Los resúmenes de ventas (0007) nacieron vacíos y el historial y el panel
+    leen de ellos: se calculan una vez con las ventas que ya existían, con
+    la misma regla que seguridad.resumenes (la venta cuenta en la categoría
+    de su primera línea). Solo corre si hay ventas y ningún resumen.
+    """
+    Ventas = apps.get_model("biblio", "Ventas")
+    DetalleVenta = apps.get_model("biblio", "DetalleVenta")
+    ResumenVentasDiario = apps.get_model("biblio", "ResumenVentasDiario")
+    ResumenVentasMensual = apps.get_model("biblio", "ResumenVentasMensual")
+    if not Ventas.objects.exists() or ResumenVentasDiario.objects.exists():
+        return
+
+    diario = {}
+    ultimo_id = 0
+    while True:
+        bloque = list(
+            Ventas.objects.filter(id__gt=ultimo_id).order_by("id")
+            .values_list("id", "fecha_venta", "vendedor_id", "metodo_pago", "total")[:BLOQUE]
+        )
+        if not bloque:
+            break
+        ultimo_id = bloque[-1][0]
+
+        detalles = {}
+        for venta_id, cantidad, total_linea, categoria in (
+            DetalleVenta.objects.filter(venta_id__in=[v[0] for v in bloque]).order_by("id")
+            .values_list("venta_id", "cantidad", "total_linea", "libro__categoria")
+        ):
+            detalles.setdefault(venta_id, []).append((cantidad, total_linea, categoria))
+
+        for venta_id, fecha_venta, vendedor_id, metodo_pago, total in bloque:
+            if timezone.is_aware(fecha_venta):
+                fecha_venta = timezone.localtime(fecha_venta)
+            base = (fecha_venta.date(), vendedor_id, metodo_pago or "")
+            lineas = detalles.get(venta_id)
+            if not lineas:
+                _sumar(diario, base + ("",), 1, 0, total or Decimal("0.00"))
+                continue
+            for i, (cantidad, total_linea, categoria) in enumerate(lineas):
+                _sumar(
+                    diario, base + (categoria or "",), 1 if i == 0 else 0,
+                    cantidad or 0, total_linea or Decimal("0.00"),
+                )
+
+    mensual = {}
+    for (fecha, vendedor_id, metodo_pago, categoria), valores in diario.items():
+        _sumar(mensual, (fecha.replace(day=1), vendedor_id, metodo_pago, categoria), *valores)
+
+    for modelo, campo, acumulado in (
+        (ResumenVentasDiario, "fecha", diario),
+        (ResumenVentasMensual, "mes", mensual),
+    ):
+        modelo.objects.bulk_create(
+            [
+                modelo(**{campo: fecha}, vendedor_id=vendedor_id, metodo_pago=metodo_pago,
+                       categoria=categoria, num_ventas=num_ventas, unidades=unidades, total=total)
+                for (fecha, vendedor_id, metodo_pago, categoria), (num_ventas, unidades, total)
+                in acumulado.items()
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biblio', '0014_isbn_canonico'),
+    ]
+
+    operations = [
+        migrations.RunPython(llenar_resumenes, migrations.RunPython.noop),
+    ]
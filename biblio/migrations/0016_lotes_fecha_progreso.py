@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biblio', '0015_llenar_resumenes_ventas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lotesdocumentos',
+            name='fecha_progreso',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,5 +1,7 @@
 ﻿from django.db import models
 
+from .medios import NombreUnico
+
 
 class Roles(models.Model):
     nombre = models.CharField(unique=True, max_length=50)
@@ -42,7 +44,7 @@ class Usuarios(models.Model):
     # 🔹 Opcionales, tomados de la versión de tu compañera
     primer_ingreso = models.BooleanField(default=True)
     foto_perfil = models.ImageField(
-        upload_to="perfiles/",
+        upload_to=NombreUnico("perfiles"),
         blank=True,
         null=True
     )
@@ -59,8 +61,47 @@ class Bitacora(models.Model):
     accion = models.CharField(max_length=255)
     fecha = models.DateTimeField(blank=True, null=True)
 
+    # 🔹 NUEVO: datos estructurados para buscar por índice en vez de LIKE
+    # sobre `accion` (ver biblio/auditoria.py)
+    codigo = models.CharField(max_length=40, blank=True, default="")  # "prestamo.renovado"
+    entidad = models.CharField(max_length=30, blank=True, default="")  # "prestamo"
+    entidad_id = models.BigIntegerField(blank=True, null=True)
+    datos = models.JSONField(blank=True, null=True)
+
     class Meta:
         db_table = 'bitacora'
+        indexes = [
+            models.Index(fields=["entidad", "entidad_id", "fecha"], name="bitacora_entidad_fecha_idx"),
+            models.Index(fields=["usuario", "fecha"], name="bitacora_usuario_fecha_idx"),
+            # Navegación de la bitácora: cursor sobre (fecha, id)
+            models.Index(fields=["codigo", "fecha"], name="bitacora_codigo_fecha_idx"),
+            models.Index(fields=["fecha", "id"], name="bitacora_fecha_id_idx"),
+        ]
+
+
+# 🔹 NUEVO: entradas de bitácora más antiguas que la retención, movidas
+# por el comando rotar_bitacora. Conserva el id original.
+class BitacoraArchivo(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    usuario = models.ForeignKey(
+        Usuarios, models.DO_NOTHING, blank=True, null=True, db_constraint=False,
+        related_name="+",
+    )
+    accion = models.CharField(max_length=255)
+    fecha = models.DateTimeField(blank=True, null=True)
+    codigo = models.CharField(max_length=40, blank=True, default="")
+    entidad = models.CharField(max_length=30, blank=True, default="")
+    entidad_id = models.BigIntegerField(blank=True, null=True)
+    datos = models.JSONField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'bitacora_archivo'
+        indexes = [
+            models.Index(fields=["entidad", "entidad_id", "fecha"], name="bitarch_entidad_fecha_idx"),
+            models.Index(fields=["usuario", "fecha"], name="bitarch_usuario_fecha_idx"),
+            models.Index(fields=["codigo", "fecha"], name="bitarch_codigo_fecha_idx"),
+            models.Index(fields=["fecha", "id"], name="bitarch_fecha_id_idx"),
+        ]
 
 
 class Clientes(models.Model):
@@ -98,7 +139,7 @@ class Libros(models.Model):
     editorial = models.CharField(max_length=150, blank=True, null=True)
     anio_publicacion = models.TextField(blank=True, null=True)
     stock_total = models.IntegerField(blank=True, null=True)
-    portada = models.ImageField(upload_to='portadas/', blank=True, null=True)
+    portada = models.ImageField(upload_to=NombreUnico("portadas"), blank=True, null=True)
     fecha_registro = models.DateTimeField(blank=True, null=True)
 
     # 🔹 Campos que añadimos para ventas
@@ -117,6 +158,10 @@ class Libros(models.Model):
 
     class Meta:
         db_table = 'libros'
+        indexes = [
+            # Inventario: order_by("-fecha_registro", "titulo"), direcciones mezcladas
+            models.Index(fields=["-fecha_registro", "titulo"], name="libros_registro_titulo_idx"),
+        ]
 
     def __str__(self):
         return f"{self.titulo} ({self.isbn})"
@@ -159,6 +204,12 @@ class Prestamos(models.Model):
 
     class Meta:
         db_table = 'prestamos'
+        indexes = [
+            models.Index(fields=["estado", "fecha_inicio"], name="prestamos_estado_inicio_idx"),
+            models.Index(fields=["cliente", "estado"], name="prestamos_cliente_estado_idx"),
+            # Préstamos en mora de un cliente: sin devolver y con fecha_fin vencida
+            models.Index(fields=["cliente", "fecha_devolucion", "fecha_fin"], name="prestamos_cli_devol_fin_idx"),
+        ]
 
     def __str__(self):
         return f"Préstamo #{self.id} - {self.ejemplar} - {self.cliente}"
@@ -173,6 +224,9 @@ class Reservas(models.Model):
 
     class Meta:
         db_table = 'reservas'
+        indexes = [
+            models.Index(fields=["cliente", "libro", "estado"], name="reservas_cli_libro_est_idx"),
+        ]
 
     def __str__(self):
         return f"Reserva #{self.id} - {self.libro} - {self.cliente}"
@@ -238,6 +292,9 @@ class Compras(models.Model):
 
     class Meta:
         db_table = "compras"
+        indexes = [
+            models.Index(fields=["fecha", "id"], name="compras_fecha_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.numero_factura} - {self.proveedor.nombre_comercial}"
@@ -283,9 +340,14 @@ class Ventas(models.Model):
         blank=True,
         null=True,
     )
+    # 🔹 NUEVO: número fiscal de la serie FAC (ver biblio/secuencias.py)
+    numero_factura = models.CharField(max_length=50, unique=True, blank=True, null=True)
 
     class Meta:
         db_table = 'ventas'
+        indexes = [
+            models.Index(fields=["cliente", "estado", "id"], name="ventas_cli_estado_id_idx"),
+        ]
 
     def __str__(self):
         return f"Venta #{self.id} - {self.cliente} - {self.total}"
@@ -338,6 +400,134 @@ class SolicitudVenta(models.Model):
 
     class Meta:
         db_table = 'solicitudes_venta'
+        indexes = [
+            models.Index(fields=["estado", "fecha_solicitud"], name="solventa_estado_fecha_idx"),
+        ]
 
     def __str__(self):
         return f"Solicitud #{self.id} - {self.cliente} - {self.libro}"
+
+
+# 🔹 NUEVO: PDFs ya generados (facturas y comprobantes), guardados en disco
+class DocumentosGenerados(models.Model):
+    TIPO_CHOICES = (
+        ("factura", "Factura de venta"),
+        ("comprobante_compra", "Comprobante de compra"),
+    )
+
+    tipo = models.CharField(max_length=30, choices=TIPO_CHOICES)
+    objeto_id = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    ruta = models.CharField(max_length=255)  # relativa a MEDIA_ROOT
+    tamano = models.PositiveIntegerField(default=0)
+    fecha_generacion = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "documentos_generados"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tipo", "objeto_id"],
+                name="documento_unico_por_objeto",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} #{self.objeto_id} ({self.sha256[:12]})"
+
+
+# 🔹 NUEVO: lotes de PDFs (p. ej. "todas las facturas de octubre") en un ZIP
+class LotesDocumentos(models.Model):
+    ESTADO_CHOICES = (
+        ("pendiente", "Pendiente"),
+        ("procesando", "Procesando"),
+        ("terminado", "Terminado"),
+        ("error", "Error"),
+    )
+
+    tipo = models.CharField(max_length=30, choices=DocumentosGenerados.TIPO_CHOICES)
+    filtros = models.JSONField(default=dict, blank=True)
+    usuario = models.ForeignKey(Usuarios, models.DO_NOTHING, blank=True, null=True)
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default="pendiente")
+    total = models.IntegerField(default=0)
+    procesados = models.IntegerField(default=0)
+    archivo = models.CharField(max_length=255, blank=True, null=True)  # relativa a MEDIA_ROOT
+    error = models.TextField(blank=True, null=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    # Última señal de quien lo procesa; si se detiene, el lote se retoma
+    fecha_progreso = models.DateTimeField(blank=True, null=True)
+    fecha_fin = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = "lotes_documentos"
+
+    def __str__(self):
+        return f"Lote #{self.id} - {self.tipo} ({self.estado})"
+
+    @property
+    def porcentaje(self):
+        if not self.total:
+            return 100 if self.estado == "terminado" else 0
+        return int(self.procesados * 100 / self.total)
+
+
+# 🔹 NUEVO: resúmenes de ventas precalculados (se actualizan en la misma
+# transacción que la venta; ver seguridad/resumenes.py)
+class ResumenVentasDiario(models.Model):
+    fecha = models.DateField()
+    vendedor = models.ForeignKey(Usuarios, models.DO_NOTHING)
+    metodo_pago = models.CharField(max_length=50)
+    categoria = models.CharField(max_length=100, blank=True, default="")
+    # cada venta se cuenta una sola vez, en la categoría de su primera línea
+    num_ventas = models.IntegerField(default=0)
+    unidades = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = "resumen_ventas_diario"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["fecha", "vendedor", "metodo_pago", "categoria"],
+                name="resumen_diario_unico",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} - {self.vendedor_id} - {self.metodo_pago} - {self.categoria}"
+
+
+class ResumenVentasMensual(models.Model):
+    mes = models.DateField()  # primer día del mes
+    vendedor = models.ForeignKey(Usuarios, models.DO_NOTHING)
+    metodo_pago = models.CharField(max_length=50)
+    categoria = models.CharField(max_length=100, blank=True, default="")
+    num_ventas = models.IntegerField(default=0)
+    unidades = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = "resumen_ventas_mensual"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["mes", "vendedor", "metodo_pago", "categoria"],
+                name="resumen_mensual_unico",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.mes:%Y-%m} - {self.vendedor_id} - {self.metodo_pago} - {self.categoria}"
+
+
+# 🔹 NUEVO: contadores de numeración (FAC, COMP, EJ…); ver biblio/secuencias.py
+class Secuencias(models.Model):
+    nombre = models.CharField(max_length=20, unique=True)
+    prefijo = models.CharField(max_length=20, blank=True, default="")
+    relleno = models.PositiveSmallIntegerField(default=6)  # dígitos con ceros a la izquierda
+    ultimo_valor = models.BigIntegerField(default=0)
+    # 1 = sin huecos; >1 = cada proceso reserva ese bloque de números de una vez
+    bloque = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        db_table = "secuencias"
+
+    def __str__(self):
+        return f"{self.nombre} ({self.prefijo}…{self.ultimo_valor})"
@@ -0,0 +1,136 @@
+# biblio/replica.py
+"""
+Lecturas del catálogo público y de los reportes desde una réplica de MySQL.
+
+Con DB_REPLICA_HOST configurado, ReplicaMiddleware marca las peticiones
+GET a las vistas de REPLICA_VISTAS y RouterReplica manda sus lecturas a
+la réplica. Todo lo demás (y toda escritura, y los select_for_update)
+sigue en el primario, así las consultas pesadas del catálogo y de los
+reportes no compiten con préstamos y ventas.
+
+- Leer lo propio: tras un POST (o cualquier método que escribe) la sesión
+  queda fijada al primario REPLICA_FIJAR_SEGUNDOS; el GET que sigue a
+  "guardar" ya ve el cambio aunque la réplica no haya llegado.
+- Retraso: cada REPLICA_RETRASO_CADA segundos como mucho, por proceso, se
+  lee Seconds_Behind_Source de la réplica. Si pasa de REPLICA_RETRASO_MAX,
+  si la replicación está parada o si la réplica no responde, se lee del
+  primario hasta la siguiente medición.
+- Las exportaciones en streaming siguen leyendo de la réplica mientras
+  se generan, después de salir del middleware.
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+SESION_FIJADA = "replica_fijada_hasta"
+
+METODOS_LECTURA = ("GET", "HEAD", "OPTIONS")
+
+_estado = threading.local()
+
+_candado = threading.Lock()
+_retraso = {"valor": None, "medido": -math.inf}
+
+
+class RouterReplica:
+    def db_for_read(self, model, **hints):
+        return getattr(_estado, "alias", None)
+
+    def db_for_write(self, model, **hints):
+        # También para instancias leídas de la réplica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # mismos datos en las dos bases
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db == settings.REPLICA_ALIAS:
+            return False
+        return None
+
+
+def retraso_replica():
+    """Segundos de retraso de la réplica (None = desconocido), con caché por proceso."""
+    ahora = time.monotonic()
+    with _candado:
+        if ahora - _retraso["medido"] < settings.REPLICA_RETRASO_CADA:
+            return _retraso["valor"]
+        # Mientras un hilo mide, los demás usan el valor anterior
+        _retraso["medido"] = ahora
+    valor = _medir_retraso()
+    with _candado:
+        _retraso["valor"] = valor
+    return valor
+
+
+def _medir_retraso():
+    conexion = connections[settings.REPLICA_ALIAS]
+    if conexion.vendor != "mysql":
+        return 0.0
+    try:
+        with conexion.cursor() as cursor:
+            cursor.execute("SHOW REPLICA STATUS")
+            fila = cursor.fetchone()
+            columnas = [c[0] for c in cursor.description or ()]
+    except DatabaseError:
+        return None
+    if fila is None:
+        return None  # no está configurada como réplica
+    valor = dict(zip(columnas, fila)).get("Seconds_Behind_Source")
+    return None if valor is None else float(valor)
+
+
+def _fijada_al_primario(request):
+    sesion = getattr(request, "session", None)
+    return sesion is not None and sesion.get(SESION_FIJADA, 0) > time.time()
+
+
+def _en_replica(alias, contenido):
+    iterador = iter(contenido)
+    while True:
+        _estado.alias = alias
+        try:
+            trozo = next(iterador)
+        except StopIteration:
+            return
+        finally:
+            _estado.alias = None
+        yield trozo
+
+
+class ReplicaMiddleware:
+    def __init__(self, get_response):
+        if not settings.REPLICA_ACTIVA:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.vistas = set(settings.REPLICA_VISTAS)
+
+    def __call__(self, request):
+        try:
+            respuesta = self.get_response(request)
+            alias = getattr(_estado, "alias", None)
+        finally:
+            _estado.alias = None
+
+        if alias and respuesta.streaming:
+            respuesta.streaming_content = _en_replica(alias, respuesta.streaming_content)
+        if request.method not in METODOS_LECTURA and hasattr(request, "session"):
+            request.session[SESION_FIJADA] = time.time() + settings.REPLICA_FIJAR_SEGUNDOS
+        return respuesta
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return None
+        if request.resolver_match.url_name not in self.vistas:
+            return None
+        # La sesión se lee aquí, del primario, antes de marcar la petición
+        if _fijada_al_primario(request):
+            return None
+        retraso = retraso_replica()
+        if retraso is not None and retraso <= settings.REPLICA_RETRASO_MAX:
+            _estado.alias = settings.REPLICA_ALIAS
+        return None
@@ -0,0 +1,128 @@
+# biblio/secuencias.py
+"""
+Numeración correlativa (facturas, compras, ejemplares) sobre la tabla
+`secuencias`, una fila por serie.
+
+- Sin huecos (bloque = 1): el número se toma dentro de la transacción que
+  lo usa; si esa transacción se revierte, el contador también.
+- Por bloques (bloque > 1): cada proceso reserva `bloque` números de una
+  vez y los reparte desde memoria, así la fila del contador casi nunca se
+  bloquea. Un proceso que muere deja huecos.
+
+En MySQL el incremento es un solo UPDATE con LAST_INSERT_ID(expr), que
+toma el candado de la fila directamente; en el resto, SELECT … FOR UPDATE.
+"""
+import threading
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F
+
+from .models import Secuencias
+
+FACTURA_VENTA = "FAC"
+COMPRA = "COMP"
+EJEMPLAR = "EJ"
+
+# {(alias, serie): {"rangos": [[desde, hasta], ...], "prefijo": ..., "relleno": ...}}
+_reservados = {}
+_candado = threading.Lock()
+
+
+def formatear(prefijo, relleno, valor):
+    return f"{prefijo}{valor:0{relleno}d}"
+
+
+def _incrementar_mysql(conexion, nombre, cantidad):
+    tabla = conexion.ops.quote_name(Secuencias._meta.db_table)
+    with conexion.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {tabla} "
+            f"SET ultimo_valor = LAST_INSERT_ID(ultimo_valor + GREATEST(bloque, %s)) "
+            f"WHERE nombre = %s",
+            [cantidad, nombre],
+        )
+        if cursor.rowcount != 1:
+            raise Secuencias.DoesNotExist(f"No existe la serie {nombre!r}.")
+        cursor.execute(
+            f"SELECT LAST_INSERT_ID(), prefijo, relleno, bloque FROM {tabla} WHERE nombre = %s",
+            [nombre],
+        )
+        tope, prefijo, relleno, bloque = cursor.fetchone()
+    return tope, max(bloque, cantidad), prefijo, relleno
+
+
+def _incrementar_generico(alias, nombre, cantidad):
+    try:
+        serie = Secuencias.objects.using(alias).select_for_update().get(nombre=nombre)
+    except Secuencias.DoesNotExist:
+        raise Secuencias.DoesNotExist(f"No existe la serie {nombre!r}.")
+    tomados = max(serie.bloque, cantidad)
+    Secuencias.objects.using(alias).filter(id=serie.id).update(
+        ultimo_valor=F("ultimo_valor") + tomados
+    )
+    return serie.ultimo_valor + tomados, tomados, serie.prefijo, serie.relleno
+
+
+def _tomar_de_memoria(clave, cantidad):
+    reservado = _reservados.get(clave)
+    if not reservado:
+        return []
+    valores = []
+    rangos = reservado["rangos"]
+    while rangos and len(valores) < cantidad:
+        desde, hasta = rangos[0]
+        n = min(cantidad - len(valores), hasta - desde + 1)
+        valores.extend(range(desde, desde + n))
+        if desde + n > hasta:
+            rangos.pop(0)
+        else:
+            rangos[0][0] = desde + n
+    return [formatear(reservado["prefijo"], reservado["relleno"], v) for v in valores]
+
+
+def _guardar_en_memoria(clave, desde, hasta, prefijo, relleno):
+    with _candado:
+        reservado = _reservados.setdefault(
+            clave, {"rangos": [], "prefijo": prefijo, "relleno": relleno}
+        )
+        reservado["rangos"].append([desde, hasta])
+
+
+def reservar(nombre, cantidad=1, using=DEFAULT_DB_ALIAS):
+    """Devuelve `cantidad` números consecutivos (ya formateados) de la serie."""
+    clave = (using, nombre)
+    with _candado:
+        numeros = _tomar_de_memoria(clave, cantidad)
+    faltan = cantidad - len(numeros)
+    if not faltan:
+        return numeros
+
+    conexion = connections[using]
+    with transaction.atomic(using=using, savepoint=False):
+        if conexion.vendor == "mysql":
+            tope, tomados, prefijo, relleno = _incrementar_mysql(conexion, nombre, faltan)
+        else:
+            tope, tomados, prefijo, relleno = _incrementar_generico(using, nombre, faltan)
+
+    inicio = tope - tomados + 1
+    numeros += [formatear(prefijo, relleno, v) for v in range(inicio, inicio + faltan)]
+
+    if tomados > faltan:
+        # El sobrante solo vale si el incremento llega a confirmarse: si la
+        # transacción de afuera se revierte, el contador vuelve atrás y esos
+        # números no deben quedar en memoria.
+        transaction.on_commit(
+            lambda: _guardar_en_memoria(clave, inicio + faltan, tope, prefijo, relleno),
+            using=using,
+        )
+    return numeros
+
+
+def siguiente(nombre, using=DEFAULT_DB_ALIAS):
+    return reservar(nombre, 1, using=using)[0]
+
+
+def olvidar_reservas():
+    """Descarta los bloques en memoria (tests, o tras cambiar prefijo/relleno)."""
+    with _candado:
+        _reservados.clear()
@@ -21,4 +21,11 @@ urlpatterns = [
     path("libros/<int:libro_id>/solicitar-factura/", views.solicitar_factura_libro, name="solicitar_factura_libro"),
 
     path('clientes/recuperar-contrasena/', views.recuperar_contrasena_cliente, name="recuperar_contrasena_cliente"),
+
+    # Prometheus
+    path("metrics", views.exponer_metricas, name="metricas"),
+
+    # Probes del servidor
+    path("salud/vivo/", views.salud_vivo, name="salud_vivo"),
+    path("salud/listo/", views.salud_listo, name="salud_listo"),
 ]
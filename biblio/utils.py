@@ -1,6 +1,8 @@
 # biblio/utils.py
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from .models import Clientes, Prestamos
+from .models import Clientes, Libros, Prestamos
 
 def actualizar_bloqueo_por_mora(cliente: Clientes) -> bool:
     """
@@ -33,3 +35,22 @@ def actualizar_bloqueo_por_mora(cliente: Clientes) -> bool:
             cliente.save(update_fields=["bloqueado", "motivo_bloqueo", "fecha_bloqueo"])
 
         return cliente.bloqueado  # puede seguir bloqueado por otro motivo manual
+
+
+def ajustar_stock(cambios):
+    """
+    Suma a stock_total la cantidad indicada por libro ({libro_id: +n / -n})
+    con un solo UPDATE … CASE, sin importar cuántos libros sean. Un stock
+    NULL cuenta como 0.
+    """
+    cambios = {libro_id: cantidad for libro_id, cantidad in cambios.items() if cantidad}
+    if not cambios:
+        return 0
+
+    return Libros.objects.filter(id__in=cambios).update(
+        stock_total=Coalesce(F("stock_total"), 0) + Case(
+            *[When(id=libro_id, then=Value(cantidad)) for libro_id, cantidad in cambios.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    )
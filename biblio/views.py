@@ -1,14 +1,19 @@
+import hmac
 from datetime import timedelta
 
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from django.contrib import messages
 from django.contrib.auth.hashers import make_password, check_password
 from django.utils import timezone
-from django.db import transaction, DatabaseError
+from django.db import connection, transaction, DatabaseError
+from django.views.decorators.cache import never_cache
 from django.views.decorators.csrf import csrf_protect
 from django.core.paginator import Paginator
 
+from . import metricas
 from .utils import actualizar_bloqueo_por_mora
 from seguridad.views import validar_fortaleza_contrasena
 
@@ -378,7 +383,7 @@ def lista_reservas_clientes(request):
     reservas = (
         Reservas.objects
         .select_related("libro")
-        .filter(cliente=cliente, estado__iexact="activa")
+        .filter(cliente=cliente, estado="activa")
         .order_by("-fecha_reserva")
     )
 
@@ -443,7 +448,7 @@ def reservar_libro(request, libro_id):
     ya_tiene_reserva = Reservas.objects.filter(
         cliente=cliente,
         libro=libro,
-        estado__iexact="activa",
+        estado="activa",
     ).exists()
 
     if ya_tiene_reserva:
@@ -786,3 +791,40 @@ def paso_2_nueva_contrasena_cliente(request):
                 "error": "Error al guardar la nueva contraseña. Por favor, intente nuevamente.",
             },
         )
+
+
+# ---------- Métricas (Prometheus) ----------
+
+def _puede_leer_metricas(request):
+    token = getattr(settings, "METRICAS_TOKEN", "")
+    if token:
+        recibido = request.headers.get("Authorization", "")
+        return hmac.compare_digest(recibido.encode(), f"Bearer {token}".encode())
+    return request.META.get("REMOTE_ADDR") in getattr(settings, "METRICAS_IPS", ())
+
+
+def exponer_metricas(request):
+    if not _puede_leer_metricas(request):
+        return HttpResponseForbidden("403 Forbidden")
+    return HttpResponse(
+        metricas.exposicion(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+# ---------- Probes del servidor (core/gunicorn.conf.py) ----------
+
+@never_cache
+def salud_vivo(request):
+    """Liveness: el proceso atiende peticiones. No toca la BD."""
+    return JsonResponse({"estado": "ok"})
+
+
+@never_cache
+def salud_listo(request):
+    """Readiness: además la BD responde; si no, que el balanceador no mande tráfico."""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except DatabaseError:
+        return JsonResponse({"estado": "sin_bd"}, status=503)
+    return JsonResponse({"estado": "ok"})
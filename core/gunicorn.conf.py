@@ -0,0 +1,77 @@
+# core/gunicorn.conf.py
+"""
+Servidor de producción: gunicorn -c core/gunicorn.conf.py core.wsgi
+
+- Workers: GUNICORN_WORKERS, por defecto 2 x núcleos disponibles + 1.
+  Cada uno con GUNICORN_HILOS hilos (gthread), que además mantiene las
+  conexiones keep-alive abiertas sin bloquear un worker entero.
+- preload_app: Django y las vistas se importan una vez en el proceso
+  maestro y los workers lo heredan por fork (memoria compartida
+  copy-on-write). Antes del fork se cierran las conexiones a la BD para
+  que ningún worker herede un socket ajeno.
+- Cada worker se recicla tras GUNICORN_MAX_PETICIONES (+ jitter), así una
+  fuga de memoria no crece sin límite.
+- Recarga sin cortar peticiones: "kill -HUP <maestro>" levanta workers
+  nuevos y espera a que los viejos terminen lo que tienen (hasta
+  graceful_timeout). Con preload_app el código se importó en el maestro:
+  para desplegar código nuevo se usa USR2 (maestro nuevo) y luego TERM
+  al viejo.
+- Al arrancar se vacía METRICAS_DIR (ver biblio/metricas.py), salvo en
+  el maestro nuevo de USR2: los workers del viejo siguen vivos y sus
+  volcados cuentan en los totales.
+
+Probes: /salud/vivo/ (el proceso responde) y /salud/listo/ (además hay BD).
+"""
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+
+def _nucleos():
+    try:
+        return len(os.sched_getaffinity(0))  # respeta el cpuset del contenedor
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+workers = int(os.getenv("GUNICORN_WORKERS") or 0) or 2 * _nucleos() + 1
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_HILOS", "4"))
+
+preload_app = True
+
+max_requests = int(os.getenv("GUNICORN_MAX_PETICIONES", "1000"))
+max_requests_jitter = max_requests // 10
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# El latido de los workers en memoria: en Docker /tmp puede ser overlayfs lento
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+accesslog = os.getenv("GUNICORN_ACCESSLOG", "-")
+errorlog = "-"
+# Detrás de nginx: confiar en X-Forwarded-* solo de estas IPs
+forwarded_allow_ips = os.getenv("GUNICORN_FORWARDED_IPS", "127.0.0.1")
+
+
+def on_starting(server):
+    # gunicorn pone GUNICORN_PID (el maestro anterior) al re-ejecutarse con USR2
+    if os.environ.get("GUNICORN_PID"):
+        server.log.info("METRICAS_DIR: maestro anterior vivo, no se vacía")
+        return
+
+    # Con preload_app, Django ya está cargado en este punto
+    from biblio import metricas
+
+    borrados = metricas.vaciar_directorio()
+    if borrados:
+        server.log.info("METRICAS_DIR: %s volcados anteriores borrados", borrados)
+
+
+def pre_fork(server, worker):
+    from django.db import connections
+
+    connections.close_all()
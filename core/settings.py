@@ -44,12 +44,17 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "biblio.estaticos.EstaticosMiddleware",
+    "biblio.medios.MediaMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
+    "biblio.instrumentacion.InstrumentacionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "biblio.replica.ReplicaMiddleware",
+    "biblio.auditoria.AuditoriaMiddleware",
 ]
 
 ROOT_URLCONF = "core.urls"
@@ -75,22 +80,101 @@ WSGI_APPLICATION = "core.wsgi.application"
 #  BASE DE DATOS
 #  LOCAL: .env con DB_HOST=127.0.0.1
 #  DOCKER: docker-compose sobreescribe DB_HOST=db
+#  SIN MYSQL: DB_MOTOR=sqlite usa el archivo DB_SQLITE_RUTA (por defecto
+#  biblionet.sqlite3 junto a manage.py; crearlo con "manage.py migrate").
+#  DB_SQLITE_RUTA=":memory:" no deja nada en disco: solo sirve para
+#  procesos que migran y cargan sus datos (p. ej. "manage.py test",
+#  que con SQLite ya usa una BD en memoria y admite --parallel).
 # ============================================================
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.mysql",
-        "NAME": os.getenv("DB_NAME", "biblionet"),
-        "USER": os.getenv("DB_USER", "root"),
-        "PASSWORD": os.getenv("DB_PASSWORD", ""),
-        "HOST": os.getenv("DB_HOST", "127.0.0.1"),  # en Docker se pasa DB_HOST=db
-        "PORT": os.getenv("DB_PORT", "3306"),
-        "OPTIONS": {
-            "charset": "utf8mb4",
-            "init_command": "SET sql_mode='STRICT_ALL_TABLES'",
-        },
+DB_MOTOR = os.getenv("DB_MOTOR", "mysql")
+
+if DB_MOTOR == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "biblio.bd.sqlite3",
+            "NAME": os.getenv("DB_SQLITE_RUTA", str(BASE_DIR / "biblionet.sqlite3")),
+            "OPTIONS": {
+                # Con varios hilos (runserver, benchmark) la escritura se pide
+                # al empezar la transacción en lugar de fallar con "locked".
+                "transaction_mode": "IMMEDIATE",
+                "timeout": 20,
+                # legacy_alter_table: al rehacer una tabla en una migración
+                # (libros, ejemplares) SQLite no valida la vista catalogo_publico
+                # mientras la tabla vieja ya no existe.
+                "init_command": (
+                    "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; "
+                    "PRAGMA legacy_alter_table=ON;"
+                ),
+            },
+        }
     }
-}
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "biblio.bd.mysql",
+            "NAME": os.getenv("DB_NAME", "biblionet"),
+            "USER": os.getenv("DB_USER", "root"),
+            "PASSWORD": os.getenv("DB_PASSWORD", ""),
+            "HOST": os.getenv("DB_HOST", "127.0.0.1"),  # en Docker se pasa DB_HOST=db
+            "PORT": os.getenv("DB_PORT", "3306"),
+            "OPTIONS": {
+                "charset": "utf8mb4",
+                "init_command": "SET sql_mode='STRICT_ALL_TABLES'",
+            },
+        }
+    }
+
+#  CONEXIONES PERSISTENTES
+#  Cada hilo de cada worker reutiliza su conexión durante DB_CONN_MAX_AGE
+#  segundos en lugar de abrir una (TCP + login) por petición; 0 = una por
+#  petición. Con DB_CONN_HEALTH_CHECKS, al empezar cada petición se
+#  comprueba que la conexión guardada siga viva (MySQL la corta tras
+#  wait_timeout) y si no se abre otra. Conexiones abiertas como máximo:
+#  workers x hilos (ver core/gunicorn.conf.py), por debajo de
+#  max_connections de MySQL. Bajo ASGI Django recomienda DB_CONN_MAX_AGE=0
+#  y un pooler externo (ProxySQL): el pool nativo de Django es solo para
+#  PostgreSQL. Los contadores salen en /metrics (ver biblio/bd).
+# ============================================================
+
+DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", "300"))
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = os.getenv("DB_CONN_HEALTH_CHECKS", "True") == "True"
+
+#  RÉPLICA DE LECTURA (opcional, solo MySQL)
+#  Con DB_REPLICA_HOST, los GET de las vistas de REPLICA_VISTAS (catálogo
+#  público y reportes) leen de la réplica. Tras un POST la sesión lee del
+#  primario durante REPLICA_FIJAR_SEGUNDOS, y si la réplica va más de
+#  REPLICA_RETRASO_MAX segundos atrasada (medido cada REPLICA_RETRASO_CADA)
+#  todo vuelve al primario. El usuario de la réplica necesita el permiso
+#  REPLICATION CLIENT para ver su retraso. Ver biblio/replica.py.
+# ============================================================
+
+DB_REPLICA_HOST = os.getenv("DB_REPLICA_HOST", "")
+REPLICA_ACTIVA = bool(DB_REPLICA_HOST) and DB_MOTOR != "sqlite"
+REPLICA_ALIAS = "replica"
+
+if REPLICA_ACTIVA:
+    DATABASES[REPLICA_ALIAS] = {
+        **DATABASES["default"],
+        "HOST": DB_REPLICA_HOST,
+        "PORT": os.getenv("DB_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        "USER": os.getenv("DB_REPLICA_USER", DATABASES["default"]["USER"]),
+        "PASSWORD": os.getenv("DB_REPLICA_PASSWORD", DATABASES["default"]["PASSWORD"]),
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+        # En pruebas la "réplica" es la misma BD de pruebas
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["biblio.replica.RouterReplica"]
+
+REPLICA_VISTAS = os.getenv(
+    "REPLICA_VISTAS",
+    "inicio,catalogo,detalle_libro,historial_ventas,exportar_ventas,"
+    "gestion_compras,exportar_compras,exportar_prestamos",
+).split(",")
+REPLICA_FIJAR_SEGUNDOS = int(os.getenv("REPLICA_FIJAR_SEGUNDOS", "10"))
+REPLICA_RETRASO_MAX = float(os.getenv("REPLICA_RETRASO_MAX", "5"))
+REPLICA_RETRASO_CADA = float(os.getenv("REPLICA_RETRASO_CADA", "2"))
 
 #  PASSWORD VALIDATION
 # ============================================================
@@ -129,7 +213,104 @@ STATICFILES_DIRS = [
 
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+#  Con ESTATICOS_VERSIONADOS (por defecto cuando DEBUG=False), collectstatic
+#  deja nombres con hash, CSS minificado y copias .gz/.br, y
+#  EstaticosMiddleware los sirve desde STATIC_ROOT: los que llevan hash con
+#  caché de un año, el resto con ESTATICOS_MAX_AGE segundos (ver
+#  biblio/estaticos.py). En desarrollo runserver sirve static/ tal cual.
+ESTATICOS_VERSIONADOS = os.getenv("ESTATICOS_VERSIONADOS", str(not DEBUG)) == "True"
+ESTATICOS_MAX_AGE = int(os.getenv("ESTATICOS_MAX_AGE", "60"))
+
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": (
+            "biblio.estaticos.AlmacenEstaticos"
+            if ESTATICOS_VERSIONADOS
+            else "django.contrib.staticfiles.storage.StaticFilesStorage"
+        ),
+    },
+}
+
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+#  Portadas y fotos de perfil (biblio/medios.py). Solo las carpetas de
+#  MEDIA_PUBLICA se sirven por URL; las facturas y lotes no. MEDIA_SENDFILE
+#  igual que DOCUMENTOS_SENDFILE, con la location interna de nginx en
+#  MEDIA_ACCEL_PREFIX apuntando a MEDIA_ROOT.
+MEDIA_PUBLICA = [c for c in os.getenv("MEDIA_PUBLICA", "portadas,perfiles").split(",") if c]
+MEDIA_SENDFILE = os.getenv("MEDIA_SENDFILE", "")
+MEDIA_ACCEL_PREFIX = os.getenv("MEDIA_ACCEL_PREFIX", "/media-interna/")
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+#  DOCUMENTOS PDF (facturas / comprobantes)
+#  Se generan una sola vez y se guardan en disco bajo MEDIA_ROOT.
+#  DOCUMENTOS_SENDFILE: "" (FileResponse), "x-sendfile" (Apache/lighttpd)
+#  o "x-accel-redirect" (nginx, con location interna en DOCUMENTOS_ACCEL_PREFIX
+#  apuntando a MEDIA_ROOT).
+# ============================================================
+
+DOCUMENTOS_ROOT = MEDIA_ROOT / "documentos"
+DOCUMENTOS_SENDFILE = os.getenv("DOCUMENTOS_SENDFILE", "")
+DOCUMENTOS_ACCEL_PREFIX = os.getenv("DOCUMENTOS_ACCEL_PREFIX", "/media-protegida/")
+
+#  Lotes de documentos (ZIP con muchas facturas/comprobantes).
+#  Los procesa "python manage.py procesar_lotes_documentos --continuo",
+#  fuera de los workers web (que gunicorn recicla en cualquier momento).
+#  DOCUMENTOS_LOTES_WORKERS=0 usa un proceso por núcleo en ese comando.
+#  DOCUMENTOS_LOTES_EN_PROCESO=True (solo desarrollo) los genera en un
+#  hilo del proceso web, sin pool de procesos.
+#  Un lote "procesando" sin progreso en DOCUMENTOS_LOTES_VENCIMIENTO
+#  minutos se da por abandonado y el comando lo retoma.
+DOCUMENTOS_LOTES_WORKERS = int(os.getenv("DOCUMENTOS_LOTES_WORKERS", "0"))
+DOCUMENTOS_LOTES_EN_PROCESO = os.getenv("DOCUMENTOS_LOTES_EN_PROCESO", "False") == "True"
+DOCUMENTOS_LOTES_VENCIMIENTO = int(os.getenv("DOCUMENTOS_LOTES_VENCIMIENTO", "15"))
+
+#  BITÁCORA
+#  Las entradas más antiguas que BITACORA_RETENCION_MESES pasan a la tabla
+#  bitacora_archivo con "python manage.py rotar_bitacora" (p. ej. por cron,
+#  una vez al mes). BITACORA_ARCHIVO_ANIOS=0 conserva el archivo para siempre.
+# ============================================================
+
+BITACORA_RETENCION_MESES = int(os.getenv("BITACORA_RETENCION_MESES", "12"))
+BITACORA_ARCHIVO_ANIOS = int(os.getenv("BITACORA_ARCHIVO_ANIOS", "0"))
+
+#  INSTRUMENTACIÓN DE CONSULTAS
+#  Cuenta y cronometra las consultas SQL de cada petición (ver
+#  biblio/instrumentacion.py). Las últimas INSTRUMENTACION_MAX_PETICIONES
+#  se ven agregadas por vista en /diagnostico/consultas/. Una sentencia
+#  repetida más de INSTRUMENTACION_UMBRAL_N1 veces se registra como N+1.
+# ============================================================
+
+INSTRUMENTACION_ACTIVA = os.getenv("INSTRUMENTACION_ACTIVA", "True") == "True"
+INSTRUMENTACION_UMBRAL_N1 = int(os.getenv("INSTRUMENTACION_UMBRAL_N1", "10"))
+INSTRUMENTACION_MAX_PETICIONES = int(os.getenv("INSTRUMENTACION_MAX_PETICIONES", "500"))
+
+#  MÉTRICAS (/metrics, formato Prometheus)
+#  Con varios workers, METRICAS_DIR debe ser un directorio compartido por
+#  todos (cada proceso vuelca ahí sus contadores cada METRICAS_INTERVALO
+#  segundos) y vaciarse al arrancar el servidor. Vacío = solo este proceso.
+#  Con METRICAS_TOKEN responde a quien envíe "Authorization: Bearer
+#  <token>"; sin token, solo a las IPs de METRICAS_IPS. Detrás de nginx
+#  todas las peticiones llegan desde 127.0.0.1, así que en producción
+#  (DEBUG=False) la lista viene vacía y /metrics exige el token.
+# ============================================================
+
+METRICAS_DIR = os.getenv("METRICAS_DIR", "")
+METRICAS_INTERVALO = float(os.getenv("METRICAS_INTERVALO", "5"))
+METRICAS_IPS = [
+    ip for ip in os.getenv("METRICAS_IPS", "127.0.0.1,::1" if DEBUG else "").split(",") if ip
+]
+METRICAS_TOKEN = os.getenv("METRICAS_TOKEN", "")
+
+# Caché local que cuenta aciertos/fallos para /metrics
+CACHES = {
+    "default": {
+        "BACKEND": "biblio.metricas.CacheLocalMedida",
+        "LOCATION": "biblionet",
+    }
+}
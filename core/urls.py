@@ -16,6 +16,8 @@ urlpatterns = [
 ]
 
 # STATIC Y MEDIA
+# Las portadas y fotos de perfil las sirve biblio.medios.MediaMiddleware
+# (también con DEBUG=False); esto queda para el resto de MEDIA en desarrollo.
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,227 @@
+# seguridad/benchmark.py
+"""
+Banco de pruebas de rendimiento de las vistas principales (comando benchmark).
+
+Cada escenario se ejecuta con el cliente de pruebas de Django contra la
+base configurada (normalmente llena con generar_datos): se miden latencia
+(p50/p95) y número de consultas. Todo pasa dentro de una transacción que
+se revierte al final, y cada petición dentro de un savepoint propio, así
+que los POST (registrar préstamo, facturar) se pueden repetir sobre los
+mismos datos sin dejar rastro. Los PDF se escriben en un directorio
+temporal.
+
+El resultado es un JSON que se compara contra una base guardada: más
+consultas que la base, o un p95 por encima de la tolerancia, es una
+regresión.
+"""
+import math
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from biblio.instrumentacion import Medidor
+from biblio.models import (
+    Clientes,
+    Libros,
+    Prestamos,
+    ReglasPrestamo,
+    Roles,
+    SolicitudVenta,
+    Usuarios,
+    Ventas,
+)
+
+
+@dataclass
+class Escenario:
+    nombre: str
+    url: object  # callable(contexto) -> str
+    rol: str = ""  # "" = visitante sin sesión
+    metodo: str = "get"
+    datos: object = None  # callable(contexto) -> dict
+
+
+ESCENARIOS = (
+    Escenario("catalogo", lambda c: reverse("catalogo")),
+    Escenario("catalogo_busqueda", lambda c: reverse("catalogo") + f"?q={c['termino']}"),
+    Escenario("inventario", lambda c: reverse("inventario"), rol="bibliotecario"),
+    Escenario("gestion_prestamos", lambda c: reverse("gestion_prestamos"), rol="bibliotecario"),
+    Escenario("historial_ventas", lambda c: reverse("historial_ventas"), rol="administrador"),
+    Escenario(
+        "registrar_prestamo",
+        lambda c: reverse("registrar_prestamo"),
+        rol="bibliotecario",
+        metodo="post",
+        datos=lambda c: {"dni": c["dni"], "isbn": c["isbn"], "fecha_inicio": c["hoy"]},
+    ),
+    Escenario(
+        "facturar_solicitud",
+        lambda c: reverse("facturar_solicitud", args=[c["solicitud_id"]]),
+        rol="bibliotecario",
+        metodo="post",
+        datos=lambda c: {"metodo_pago": "Efectivo"},
+    ),
+)
+
+
+class EscenarioFallido(Exception):
+    pass
+
+
+def _percentil(valores, p):
+    """Percentil por rango más cercano (sin interpolar)."""
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def _empleado(rol):
+    return Usuarios.objects.create(
+        rol=Roles.objects.get_or_create(nombre=rol)[0],
+        nombre="benchmark",
+        apellido=rol,
+        email=f"benchmark.{rol}@biblionet.test",
+        clave="!",
+        estado="activo",
+        primer_ingreso=False,
+        fecha_creacion=timezone.now(),
+    )
+
+
+def _preparar():
+    """Lo que necesitan los escenarios; se crea dentro de la transacción que se revierte."""
+    if not ReglasPrestamo.objects.exists():
+        ReglasPrestamo.objects.create(
+            plazo_dias=14, limite_prestamos=3, tarifa_mora_diaria=5, fecha_actualizacion=timezone.now(),
+        )
+
+    libro = Libros.objects.filter(stock_total__gt=0).order_by("id").first()
+    if libro is None:
+        raise EscenarioFallido("No hay libros con stock: corre antes generar_datos.")
+
+    usuario_cliente = Usuarios.objects.create(
+        rol=Roles.objects.get_or_create(nombre="cliente")[0],
+        nombre="benchmark", apellido="cliente", email="benchmark.cliente@biblionet.test",
+        clave="!", estado="activo",
+    )
+    cliente = Clientes.objects.create(usuario=usuario_cliente, dni="BENCH-0000001", estado="activo")
+    solicitud = SolicitudVenta.objects.create(cliente=cliente, libro=libro, cantidad=1, estado="pendiente")
+
+    empleados = {rol: _empleado(rol) for rol in ("bibliotecario", "administrador")}
+    return {
+        "empleados": empleados,
+        "dni": cliente.dni,
+        "isbn": libro.isbn,
+        "hoy": timezone.localdate().isoformat(),
+        "solicitud_id": solicitud.id,
+        "termino": (libro.titulo.split() or ["a"])[0],
+    }
+
+
+def _cliente_http(rol, contexto):
+    cliente = Client()
+    if rol:
+        usuario = contexto["empleados"][rol]
+        session = cliente.session
+        session["id_usuario"] = usuario.id
+        session["correo_usuario"] = usuario.email
+        session["rol_usuario"] = rol
+        session.save()
+    return cliente
+
+
+def _medir(escenario, contexto, iteraciones, calentamiento):
+    cliente = _cliente_http(escenario.rol, contexto)
+    url = escenario.url(contexto)
+    datos = escenario.datos(contexto) if escenario.datos else None
+    enviar = getattr(cliente, escenario.metodo)
+
+    tiempos, consultas = [], []
+    for i in range(calentamiento + iteraciones):
+        medidor = Medidor()
+        with transaction.atomic():
+            with connection.execute_wrapper(medidor):
+                inicio = time.perf_counter()
+                respuesta = enviar(url, datos) if datos is not None else enviar(url)
+                segundos = time.perf_counter() - inicio
+            transaction.set_rollback(True)
+
+        # Un 302 suele ser la redirección al login o a un mensaje de error
+        if respuesta.status_code != 200:
+            raise EscenarioFallido(f"{escenario.nombre}: HTTP {respuesta.status_code}")
+        if i >= calentamiento:
+            tiempos.append(segundos * 1000)
+            consultas.append(medidor.consultas)
+
+    return {
+        "p50_ms": round(_percentil(tiempos, 50), 2),
+        "p95_ms": round(_percentil(tiempos, 95), 2),
+        "media_ms": round(statistics.fmean(tiempos), 2),
+        "max_ms": round(max(tiempos), 2),
+        "consultas": max(consultas),
+        "estado": respuesta.status_code,
+    }
+
+
+def ejecutar(iteraciones=20, calentamiento=2, nombres=None):
+    """Corre los escenarios (todos o los de `nombres`) y devuelve el informe como dict."""
+    escenarios = [e for e in ESCENARIOS if not nombres or e.nombre in nombres]
+    volumen = {
+        "libros": Libros.objects.count(),
+        "clientes": Clientes.objects.count(),
+        "prestamos": Prestamos.objects.count(),
+        "ventas": Ventas.objects.count(),
+    }
+
+    with tempfile.TemporaryDirectory() as media, override_settings(
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+        MEDIA_ROOT=media,
+        DOCUMENTOS_ROOT=Path(media) / "documentos",
+    ):
+        with transaction.atomic():
+            contexto = _preparar()
+            resultados = {
+                e.nombre: _medir(e, contexto, iteraciones, calentamiento) for e in escenarios
+            }
+            transaction.set_rollback(True)
+
+    return {
+        "fecha": timezone.now().isoformat(timespec="seconds"),
+        "motor": connection.vendor,
+        # Con DEBUG=True Django guarda cada consulta en memoria: los tiempos salen inflados
+        "debug": settings.DEBUG,
+        "iteraciones": iteraciones,
+        "volumen": volumen,
+        "escenarios": resultados,
+    }
+
+
+def comparar(actual, base, tolerancia=0.25, margen_ms=5.0):
+    """
+    Regresiones de `actual` frente a `base` (lista de textos; vacía = todo bien).
+    El número de consultas es determinista: cualquier aumento cuenta. La
+    latencia solo si el p95 supera la base en más de `tolerancia` (fracción)
+    y de `margen_ms`, para no saltar por ruido en vistas de pocos ms.
+    """
+    regresiones = []
+    for nombre, medida in actual["escenarios"].items():
+        anterior = base.get("escenarios", {}).get(nombre)
+        if anterior is None:
+            continue
+        if medida["consultas"] > anterior["consultas"]:
+            regresiones.append(
+                f"{nombre}: {medida['consultas']} consultas (base {anterior['consultas']})"
+            )
+        limite = max(anterior["p95_ms"] * (1 + tolerancia), anterior["p95_ms"] + margen_ms)
+        if medida["p95_ms"] > limite:
+            regresiones.append(
+                f"{nombre}: p95 {medida['p95_ms']} ms (base {anterior['p95_ms']} ms)"
+            )
+    return regresiones
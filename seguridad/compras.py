@@ -0,0 +1,376 @@
+# seguridad/compras.py
+"""
+Registro de compras a proveedores.
+
+Una factura de proveedor puede traer cientos de líneas: los libros se
+validan con un solo in_bulk, los detalles se insertan con bulk_create y
+el stock se suma con un único UPDATE, todo dentro de una transacción.
+Las facturas que llegan en CSV (miles de ISBN) se importan por bloques
+con importar_csv.
+"""
+import csv
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from django.db import transaction
+from django.utils import timezone
+
+from biblio import auditoria, secuencias
+from biblio.isbn import canonico as isbn_canonico, es_valido as isbn_valido, normalizar as normalizar_isbn
+from biblio.models import Compras, DetalleCompras, Libros
+from biblio.utils import ajustar_stock
+
+CENTAVOS = Decimal("0.01")
+
+
+class CompraInvalida(Exception):
+    """Los datos de la compra no se pueden registrar; el mensaje es para el usuario."""
+
+
+@dataclass
+class LineaCompra:
+    libro_id: int
+    cantidad: int
+    costo_unitario: Decimal
+
+    @property
+    def subtotal(self):
+        return (self.costo_unitario * self.cantidad).quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+
+
+def leer_lineas(libro_ids, cantidades, costos):
+    """
+    Convierte las columnas del formulario (libro_id[], cantidad[],
+    costo_unitario[]) en LineaCompra. Las filas vacías se ignoran.
+    """
+    lineas = []
+    for idx, libro_id in enumerate(libro_ids):
+        libro_id = (libro_id or "").strip()
+        cant = (cantidades[idx] if idx < len(cantidades) else "").strip()
+        costo = (costos[idx] if idx < len(costos) else "").strip()
+
+        # Fila completamente vacía → la ignoramos
+        if not (libro_id or cant or costo):
+            continue
+
+        if not (libro_id and cant and costo):
+            raise CompraInvalida(
+                "Todas las filas deben tener libro, cantidad y costo unitario. "
+                "Elimine las filas que no vaya a usar."
+            )
+
+        try:
+            linea = LineaCompra(
+                libro_id=int(libro_id),
+                cantidad=int(cant),
+                costo_unitario=Decimal(costo).quantize(CENTAVOS, rounding=ROUND_HALF_UP),
+            )
+        except (ValueError, InvalidOperation):
+            raise CompraInvalida("Cantidad y costo unitario deben ser numéricos.")
+
+        if linea.cantidad <= 0:
+            raise CompraInvalida("La cantidad debe ser mayor que cero.")
+
+        if linea.costo_unitario <= 0:
+            raise CompraInvalida("El costo unitario debe ser mayor que cero.")
+
+        lineas.append(linea)
+
+    if not lineas:
+        raise CompraInvalida("Debe agregar al menos un libro a la compra.")
+
+    return lineas
+
+
+def registrar_compra(proveedor, usuario, metodo_pago, lineas):
+    """
+    Crea la compra con sus detalles y suma el stock. El número de
+    consultas no depende de cuántas líneas traiga la factura.
+    """
+    libros = Libros.objects.only("id").in_bulk({linea.libro_id for linea in lineas})
+    faltantes = sorted({linea.libro_id for linea in lineas} - set(libros))
+    if faltantes:
+        raise CompraInvalida(
+            "Los siguientes libros no existen: " + ", ".join(map(str, faltantes)) + "."
+        )
+
+    total_compra = sum((linea.subtotal for linea in lineas), Decimal("0.00"))
+
+    with transaction.atomic():
+        compra = Compras.objects.create(
+            proveedor=proveedor,
+            usuario=usuario,
+            numero_factura=secuencias.siguiente(secuencias.COMPRA),
+            # Guardar SOLO fecha (sin hora)
+            fecha=timezone.now().date(),
+            total=total_compra,
+            metodo_pago=metodo_pago,
+        )
+
+        DetalleCompras.objects.bulk_create(
+            [
+                DetalleCompras(
+                    compra=compra,
+                    libro_id=linea.libro_id,
+                    cantidad=linea.cantidad,
+                    costo_unitario=linea.costo_unitario,
+                    subtotal=linea.subtotal,
+                )
+                for linea in lineas
+            ],
+            batch_size=500,
+        )
+
+        recibidos = {}
+        for linea in lineas:
+            recibidos[linea.libro_id] = recibidos.get(linea.libro_id, 0) + linea.cantidad
+        ajustar_stock(recibidos)
+
+        auditoria.registrar(
+            usuario,
+            (
+                f"REGISTRÓ COMPRA id={compra.id} "
+                f"factura={compra.numero_factura} "
+                f"proveedor={proveedor.nombre_comercial} "
+                f"total={compra.total}"
+            ),
+            codigo="compra.registrada",
+            entidad="compra",
+            entidad_id=compra.id,
+            datos={"proveedor_id": proveedor.id, "total": str(compra.total)},
+            duradero=True,
+        )
+
+    return compra
+
+
+# ---------- Importación de facturas de proveedor (CSV) ----------
+
+COLUMNAS_OBLIGATORIAS = ("isbn", "cantidad", "costo_unitario")
+COLUMNAS_OPCIONALES = ("titulo", "autor", "categoria", "editorial", "precio_venta")
+
+# Líneas por bloque: una consulta isbn__in y un bulk_create por bloque
+TAMANO_BLOQUE_IMPORTACION = 1000
+# Cuántos errores se guardan para mostrar; el resto solo se cuenta
+MAX_ERRORES_REPORTE = 200
+
+
+class _Simulacion(Exception):
+    """Se lanza al final de una simulación para revertir todo lo escrito."""
+
+
+@dataclass
+class ReporteImportacion:
+    simulacion: bool = False
+    lineas: int = 0
+    lineas_validas: int = 0
+    unidades: int = 0
+    total: Decimal = Decimal("0.00")
+    libros_creados: int = 0
+    total_errores: int = 0
+    # [(número de línea, mensaje)]
+    errores: list = field(default_factory=list)
+    compra: Compras = None
+
+    def error(self, linea, mensaje):
+        self.total_errores += 1
+        if len(self.errores) < MAX_ERRORES_REPORTE:
+            self.errores.append((linea, mensaje))
+
+    @property
+    def ok(self):
+        return self.lineas_validas > 0 and not self.total_errores
+
+
+def _leer_fila(fila):
+    """Devuelve (isbn_normalizado, LineaCompra sin libro, datos del libro)."""
+    isbn = isbn_canonico(fila.get("isbn"))
+    if not isbn:
+        raise CompraInvalida("Falta el ISBN.")
+
+    try:
+        cantidad = int((fila.get("cantidad") or "").strip())
+        costo = Decimal((fila.get("costo_unitario") or "").strip()).quantize(
+            CENTAVOS, rounding=ROUND_HALF_UP
+        )
+    except (ValueError, InvalidOperation):
+        raise CompraInvalida("Cantidad y costo unitario deben ser numéricos.")
+
+    if cantidad <= 0:
+        raise CompraInvalida("La cantidad debe ser mayor que cero.")
+    if costo <= 0:
+        raise CompraInvalida("El costo unitario debe ser mayor que cero.")
+
+    datos_libro = {c: (fila.get(c) or "").strip() for c in COLUMNAS_OPCIONALES}
+    return isbn, LineaCompra(libro_id=None, cantidad=cantidad, costo_unitario=costo), datos_libro
+
+
+def _libro_nuevo(isbn, datos):
+    if not isbn_valido(isbn):
+        raise CompraInvalida(f"ISBN {isbn} no existe en el catálogo y no es un ISBN válido.")
+    if not (datos["titulo"] and datos["autor"]):
+        raise CompraInvalida(
+            f"ISBN {isbn} no existe en el catálogo: indique título y autor para crearlo."
+        )
+
+    try:
+        precio = Decimal(datos["precio_venta"] or "0").quantize(CENTAVOS)
+    except InvalidOperation:
+        raise CompraInvalida("El precio de venta debe ser numérico.")
+
+    return Libros(
+        isbn=isbn,
+        titulo=datos["titulo"],
+        autor=datos["autor"],
+        categoria=datos["categoria"] or None,
+        editorial=datos["editorial"] or None,
+        stock_total=0,
+        precio_venta=precio,
+        fecha_registro=timezone.now(),
+    )
+
+
+def _procesar_bloque(bloque, compra, reporte, recibidos):
+    """
+    bloque: [(numero_linea, fila_csv)]. Escribe los detalles del bloque y
+    acumula en `recibidos` las unidades por libro.
+    """
+    leidas = []
+    for numero, fila in bloque:
+        try:
+            leidas.append((numero, *_leer_fila(fila)))
+        except CompraInvalida as error:
+            reporte.error(numero, str(error))
+
+    if not leidas:
+        return
+
+    # Un solo isbn__in por bloque; se busca también el ISBN tal como vino
+    # y sin guiones porque el catálogo puede tenerlo guardado así.
+    buscados = {isbn for _, isbn, _, _ in leidas}
+    for _, fila in bloque:
+        crudo = (fila.get("isbn") or "").strip()
+        buscados |= {crudo, normalizar_isbn(crudo)}
+    existentes = {
+        isbn_canonico(isbn): libro_id
+        for libro_id, isbn in Libros.objects.filter(isbn__in=buscados).values_list("id", "isbn")
+    }
+
+    nuevos = {}
+    validas = []
+    for numero, isbn, linea, datos in leidas:
+        if isbn not in existentes and isbn not in nuevos:
+            try:
+                nuevos[isbn] = _libro_nuevo(isbn, datos)
+            except CompraInvalida as error:
+                reporte.error(numero, str(error))
+                continue
+        validas.append((isbn, linea))
+
+    if nuevos:
+        # MySQL no devuelve ids en un INSERT múltiple: se vuelven a leer
+        Libros.objects.bulk_create(nuevos.values(), batch_size=500)
+        existentes.update(
+            Libros.objects.filter(isbn__in=nuevos).values_list("isbn", "id")
+        )
+        reporte.libros_creados += len(nuevos)
+
+    detalles = []
+    for isbn, linea in validas:
+        linea.libro_id = existentes[isbn]
+        recibidos[linea.libro_id] = recibidos.get(linea.libro_id, 0) + linea.cantidad
+        detalles.append(DetalleCompras(
+            compra=compra,
+            libro_id=linea.libro_id,
+            cantidad=linea.cantidad,
+            costo_unitario=linea.costo_unitario,
+            subtotal=linea.subtotal,
+        ))
+        reporte.unidades += linea.cantidad
+        reporte.total += linea.subtotal
+
+    DetalleCompras.objects.bulk_create(detalles)
+    reporte.lineas_validas += len(detalles)
+
+
+def importar_csv(lineas, proveedor, usuario, metodo_pago, simular=False):
+    """
+    Importa una factura de proveedor desde un CSV (iterable de líneas de
+    texto, se lee de a poco). Columnas: isbn, cantidad, costo_unitario y,
+    para crear títulos que no estén en el catálogo, titulo, autor,
+    categoria, editorial y precio_venta.
+
+    Si hay cualquier error, o si simular=True, no queda nada guardado y
+    el reporte dice qué habría pasado.
+    """
+    reporte = ReporteImportacion(simulacion=simular)
+    lector = csv.DictReader(lineas)
+
+    columnas = [(c or "").strip().lower() for c in (lector.fieldnames or [])]
+    faltantes = [c for c in COLUMNAS_OBLIGATORIAS if c not in columnas]
+    if faltantes:
+        raise CompraInvalida("Faltan columnas en el archivo: " + ", ".join(faltantes) + ".")
+    lector.fieldnames = columnas
+
+    try:
+        with transaction.atomic():
+            compra = Compras.objects.create(
+                proveedor=proveedor,
+                usuario=usuario,
+                numero_factura=secuencias.siguiente(secuencias.COMPRA),
+                fecha=timezone.now().date(),
+                total=Decimal("0.00"),
+                metodo_pago=metodo_pago,
+            )
+
+            bloque = []
+            recibidos = {}
+            for fila in lector:
+                reporte.lineas += 1
+                # line_num es la línea del archivo (el encabezado es la 1)
+                bloque.append((lector.line_num, fila))
+                if len(bloque) >= TAMANO_BLOQUE_IMPORTACION:
+                    _procesar_bloque(bloque, compra, reporte, recibidos)
+                    bloque = []
+            if bloque:
+                _procesar_bloque(bloque, compra, reporte, recibidos)
+
+            if not reporte.lineas_validas and not reporte.total_errores:
+                raise CompraInvalida("El archivo no contiene líneas.")
+
+            if simular or reporte.total_errores:
+                raise _Simulacion
+
+            # El stock se suma al final: un UPDATE por cada 500 libros
+            # distintos, no uno por bloque de líneas
+            libro_ids = list(recibidos)
+            for i in range(0, len(libro_ids), 500):
+                ajustar_stock({libro_id: recibidos[libro_id] for libro_id in libro_ids[i:i + 500]})
+
+            compra.total = reporte.total
+            compra.save(update_fields=["total"])
+
+            auditoria.registrar(
+                usuario,
+                (
+                    f"IMPORTÓ COMPRA id={compra.id} "
+                    f"factura={compra.numero_factura} "
+                    f"proveedor={proveedor.nombre_comercial} "
+                    f"lineas={reporte.lineas_validas} "
+                    f"total={compra.total}"
+                ),
+                codigo="compra.importada",
+                entidad="compra",
+                entidad_id=compra.id,
+                datos={
+                    "proveedor_id": proveedor.id,
+                    "lineas": reporte.lineas_validas,
+                    "total": str(compra.total),
+                },
+                duradero=True,
+            )
+    except _Simulacion:
+        return reporte
+
+    reporte.compra = compra
+    return reporte
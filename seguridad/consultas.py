@@ -0,0 +1,89 @@
+# seguridad/consultas.py
+"""
+Forma de las consultas de los listados paginados (columnas y relaciones).
+
+Cada listado pide solo las columnas que pinta su plantilla (`only()`) y
+carga los detalles de las filas de la página actual con un único `IN`,
+en lugar de una consulta por fila desde la plantilla.
+"""
+from django.core.paginator import Paginator
+from django.db.models import Count, Prefetch, Sum, prefetch_related_objects
+
+from biblio.models import DetalleCompras, DetalleVenta, Libros
+
+
+def paginar(qs, params, por_pagina, *prefetch, total=None):
+    """
+    Pagina `qs` y precarga `prefetch` solo sobre las filas de la página.
+    Si la vista ya contó las filas (`total`), el paginador no repite el COUNT.
+    """
+    paginador = Paginator(qs, por_pagina)
+    if total is not None:
+        paginador.count = total
+    pagina = paginador.get_page(params.get("page"))
+    pagina.object_list = list(pagina.object_list)
+    prefetch_related_objects(pagina.object_list, *prefetch)
+    return pagina
+
+
+def conteos(qs, **filtros):
+    """
+    Varios COUNT del mismo queryset en una sola consulta:
+    conteos(qs, activos=Q(estado="activo")) -> {"total": n, "activos": m}.
+    """
+    return qs.aggregate(
+        total=Count("pk"),
+        **{nombre: Count("pk", filter=condicion) for nombre, condicion in filtros.items()},
+    )
+
+
+def totales_ventas(qs):
+    """(número de ventas, monto) en una consulta; el número se reusa en el paginador."""
+    fila = qs.aggregate(num=Count("pk"), suma=Sum("total"))
+    return fila["num"], fila["suma"]
+
+
+# ---------- Historial de compras del cliente ----------
+
+def ventas_cliente(qs):
+    return qs.only(
+        "id", "fecha_venta", "metodo_pago", "subtotal", "impuesto", "total", "estado",
+    )
+
+
+def detalles_venta():
+    return Prefetch(
+        "detalles",
+        queryset=(
+            DetalleVenta.objects
+            .select_related("libro")
+            .only("venta", "cantidad", "libro__titulo")
+            .order_by("id")
+        ),
+    )
+
+
+# ---------- Gestión de compras ----------
+
+def compras(qs):
+    return qs.select_related("proveedor", "usuario").only(
+        "id", "numero_factura", "fecha", "total", "metodo_pago",
+        "proveedor__id", "proveedor__nombre_comercial", "proveedor__rtn",
+        "usuario__nombre", "usuario__apellido",
+    )
+
+
+def detalles_compra():
+    return Prefetch(
+        "detalles",
+        queryset=(
+            DetalleCompras.objects
+            .select_related("libro")
+            .only("compra", "cantidad", "costo_unitario", "subtotal", "libro__titulo", "libro__isbn")
+            .order_by("id")
+        ),
+    )
+
+
+def libros_para_select():
+    return Libros.objects.only("id", "titulo", "isbn").order_by("titulo")
@@ -0,0 +1,363 @@
+# seguridad/datos_sinteticos.py
+"""
+Datos sintéticos para medir rendimiento (comando generar_datos).
+
+Crea volúmenes realistas con bulk_create por bloques: libros, ejemplares,
+clientes, préstamos, reservas, ventas, compras y solicitudes pendientes.
+La popularidad de libros y clientes sigue una ley de Zipf (`sesgo`): unos
+pocos títulos concentran la mayoría de préstamos y ventas, como en una
+biblioteca real, y eso es lo que pone a prueba índices y consultas.
+
+Con la misma `semilla` el contenido es el mismo. Las claves únicas (ISBN,
+DNI, correo, RTN) se numeran a partir de los datos sintéticos que ya
+existan, así que se puede correr varias veces sobre la misma base.
+"""
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from biblio import secuencias
+from biblio.models import (
+    Clientes,
+    Compras,
+    DetalleCompras,
+    DetalleVenta,
+    Ejemplares,
+    Libros,
+    Prestamos,
+    Proveedores,
+    ReglasPrestamo,
+    Reservas,
+    Roles,
+    SolicitudVenta,
+    Usuarios,
+    Ventas,
+)
+
+from .resumenes import reconstruir
+from .ventas import calcular_importes
+
+PREFIJO_ISBN = "97989"
+PREFIJO_DNI = "9999"
+PREFIJO_CORREO = "sim"
+DOMINIO_CORREO = "@sim.biblionet.test"
+PREFIJO_RTN = "SIM"
+
+CATEGORIAS = (
+    "Novela", "Ciencia", "Historia", "Infantil", "Poesía", "Ensayo",
+    "Tecnología", "Arte", "Filosofía", "Autoayuda",
+)
+PALABRAS = (
+    "sombra", "río", "ciudad", "tiempo", "memoria", "viento", "camino", "noche",
+    "fuego", "mar", "silencio", "luz", "jardín", "montaña", "carta", "voz",
+)
+NOMBRES = ("Ana", "Luis", "María", "Carlos", "Sofía", "José", "Lucía", "Pedro", "Elena", "Jorge")
+APELLIDOS = ("López", "Pérez", "Martínez", "Gómez", "Díaz", "Reyes", "Cruz", "Flores", "Mejía")
+UBICACIONES = (
+    "Estante A1 - Sección Literatura",
+    "Estante B2 - Sección Ciencia",
+    "Estante C3 - Sección Historia",
+    "Estante D1 - Sección Infantil",
+    "Depósito General",
+)
+METODOS_PAGO = ("Efectivo", "Tarjeta", "Transferencia")
+
+
+def _desde(modelo, campo, prefijo):
+    """Primer número libre de una serie sintética."""
+    return modelo.objects.filter(**{f"{campo}__startswith": prefijo}).count()
+
+
+def _isbn(n):
+    cuerpo = f"{PREFIJO_ISBN}{n:07d}"
+    suma = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(cuerpo))
+    return cuerpo + str((10 - suma % 10) % 10)
+
+
+def _sesgados(rng, elementos, sesgo, k):
+    """k elementos con popularidad Zipf: el i-ésimo pesa 1 / i**sesgo."""
+    if not elementos or not k:
+        return []
+    pesos = list(accumulate(1 / (i ** sesgo) for i in range(1, len(elementos) + 1)))
+    return rng.choices(elementos, cum_weights=pesos, k=k)
+
+
+def _momento(rng, ahora, dias):
+    return ahora - timedelta(seconds=rng.uniform(0, dias * 86400))
+
+
+def _ids(modelo, campo, valores, tamano_bloque):
+    """{valor_único: id} de filas recién creadas (bulk_create no devuelve ids en MySQL)."""
+    valores = list(valores)
+    resultado = {}
+    for i in range(0, len(valores), tamano_bloque):
+        bloque = valores[i:i + tamano_bloque]
+        resultado.update(
+            modelo.objects.filter(**{f"{campo}__in": bloque}).values_list(campo, "id")
+        )
+    return resultado
+
+
+@contextmanager
+def _fecha_manual(modelo, campo):
+    """Permite fijar a mano un campo auto_now_add (ventas con fecha pasada)."""
+    field = modelo._meta.get_field(campo)
+    original = field.auto_now_add
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = original
+
+
+def generar(
+    libros=2000,
+    ejemplares_por_libro=2,
+    clientes=1000,
+    prestamos=20000,
+    reservas=2000,
+    ventas=10000,
+    compras=500,
+    solicitudes=200,
+    sesgo=1.1,
+    dias=365,
+    semilla=42,
+    tamano_bloque=2000,
+):
+    """Crea los datos en una sola transacción y devuelve {tabla: filas creadas}."""
+    rng = random.Random(semilla)
+    ahora = timezone.now()
+    hoy = timezone.localdate()
+    creados = {}
+
+    def crear(modelo, objetos):
+        modelo.objects.bulk_create(objetos, batch_size=tamano_bloque)
+        creados[modelo._meta.db_table] = creados.get(modelo._meta.db_table, 0) + len(objetos)
+
+    with transaction.atomic():
+        regla = ReglasPrestamo.objects.order_by("-fecha_actualizacion").first()
+        if regla is None:
+            regla = ReglasPrestamo.objects.create(
+                plazo_dias=14, limite_prestamos=3, tarifa_mora_diaria=Decimal("5.00"),
+                descripcion="Regla por defecto (datos sintéticos)", fecha_actualizacion=ahora,
+            )
+
+        roles = {
+            nombre: Roles.objects.get_or_create(nombre=nombre, defaults={"descripcion": nombre})[0]
+            for nombre in ("administrador", "bibliotecario", "cliente")
+        }
+        clave = make_password("sim")
+
+        # ---------- Personas ----------
+        inicio = _desde(Usuarios, "email", PREFIJO_CORREO)
+        total_usuarios = 3 + clientes
+        correos = [f"{PREFIJO_CORREO}{inicio + i:07d}{DOMINIO_CORREO}" for i in range(total_usuarios)]
+        crear(Usuarios, [
+            Usuarios(
+                rol=roles["bibliotecario"] if i < 3 else roles["cliente"],
+                nombre=rng.choice(NOMBRES),
+                apellido=rng.choice(APELLIDOS),
+                email=correo,
+                clave=clave,
+                estado="activo",
+                fecha_creacion=_momento(rng, ahora, dias),
+                primer_ingreso=False,
+            )
+            for i, correo in enumerate(correos)
+        ])
+        ids_usuarios = _ids(Usuarios, "email", correos, tamano_bloque)
+        vendedores = [ids_usuarios[c] for c in correos[:3]]
+
+        inicio = _desde(Clientes, "dni", PREFIJO_DNI)
+        dnis = [f"{PREFIJO_DNI}{inicio + i:09d}" for i in range(clientes)]
+        crear(Clientes, [
+            Clientes(
+                usuario_id=ids_usuarios[correo],
+                dni=dni,
+                estado="activo",
+                telefono=f"9{rng.randrange(10**7):07d}",
+            )
+            for correo, dni in zip(correos[3:], dnis)
+        ])
+        ids_clientes = list(_ids(Clientes, "dni", dnis, tamano_bloque).values())
+        rng.shuffle(ids_clientes)
+
+        inicio = _desde(Proveedores, "rtn", PREFIJO_RTN)
+        rtns = [f"{PREFIJO_RTN}{inicio + i:08d}" for i in range(max(1, compras // 25))]
+        crear(Proveedores, [
+            Proveedores(nombre_comercial=f"Distribuidora {rtn}", rtn=rtn, estado="activo", fecha_registro=ahora)
+            for rtn in rtns
+        ])
+        ids_proveedores = list(_ids(Proveedores, "rtn", rtns, tamano_bloque).values())
+
+        # ---------- Libros y ejemplares ----------
+        inicio = _desde(Libros, "isbn", PREFIJO_ISBN)
+        isbns = [_isbn(inicio + i) for i in range(libros)]
+        catalogo = [
+            Libros(
+                isbn=isbn,
+                titulo=" ".join(rng.sample(PALABRAS, 3)).capitalize(),
+                autor=f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)}",
+                categoria=rng.choice(CATEGORIAS),
+                editorial=f"Editorial {rng.choice(PALABRAS).capitalize()}",
+                anio_publicacion=str(rng.randint(1950, hoy.year)),
+                # Uno de cada diez sin stock: también hay "prestados" en el catálogo
+                stock_total=0 if rng.random() < 0.1 else rng.randint(1, 30),
+                fecha_registro=_momento(rng, ahora, dias),
+                precio_venta=Decimal(rng.randrange(15000, 120000)) / 100,
+                impuesto_porcentaje=Decimal("15.00"),
+            )
+            for isbn in isbns
+        ]
+        crear(Libros, catalogo)
+        ids_libros = _ids(Libros, "isbn", isbns, tamano_bloque)
+        for libro in catalogo:
+            libro.id = ids_libros[libro.isbn]
+        por_popularidad = catalogo[:]
+        rng.shuffle(por_popularidad)
+
+        codigos = secuencias.reservar(secuencias.EJEMPLAR, libros * ejemplares_por_libro)
+        ejemplares = [
+            Ejemplares(
+                libro_id=libro.id,
+                codigo_interno=codigos[i * ejemplares_por_libro + k],
+                ubicacion=rng.choice(UBICACIONES),
+                estado=rng.choice(("nuevo", "usado")),
+            )
+            for i, libro in enumerate(catalogo)
+            for k in range(ejemplares_por_libro)
+        ]
+        crear(Ejemplares, ejemplares)
+        libro_de_codigo = {e.codigo_interno: e.libro_id for e in ejemplares}
+        copias = {}
+        for codigo, ejemplar_id in _ids(Ejemplares, "codigo_interno", codigos, tamano_bloque).items():
+            copias.setdefault(libro_de_codigo[codigo], []).append(ejemplar_id)
+
+        # ---------- Préstamos ----------
+        filas = []
+        for libro, cliente_id in zip(
+            _sesgados(rng, por_popularidad, sesgo, prestamos),
+            _sesgados(rng, ids_clientes, sesgo / 2, prestamos),
+        ):
+            if not copias.get(libro.id):
+                continue
+            inicio_prestamo = _momento(rng, ahora, dias).date()
+            fin = inicio_prestamo + timedelta(days=regla.plazo_dias)
+            # Los recientes siguen activos; los demás se devolvieron (algunos tarde)
+            activo = (hoy - inicio_prestamo).days < regla.plazo_dias and rng.random() < 0.6
+            devolucion = None
+            if not activo:
+                devolucion = min(hoy, fin + timedelta(days=rng.choice((-5, -2, 0, 0, 0, 3, 10))))
+            filas.append(Prestamos(
+                cliente_id=cliente_id,
+                ejemplar_id=rng.choice(copias[libro.id]),
+                fecha_inicio=inicio_prestamo,
+                fecha_fin=fin,
+                fecha_devolucion=devolucion,
+                estado="activo" if activo else "devuelto",
+            ))
+        crear(Prestamos, filas)
+
+        # ---------- Reservas ----------
+        filas = []
+        for libro, cliente_id in zip(
+            _sesgados(rng, por_popularidad, sesgo, reservas),
+            _sesgados(rng, ids_clientes, sesgo / 2, reservas),
+        ):
+            fecha = _momento(rng, ahora, dias)
+            filas.append(Reservas(
+                cliente_id=cliente_id,
+                libro_id=libro.id,
+                fecha_reserva=fecha,
+                fecha_vencimiento=fecha + timedelta(days=3),
+                estado=rng.choices(("activa", "facturada", "cancelada"), weights=(1, 3, 2))[0],
+            ))
+        crear(Reservas, filas)
+
+        # ---------- Ventas ----------
+        numeros = secuencias.reservar(secuencias.FACTURA_VENTA, ventas)
+        cabeceras, lineas = [], {}
+        for numero, cliente_id in zip(numeros, _sesgados(rng, ids_clientes, sesgo / 2, ventas)):
+            vendidos = set(_sesgados(rng, por_popularidad, sesgo, rng.choice((1, 1, 1, 2, 3))))
+            subtotal = impuesto = Decimal("0.00")
+            detalle = []
+            for libro in vendidos:
+                cantidad = rng.choice((1, 1, 1, 2))
+                precio, pct, sub, imp, total = calcular_importes(libro, cantidad)
+                subtotal += sub
+                impuesto += imp
+                detalle.append(DetalleVenta(
+                    libro_id=libro.id, cantidad=cantidad, precio_unitario=precio,
+                    impuesto_unitario=pct, total_linea=total,
+                ))
+            lineas[numero] = detalle
+            cabeceras.append(Ventas(
+                cliente_id=cliente_id,
+                vendedor_id=rng.choice(vendedores),
+                fecha_venta=_momento(rng, ahora, dias),
+                metodo_pago=rng.choice(METODOS_PAGO),
+                subtotal=subtotal,
+                impuesto=impuesto,
+                total=subtotal + impuesto,
+                estado="pagada",
+                numero_factura=numero,
+            ))
+        with _fecha_manual(Ventas, "fecha_venta"):
+            crear(Ventas, cabeceras)
+        detalles = []
+        for numero, venta_id in _ids(Ventas, "numero_factura", numeros, tamano_bloque).items():
+            for d in lineas[numero]:
+                d.venta_id = venta_id
+                detalles.append(d)
+        crear(DetalleVenta, detalles)
+
+        # ---------- Compras ----------
+        numeros = secuencias.reservar(secuencias.COMPRA, compras)
+        lineas = {}
+        cabeceras = []
+        for numero in numeros:
+            detalle = []
+            for libro in set(_sesgados(rng, por_popularidad, sesgo, rng.randint(1, 5))):
+                cantidad = rng.randint(5, 50)
+                costo = (libro.precio_venta * Decimal("0.6")).quantize(Decimal("0.01"))
+                detalle.append(DetalleCompras(
+                    libro_id=libro.id, cantidad=cantidad, costo_unitario=costo, subtotal=costo * cantidad,
+                ))
+            lineas[numero] = detalle
+            cabeceras.append(Compras(
+                proveedor_id=rng.choice(ids_proveedores),
+                usuario_id=rng.choice(vendedores),
+                numero_factura=numero,
+                fecha=_momento(rng, ahora, dias),
+                total=sum((d.subtotal for d in detalle), Decimal("0.00")),
+                metodo_pago=rng.choice(METODOS_PAGO),
+            ))
+        crear(Compras, cabeceras)
+        detalles = []
+        for numero, compra_id in _ids(Compras, "numero_factura", numeros, tamano_bloque).items():
+            for d in lineas[numero]:
+                d.compra_id = compra_id
+                detalles.append(d)
+        crear(DetalleCompras, detalles)
+
+        # ---------- Solicitudes pendientes (cola de facturación) ----------
+        con_stock = [libro for libro in por_popularidad if libro.stock_total]
+        crear(SolicitudVenta, [
+            SolicitudVenta(cliente_id=cliente_id, libro_id=libro.id, cantidad=1, estado="pendiente")
+            for libro, cliente_id in zip(
+                _sesgados(rng, con_stock, sesgo, solicitudes),
+                _sesgados(rng, ids_clientes, sesgo / 2, solicitudes),
+            )
+        ])
+
+        # Las ventas se insertaron sin pasar por los resúmenes
+        if ventas:
+            reconstruir()
+
+    return creados
@@ -0,0 +1,382 @@
+# seguridad/documentos.py
+"""
+Almacén en disco de los PDF de ventas y compras.
+
+Las ventas y compras casi no cambian una vez registradas, así que su PDF
+se dibuja una sola vez (al facturar / registrar la compra), se guarda bajo
+DOCUMENTOS_ROOT con un nombre derivado de su SHA-256 y a partir de ahí
+reimprimir es solo leer el archivo. Si se edita una compra,
+invalidar_documento descarta el guardado y la próxima impresión lo
+vuelve a dibujar.
+"""
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.http import FileResponse, HttpResponse
+
+from biblio import metricas
+from biblio.models import Compras, DocumentosGenerados, Ventas
+
+TIPO_FACTURA = "factura"
+TIPO_COMPROBANTE_COMPRA = "comprobante_compra"
+
+
+# ---------- Layouts ReportLab ----------
+
+def dibujar_factura_pdf(venta):
+    """Dibuja la factura de una venta y devuelve los bytes del PDF."""
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+
+    buffer = BytesIO()
+    # invariant=1: mismo contenido -> mismos bytes (y mismo hash)
+    c = canvas.Canvas(buffer, pagesize=letter, invariant=1)
+
+    width, height = letter
+    x_margin = 40
+    y = height - 50
+
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(x_margin, y, "BiblioNet - Factura")
+    y -= 30
+
+    c.setFont("Helvetica", 10)
+    c.drawString(x_margin, y, f"N° factura: {venta.numero_factura or venta.id}")
+    y -= 15
+    c.drawString(x_margin, y, f"Fecha: {venta.fecha_venta.strftime('%d/%m/%Y %H:%M')}")
+    y -= 15
+
+    cliente = venta.cliente
+    c.drawString(x_margin, y, f"Cliente: {cliente.usuario.nombre} {cliente.usuario.apellido}")
+    y -= 15
+    c.drawString(x_margin, y, f"DNI: {cliente.dni}")
+    y -= 15
+
+    c.drawString(x_margin, y, f"Vendedor: {venta.vendedor.nombre} {venta.vendedor.apellido}")
+    y -= 25
+
+    c.setFont("Helvetica-Bold", 11)
+    c.drawString(x_margin, y, "Detalle de la venta")
+    y -= 20
+
+    c.setFont("Helvetica-Bold", 9)
+    c.drawString(x_margin, y, "Libro")
+    c.drawString(x_margin + 220, y, "Cant.")
+    c.drawString(x_margin + 260, y, "P. Unit")
+    c.drawString(x_margin + 340, y, "Impuesto")
+    c.drawString(x_margin + 420, y, "Total")
+    y -= 15
+    c.line(x_margin, y, width - x_margin, y)
+    y -= 15
+
+    c.setFont("Helvetica", 9)
+    for det in venta.detalles.all():
+        if y < 100:
+            c.showPage()
+            y = height - 50
+            c.setFont("Helvetica", 9)
+
+        c.drawString(x_margin, y, det.libro.titulo[:30])
+        c.drawString(x_margin + 220, y, str(det.cantidad))
+        c.drawRightString(x_margin + 310, y, f"L. {det.precio_unitario:.2f}")
+        c.drawRightString(x_margin + 390, y, f"{det.impuesto_unitario:.2f}%")
+        c.drawRightString(x_margin + 480, y, f"L. {det.total_linea:.2f}")
+        y -= 15
+
+    y -= 20
+    c.line(x_margin, y, width - x_margin, y)
+    y -= 15
+
+    c.setFont("Helvetica-Bold", 10)
+    c.drawRightString(x_margin + 400, y, "Subtotal:")
+    c.drawRightString(x_margin + 480, y, f"L. {venta.subtotal:.2f}")
+    y -= 15
+
+    c.drawRightString(x_margin + 400, y, "Impuesto:")
+    c.drawRightString(x_margin + 480, y, f"L. {venta.impuesto:.2f}")
+    y -= 15
+
+    c.drawRightString(x_margin + 400, y, "Total:")
+    c.drawRightString(x_margin + 480, y, f"L. {venta.total:.2f}")
+    y -= 30
+
+    c.setFont("Helvetica-Oblique", 9)
+    c.drawString(x_margin, y, "Gracias por su compra.")
+
+    c.showPage()
+    c.save()
+
+    return buffer.getbuffer()
+
+
+def dibujar_comprobante_compra_pdf(compra):
+    """Dibuja el comprobante de una compra y devuelve los bytes del PDF."""
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter, invariant=1)
+
+    width, height = letter
+    x_margin = 40
+    y = height - 50
+
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(x_margin, y, "BiblioNet")
+    y -= 22
+    c.setFont("Helvetica", 12)
+    c.drawString(x_margin, y, "Comprobante de compra")
+    y -= 30
+
+    c.setFont("Helvetica", 10)
+    c.drawString(x_margin, y, f"N° factura: {compra.numero_factura}")
+    y -= 15
+
+    if compra.fecha:
+        c.drawString(x_margin, y, f"Fecha de compra: {compra.fecha.strftime('%d/%m/%Y')}")
+    else:
+        c.drawString(x_margin, y, "Fecha de compra: —")
+    y -= 15
+
+    metodo = compra.metodo_pago or "—"
+    c.drawString(x_margin, y, f"Método de pago: {metodo}")
+    y -= 15
+
+    if compra.usuario:
+        c.drawString(
+            x_margin,
+            y,
+            f"Registrado por: {compra.usuario.nombre} {compra.usuario.apellido}"
+        )
+    else:
+        c.drawString(x_margin, y, "Registrado por: —")
+    y -= 25
+
+    proveedor = compra.proveedor
+    c.setFont("Helvetica-Bold", 11)
+    c.drawString(x_margin, y, "Proveedor")
+    y -= 18
+
+    c.setFont("Helvetica", 10)
+    c.drawString(x_margin, y, f"Nombre comercial: {proveedor.nombre_comercial}")
+    y -= 15
+    c.drawString(x_margin, y, f"RTN: {proveedor.rtn}")
+    y -= 15
+
+    tel = proveedor.telefono or "—"
+    c.drawString(x_margin, y, f"Teléfono: {tel}")
+    y -= 15
+
+    direccion = proveedor.direccion or "—"
+    c.drawString(x_margin, y, f"Dirección: {direccion}")
+    y -= 25
+
+    c.setFont("Helvetica-Bold", 11)
+    c.drawString(x_margin, y, "Libros de la compra")
+    y -= 20
+
+    c.setFont("Helvetica-Bold", 9)
+    c.drawString(x_margin, y, "Libro")
+    c.drawString(x_margin + 260, y, "Cant.")
+    c.drawRightString(x_margin + 360, y, "Costo unit.")
+    c.drawRightString(x_margin + 460, y, "Subtotal")
+    y -= 12
+    c.line(x_margin, y, width - x_margin, y)
+    y -= 14
+
+    c.setFont("Helvetica", 9)
+    detalles = list(compra.detalles.all())
+
+    if not detalles:
+        c.drawString(x_margin, y, "No hay libros registrados en esta compra.")
+        y -= 20
+    else:
+        for det in detalles:
+            if y < 80:
+                c.showPage()
+                y = height - 50
+                c.setFont("Helvetica", 9)
+
+            titulo = det.libro.titulo if det.libro else "—"
+            if det.libro and det.libro.isbn:
+                titulo = f"{titulo} ({det.libro.isbn})"
+            c.drawString(x_margin, y, titulo[:55])
+
+            c.drawString(x_margin + 260, y, str(det.cantidad))
+
+            c.drawRightString(
+                x_margin + 360,
+                y,
+                f"L. {det.costo_unitario:.2f}"
+            )
+
+            c.drawRightString(
+                x_margin + 460,
+                y,
+                f"L. {det.subtotal:.2f}"
+            )
+            y -= 14
+
+    y -= 10
+    c.line(x_margin, y, width - x_margin, y)
+    y -= 18
+
+    c.setFont("Helvetica-Bold", 10)
+    c.drawRightString(x_margin + 360, y, "Total compra (L.):")
+    c.drawRightString(x_margin + 460, y, f"L. {compra.total:.2f}")
+    y -= 25
+
+    c.setFont("Helvetica-Oblique", 9)
+    c.drawString(x_margin, y, "Comprobante generado por BiblioNet.")
+
+    c.showPage()
+    c.save()
+
+    return buffer.getbuffer()
+
+
+# ---------- Almacén en disco ----------
+
+def _escribir_pdf(tipo, pdf):
+    """
+    Guarda el PDF con nombre direccionado por contenido y devuelve
+    (ruta relativa a MEDIA_ROOT, sha256). Si el archivo ya existe no se reescribe.
+    """
+    sha256 = hashlib.sha256(pdf).hexdigest()
+    raiz = Path(settings.DOCUMENTOS_ROOT)
+    destino = raiz / tipo / sha256[:2] / f"{sha256}.pdf"
+
+    if not destino.exists():
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        # Escritura atómica: nunca se sirve un PDF a medio escribir
+        fd, temporal = tempfile.mkstemp(dir=destino.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as archivo:
+                archivo.write(pdf)
+            os.replace(temporal, destino)
+        except BaseException:
+            if os.path.exists(temporal):
+                os.unlink(temporal)
+            raise
+
+    ruta = os.path.relpath(destino, settings.MEDIA_ROOT)
+    return Path(ruta).as_posix(), sha256
+
+
+def obtener_documento(tipo, objeto_id):
+    """Devuelve el registro si el PDF ya existe en disco; None si hay que generarlo."""
+    registro = DocumentosGenerados.objects.filter(tipo=tipo, objeto_id=objeto_id).first()
+    if registro and ruta_absoluta(registro).exists():
+        return registro
+    return None
+
+
+def ruta_absoluta(registro):
+    return Path(settings.MEDIA_ROOT) / registro.ruta
+
+
+def cargar_venta(venta_id):
+    return (
+        Ventas.objects
+        .select_related("cliente__usuario", "vendedor")
+        .prefetch_related("detalles__libro")
+        .get(id=venta_id)
+    )
+
+
+def cargar_compra(compra_id):
+    return (
+        Compras.objects
+        .select_related("proveedor", "usuario")
+        .prefetch_related("detalles__libro")
+        .get(id=compra_id)
+    )
+
+
+def dibujar_documento(tipo, objeto_id):
+    """
+    Dibuja el PDF y lo deja en disco; devuelve el registro SIN guardarlo
+    (los lotes los guardan todos juntos).
+    """
+    if tipo == TIPO_FACTURA:
+        pdf = dibujar_factura_pdf(cargar_venta(objeto_id))
+    else:
+        pdf = dibujar_comprobante_compra_pdf(cargar_compra(objeto_id))
+
+    ruta, sha256 = _escribir_pdf(tipo, pdf)
+    return DocumentosGenerados(
+        tipo=tipo, objeto_id=objeto_id, sha256=sha256, ruta=ruta, tamano=len(pdf),
+    )
+
+
+def _documento(tipo, objeto_id):
+    registro = obtener_documento(tipo, objeto_id)
+    if registro is None:
+        nuevo = dibujar_documento(tipo, objeto_id)
+        metricas.contar("pdf_generados", tipo=tipo)
+        try:
+            registro, _ = DocumentosGenerados.objects.update_or_create(
+                tipo=tipo,
+                objeto_id=objeto_id,
+                defaults={"sha256": nuevo.sha256, "ruta": nuevo.ruta, "tamano": nuevo.tamano},
+            )
+        except IntegrityError:
+            # Otra petición lo registró al mismo tiempo; el contenido es el mismo
+            registro = DocumentosGenerados.objects.get(tipo=tipo, objeto_id=objeto_id)
+    return registro
+
+
+def invalidar_documento(tipo, objeto_id):
+    """
+    Olvida el PDF guardado del objeto. El archivo se borra solo si ningún
+    otro registro apunta al mismo contenido.
+    """
+    registro = DocumentosGenerados.objects.filter(tipo=tipo, objeto_id=objeto_id).first()
+    if registro is None:
+        return
+    registro.delete()
+    if not DocumentosGenerados.objects.filter(ruta=registro.ruta).exists():
+        ruta_absoluta(registro).unlink(missing_ok=True)
+
+
+def documento_factura(venta_id):
+    """Registro del PDF de la factura; lo dibuja solo si todavía no existe."""
+    return _documento(TIPO_FACTURA, venta_id)
+
+
+def documento_comprobante_compra(compra_id):
+    """Registro del PDF del comprobante; lo dibuja solo si todavía no existe."""
+    return _documento(TIPO_COMPROBANTE_COMPRA, compra_id)
+
+
+def respuesta_documento(registro, nombre_archivo, adjunto=False):
+    """
+    Sirve un PDF del almacén. Según DOCUMENTOS_SENDFILE delega el envío al
+    servidor web (X-Sendfile / X-Accel-Redirect) o usa FileResponse.
+    """
+    disposicion = "attachment" if adjunto else "inline"
+    modo = (settings.DOCUMENTOS_SENDFILE or "").lower()
+
+    if modo in ("x-sendfile", "x-accel-redirect"):
+        response = HttpResponse(content_type="application/pdf")
+        if modo == "x-sendfile":
+            response["X-Sendfile"] = str(ruta_absoluta(registro))
+        else:
+            prefijo = settings.DOCUMENTOS_ACCEL_PREFIX.rstrip("/")
+            response["X-Accel-Redirect"] = f"{prefijo}/{registro.ruta}"
+        response["Content-Disposition"] = f'{disposicion}; filename="{nombre_archivo}"'
+        return response
+
+    response = FileResponse(
+        open(ruta_absoluta(registro), "rb"),
+        content_type="application/pdf",
+        as_attachment=adjunto,
+        filename=nombre_archivo,
+    )
+    response["ETag"] = f'"{registro.sha256}"'
+    return response
@@ -0,0 +1,270 @@
+# seguridad/exportaciones.py
+"""
+Exportaciones CSV / XLSX de ventas, compras, préstamos y bitácora.
+
+Las filas se leen con values_list por bloques de id (keyset) y se van
+escribiendo en un StreamingHttpResponse: la memoria del worker no crece
+con el tamaño del archivo. No se usa un solo .iterator() sobre toda la
+consulta porque mysqlclient trae el resultado completo al cliente.
+"""
+import csv
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from . import filtros
+
+TAMANO_BLOQUE = 2000
+
+FORMATO_CSV = "csv"
+FORMATO_XLSX = "xlsx"
+FORMATOS = (FORMATO_CSV, FORMATO_XLSX)
+
+
+# (encabezado, campo de values_list)
+COLUMNAS_VENTAS = [
+    ("ID", "id"),
+    ("Factura", "numero_factura"),
+    ("Fecha", "fecha_venta"),
+    ("DNI cliente", "cliente__dni"),
+    ("Nombre cliente", "cliente__usuario__nombre"),
+    ("Apellido cliente", "cliente__usuario__apellido"),
+    ("Vendedor", "vendedor__email"),
+    ("Método de pago", "metodo_pago"),
+    ("Subtotal", "subtotal"),
+    ("Impuesto", "impuesto"),
+    ("Total", "total"),
+    ("Estado", "estado"),
+]
+
+COLUMNAS_COMPRAS = [
+    ("ID", "id"),
+    ("Fecha", "fecha"),
+    ("Factura", "numero_factura"),
+    ("Proveedor", "proveedor__nombre_comercial"),
+    ("RTN", "proveedor__rtn"),
+    ("Registrada por", "usuario__email"),
+    ("Método de pago", "metodo_pago"),
+    ("Total", "total"),
+]
+
+COLUMNAS_PRESTAMOS = [
+    ("ID", "id"),
+    ("DNI cliente", "cliente__dni"),
+    ("Nombre cliente", "cliente__usuario__nombre"),
+    ("Apellido cliente", "cliente__usuario__apellido"),
+    ("ISBN", "ejemplar__libro__isbn"),
+    ("Título", "ejemplar__libro__titulo"),
+    ("Ejemplar", "ejemplar__codigo_interno"),
+    ("Fecha inicio", "fecha_inicio"),
+    ("Fecha fin", "fecha_fin"),
+    ("Devolución", "fecha_devolucion"),
+    ("Estado", "estado"),
+]
+
+COLUMNAS_BITACORA = [
+    ("ID", "id"),
+    ("Fecha", "fecha"),
+    ("Usuario", "usuario__email"),
+    ("Acción", "accion"),
+    ("Código", "codigo"),
+    ("Entidad", "entidad"),
+    ("ID entidad", "entidad_id"),
+]
+
+
+def filas_por_bloques(qs, campos, tamano=TAMANO_BLOQUE):
+    """
+    Recorre qs de id mayor a menor (el mismo orden que los listados) en
+    bloques de `tamano`. `campos` debe empezar por "id".
+    """
+    ultimo_id = None
+    while True:
+        bloque_qs = qs.order_by("-id")
+        if ultimo_id is not None:
+            bloque_qs = bloque_qs.filter(id__lt=ultimo_id)
+        bloque = list(bloque_qs.values_list(*campos)[:tamano].iterator(chunk_size=tamano))
+        if not bloque:
+            return
+        yield from bloque
+        if len(bloque) < tamano:
+            return
+        ultimo_id = bloque[-1][0]
+
+
+# Un texto que empieza así la hoja de cálculo lo ejecuta como fórmula
+_INICIO_FORMULA = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _valor(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, datetime):
+        if timezone.is_aware(valor):
+            valor = timezone.localtime(valor)
+        return valor.strftime("%Y-%m-%d %H:%M")
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, str) and valor.startswith(_INICIO_FORMULA):
+        return "'" + valor
+    return valor
+
+
+# ---------- CSV ----------
+
+class _Eco:
+    """Objeto tipo archivo que devuelve lo escrito en vez de guardarlo."""
+
+    def write(self, valor):
+        return valor
+
+
+def _csv(encabezados, filas):
+    escritor = csv.writer(_Eco())
+    # BOM para que Excel abra bien las tildes
+    yield "\ufeff" + escritor.writerow(encabezados)
+    for fila in filas:
+        yield escritor.writerow([_valor(v) for v in fila])
+
+
+# ---------- XLSX ----------
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{hoja}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+class _Tubo:
+    """
+    Destino no buscable para ZipFile: acumula lo escrito hasta que el
+    generador lo entrega. ZipFile detecta que no hay tell()/seek() y usa
+    descriptores de datos, así el ZIP se puede emitir por partes.
+    """
+
+    def __init__(self):
+        self._partes = []
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b"".join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+def _celda(valor):
+    valor = _valor(valor)
+    if isinstance(valor, bool):
+        valor = "Sí" if valor else "No"
+    if isinstance(valor, (int, float, Decimal)):
+        return f"<c><v>{valor}</v></c>"
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(str(valor))}</t></is></c>'
+
+
+def _fila_xml(valores):
+    return "<row>" + "".join(_celda(v) for v in valores) + "</row>"
+
+
+def _xlsx(encabezados, filas, hoja):
+    tubo = _Tubo()
+    with zipfile.ZipFile(tubo, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _RELS)
+        zf.writestr("xl/workbook.xml", _WORKBOOK.format(hoja=escape(hoja)))
+        zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        yield tubo.vaciar()
+
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as hoja_xml:
+            hoja_xml.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b"<sheetData>"
+            )
+            hoja_xml.write(_fila_xml(encabezados).encode("utf-8"))
+            for i, fila in enumerate(filas, start=1):
+                hoja_xml.write(_fila_xml(fila).encode("utf-8"))
+                if i % TAMANO_BLOQUE == 0:
+                    yield tubo.vaciar()
+            hoja_xml.write(b"</sheetData></worksheet>")
+    yield tubo.vaciar()
+
+
+# ---------- Respuestas ----------
+
+def respuesta(nombre, columnas, qs, formato=FORMATO_CSV):
+    encabezados = [titulo for titulo, _ in columnas]
+    filas = filas_por_bloques(qs, [campo for _, campo in columnas])
+    marca = timezone.localtime().strftime("%Y%m%d_%H%M")
+
+    if formato == FORMATO_XLSX:
+        response = StreamingHttpResponse(
+            _xlsx(encabezados, filas, hoja=nombre.capitalize()),
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+    else:
+        formato = FORMATO_CSV
+        response = StreamingHttpResponse(
+            _csv(encabezados, filas), content_type="text/csv; charset=utf-8",
+        )
+
+    response["Content-Disposition"] = f'attachment; filename="{nombre}_{marca}.{formato}"'
+    return response
+
+
+def exportar_ventas(params, formato):
+    return respuesta("ventas", COLUMNAS_VENTAS, filtros.ventas(params), formato)
+
+
+def exportar_compras(params, formato):
+    return respuesta("compras", COLUMNAS_COMPRAS, filtros.compras(params), formato)
+
+
+def exportar_prestamos(params, formato):
+    return respuesta("prestamos", COLUMNAS_PRESTAMOS, filtros.prestamos(params), formato)
+
+
+def exportar_bitacora(params, formato):
+    return respuesta("bitacora", COLUMNAS_BITACORA, filtros.bitacora(params), formato)
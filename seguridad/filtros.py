@@ -0,0 +1,138 @@
+# seguridad/filtros.py
+"""
+Filtros de los listados del personal (q, estado, fecha_desde/fecha_hasta).
+
+Los usan tanto las vistas paginadas como las exportaciones, para que un
+CSV descargue exactamente lo que se ve en pantalla.
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from biblio.models import Bitacora, BitacoraArchivo, Compras, Prestamos, Ventas
+
+
+def _texto(params, nombre):
+    return (params.get(nombre) or "").strip()
+
+
+def hay_filtros(params):
+    """True si el listado viene filtrado (q, estado o alguna fecha)."""
+    return any(_texto(params, nombre) for nombre in ("q", "estado", "fecha_desde", "fecha_hasta"))
+
+
+def _rango_fechas(qs, params, campo):
+    # Una fecha mal escrita en la URL se ignora en vez de dar un 500
+    fecha_desde = _dia(params, "fecha_desde")
+    fecha_hasta = _dia(params, "fecha_hasta")
+    if fecha_desde:
+        qs = qs.filter(**{f"{campo}__gte": fecha_desde})
+    if fecha_hasta:
+        qs = qs.filter(**{f"{campo}__lte": fecha_hasta})
+    return qs
+
+
+def ventas(params):
+    qs = Ventas.objects.all()
+
+    q = _texto(params, "q")
+    if q:
+        qs = qs.filter(
+            Q(cliente__dni__icontains=q) |
+            Q(cliente__usuario__nombre__icontains=q) |
+            Q(cliente__usuario__apellido__icontains=q) |
+            Q(vendedor__nombre__icontains=q) |
+            Q(vendedor__apellido__icontains=q) |
+            Q(numero_factura__icontains=q) |
+            Q(id__icontains=q)
+        )
+
+    estado = _texto(params, "estado")
+    if estado:
+        qs = qs.filter(estado__iexact=estado)
+
+    return _rango_fechas(qs, params, "fecha_venta__date")
+
+
+def compras(params):
+    qs = Compras.objects.all()
+
+    q = _texto(params, "q")
+    if q:
+        qs = qs.filter(
+            Q(proveedor__nombre_comercial__icontains=q) |
+            Q(proveedor__rtn__icontains=q) |
+            Q(numero_factura__icontains=q)
+        )
+
+    return _rango_fechas(qs, params, "fecha__date")
+
+
+def prestamos(params):
+    # La pantalla de gestión solo muestra los activos
+    qs = Prestamos.objects.filter(estado=_texto(params, "estado") or "activo")
+
+    q = _texto(params, "q")
+    if q:
+        qs = qs.filter(
+            Q(cliente__usuario__nombre__icontains=q)
+            | Q(cliente__usuario__apellido__icontains=q)
+            | Q(cliente__dni__icontains=q)
+        )
+
+    return _rango_fechas(qs, params, "fecha_inicio")
+
+
+def _dia(params, nombre):
+    try:
+        return date.fromisoformat(_texto(params, nombre))
+    except ValueError:
+        return None
+
+
+def _rango_dias(qs, params, campo):
+    """
+    Como _rango_fechas pero comparando la columna con los límites del día
+    en hora local, sin __date: así el filtro puede usar el índice.
+    """
+    desde = _dia(params, "fecha_desde")
+    hasta = _dia(params, "fecha_hasta")
+    if desde:
+        qs = qs.filter(**{f"{campo}__gte": timezone.make_aware(datetime.combine(desde, time.min))})
+    if hasta:
+        limite = datetime.combine(hasta + timedelta(days=1), time.min)
+        qs = qs.filter(**{f"{campo}__lt": timezone.make_aware(limite)})
+    return qs
+
+
+def bitacora(params):
+    # archivo=1 consulta las entradas ya movidas por rotar_bitacora
+    modelo = BitacoraArchivo if _texto(params, "archivo") else Bitacora
+    qs = modelo.objects.all()
+
+    usuario = _texto(params, "usuario")
+    if usuario.isdigit():
+        qs = qs.filter(usuario_id=int(usuario))
+
+    codigo = _texto(params, "codigo")
+    if codigo:
+        qs = qs.filter(codigo=codigo)
+
+    entidad = _texto(params, "entidad")
+    if entidad:
+        qs = qs.filter(entidad=entidad)
+        entidad_id = _texto(params, "entidad_id")
+        if entidad_id.isdigit():
+            qs = qs.filter(entidad_id=int(entidad_id))
+
+    # Búsqueda libre: LIKE sin índice, solo para lo que no tiene código
+    q = _texto(params, "q")
+    if q:
+        qs = qs.filter(
+            Q(accion__icontains=q) |
+            Q(usuario__email__icontains=q) |
+            Q(usuario__nombre__icontains=q)
+        )
+
+    return _rango_dias(qs, params, "fecha")
@@ -0,0 +1,270 @@
+# seguridad/lotes.py
+"""
+Generación por lotes de PDFs (facturas / comprobantes de compra) en un ZIP.
+
+Los procesa el comando procesar_lotes_documentos. El trabajo se reparte
+en un ProcessPoolExecutor: cada proceso dibuja con los mismos layouts de
+seguridad.documentos y deja el PDF en el almacén; el proceso principal
+solo va copiando los archivos al ZIP en disco y actualizando el progreso
+del lote (fecha_progreso). Un lote "procesando" sin progreso durante
+DOCUMENTOS_LOTES_VENCIMIENTO minutos (su proceso murió) se vuelve a tomar.
+
+Este módulo se importa en los procesos hijos antes de django.setup(),
+por eso los modelos se importan dentro de las funciones.
+"""
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from itertools import repeat
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Cada cuántos documentos se guarda el progreso en la BD
+_CADA_PROGRESO = 25
+
+
+def _workers():
+    configurados = settings.DOCUMENTOS_LOTES_WORKERS
+    return configurados if configurados > 0 else (os.cpu_count() or 1)
+
+
+def crear_lote(tipo, filtros, usuario=None):
+    from biblio.models import LotesDocumentos
+
+    lote = LotesDocumentos.objects.create(tipo=tipo, filtros=filtros, usuario=usuario)
+    if settings.DOCUMENTOS_LOTES_EN_PROCESO:
+        transaction.on_commit(lambda: iniciar_en_segundo_plano(lote.id))
+    return lote
+
+
+def _disponibles(reintentar=False):
+    """Pendientes y abandonados; con reintentar, también los que fallaron o siguen en curso."""
+    if reintentar:
+        return Q(estado__in=["pendiente", "procesando", "error"])
+    vencido = timezone.now() - timedelta(minutes=settings.DOCUMENTOS_LOTES_VENCIMIENTO)
+    return Q(estado="pendiente") | Q(estado="procesando", fecha_progreso__lt=vencido)
+
+
+def tomar_lote(reintentar=False, excluir=()):
+    """
+    Marca como "procesando" el lote disponible más antiguo y devuelve su id
+    (None si no hay). El UPDATE condicional evita que dos workers tomen
+    el mismo lote.
+    """
+    from biblio.models import LotesDocumentos
+
+    disponibles = LotesDocumentos.objects.filter(_disponibles(reintentar)).exclude(id__in=excluir)
+    for lote_id in disponibles.order_by("id").values_list("id", flat=True)[:20]:
+        tomado = (
+            LotesDocumentos.objects.filter(_disponibles(reintentar), id=lote_id)
+            .update(estado="procesando", fecha_progreso=timezone.now())
+        )
+        if tomado:
+            return lote_id
+    return None
+
+
+def ids_del_lote(lote):
+    """IDs de ventas / compras que entran en el lote según sus filtros."""
+    from biblio.models import Compras, Ventas
+    from seguridad.documentos import TIPO_FACTURA
+
+    filtros = lote.filtros or {}
+
+    if lote.tipo == TIPO_FACTURA:
+        qs = Ventas.objects.all()
+        campo_fecha = "fecha_venta"
+    else:
+        qs = Compras.objects.all()
+        campo_fecha = "fecha"
+        if filtros.get("proveedor_id"):
+            qs = qs.filter(proveedor_id=filtros["proveedor_id"])
+
+    if filtros.get("ids"):
+        qs = qs.filter(id__in=filtros["ids"])
+    if filtros.get("fecha_desde"):
+        qs = qs.filter(**{f"{campo_fecha}__date__gte": filtros["fecha_desde"]})
+    if filtros.get("fecha_hasta"):
+        qs = qs.filter(**{f"{campo_fecha}__date__lte": filtros["fecha_hasta"]})
+
+    return list(qs.order_by("id").values_list("id", flat=True))
+
+
+# ---------- Funciones que corren en los procesos hijos ----------
+
+def _inicializar_worker():
+    import django
+
+    django.setup()
+
+
+def dibujar_documento(tipo, objeto_id):
+    """Solo dibuja y escribe el archivo; los registros los guarda el proceso principal."""
+    from seguridad import documentos
+
+    return documentos.dibujar_documento(tipo, objeto_id)
+
+
+# ---------- Ejecución ----------
+
+def _nombres_en_zip(tipo, ids):
+    from biblio.models import Compras
+    from seguridad.documentos import TIPO_FACTURA
+
+    if tipo == TIPO_FACTURA:
+        return {objeto_id: f"factura_{objeto_id}.pdf" for objeto_id in ids}
+
+    numeros = dict(
+        Compras.objects.filter(id__in=ids).values_list("id", "numero_factura")
+    )
+    return {
+        objeto_id: f"comprobante_{numeros.get(objeto_id) or objeto_id}.pdf"
+        for objeto_id in ids
+    }
+
+
+def ejecutar_lote(lote_id, workers=None):
+    """workers: procesos para dibujar (None = DOCUMENTOS_LOTES_WORKERS)."""
+    from biblio.models import DocumentosGenerados, LotesDocumentos
+
+    lote = LotesDocumentos.objects.get(id=lote_id)
+    ids = ids_del_lote(lote)
+    nombres = _nombres_en_zip(lote.tipo, ids)
+
+    LotesDocumentos.objects.filter(id=lote.id).update(
+        estado="procesando", total=len(ids), procesados=0, error=None,
+        fecha_progreso=timezone.now(),
+    )
+
+    # Lo que ya está en el almacén no se vuelve a dibujar
+    existentes = dict(
+        DocumentosGenerados.objects
+        .filter(tipo=lote.tipo, objeto_id__in=ids)
+        .values_list("objeto_id", "ruta")
+    )
+    raiz_media = Path(settings.MEDIA_ROOT)
+    faltantes = [
+        objeto_id for objeto_id in ids
+        if objeto_id not in existentes or not (raiz_media / existentes[objeto_id]).exists()
+    ]
+
+    carpeta = Path(settings.DOCUMENTOS_ROOT) / "lotes"
+    carpeta.mkdir(parents=True, exist_ok=True)
+    destino = carpeta / f"lote_{lote.id}.zip"
+
+    fd, temporal = tempfile.mkstemp(dir=carpeta, suffix=".tmp")
+    os.close(fd)
+
+    procesados = 0
+    nuevos = []
+
+    def _avanzar():
+        if nuevos:
+            _registrar(nuevos)
+            nuevos.clear()
+        LotesDocumentos.objects.filter(id=lote.id).update(
+            procesados=procesados, fecha_progreso=timezone.now(),
+        )
+
+    try:
+        # Los PDF ya vienen comprimidos: ZIP_STORED evita gastar CPU en deflate
+        with zipfile.ZipFile(temporal, "w", compression=zipfile.ZIP_STORED) as zf:
+            faltan = set(faltantes)
+            for objeto_id in ids:
+                if objeto_id in faltan:
+                    continue
+                zf.write(raiz_media / existentes[objeto_id], arcname=nombres[objeto_id])
+                procesados += 1
+
+            for registro in _dibujar(lote.tipo, faltantes, workers or _workers()):
+                zf.write(raiz_media / registro.ruta, arcname=nombres[registro.objeto_id])
+                nuevos.append(registro)
+                procesados += 1
+                if procesados % _CADA_PROGRESO == 0:
+                    _avanzar()
+        _avanzar()
+        os.replace(temporal, destino)
+    except Exception as error:
+        if os.path.exists(temporal):
+            os.unlink(temporal)
+        LotesDocumentos.objects.filter(id=lote.id).update(
+            estado="error", error=str(error), fecha_fin=timezone.now(),
+        )
+        raise
+
+    LotesDocumentos.objects.filter(id=lote.id).update(
+        estado="terminado",
+        procesados=len(ids),
+        archivo=Path(os.path.relpath(destino, settings.MEDIA_ROOT)).as_posix(),
+        fecha_fin=timezone.now(),
+    )
+
+
+def _registrar(registros):
+    from biblio import metricas
+    from biblio.models import DocumentosGenerados
+
+    # Se cuenta aquí y no en los hijos del pool: sus contadores se perderían al terminar
+    metricas.contar("pdf_generados", len(registros), tipo=registros[0].tipo)
+
+    DocumentosGenerados.objects.filter(
+        tipo=registros[0].tipo,
+        objeto_id__in=[r.objeto_id for r in registros],
+    ).delete()
+    DocumentosGenerados.objects.bulk_create(registros, ignore_conflicts=True)
+
+
+def _dibujar(tipo, ids, workers):
+    workers = min(workers, len(ids))
+
+    if workers <= 1:
+        for objeto_id in ids:
+            yield dibujar_documento(tipo, objeto_id)
+        return
+
+    # "spawn": el proceso principal puede tener hilos y conexiones
+    # abiertas, hacer fork ahí no es seguro. Cada hijo abre su propia conexión.
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_inicializar_worker,
+    ) as pool:
+        chunksize = max(1, len(ids) // (workers * 8))
+        yield from pool.map(dibujar_documento, repeat(tipo), ids, chunksize=chunksize)
+
+
+def _ejecutar_en_hilo(lote_id):
+    try:
+        # Dentro de un worker web no se abre un pool: serían workers × núcleos procesos
+        ejecutar_lote(lote_id, workers=1)
+    except Exception:
+        logger.exception("Falló el lote de documentos %s", lote_id)
+    finally:
+        connections.close_all()
+
+
+def iniciar_en_segundo_plano(lote_id):
+    """
+    Lanza el lote sin bloquear la petición que lo creó (DOCUMENTOS_LOTES_EN_PROCESO).
+    Si el worker se recicla a mitad, el lote queda sin progreso y
+    procesar_lotes_documentos lo retoma al vencer.
+    """
+    hilo = threading.Thread(
+        target=_ejecutar_en_hilo,
+        args=(lote_id,),
+        name=f"lote-documentos-{lote_id}",
+        daemon=True,
+    )
+    hilo.start()
+    return hilo
@@ -0,0 +1,78 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from seguridad.benchmark import ESCENARIOS, EscenarioFallido, comparar, ejecutar
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide latencia (p50/p95) y consultas de las vistas principales y compara "
+        "contra una base guardada. Sin cambios en la BD: todo se revierte."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iteraciones", type=int, default=20)
+        parser.add_argument("--calentamiento", type=int, default=2, help="Peticiones previas que no se miden.")
+        parser.add_argument(
+            "--escenario", action="append", choices=[e.nombre for e in ESCENARIOS],
+            help="Solo este escenario (se puede repetir).",
+        )
+        parser.add_argument("--salida", help="Archivo JSON donde guardar el resultado.")
+        parser.add_argument("--base", help="JSON de una corrida anterior con el que comparar.")
+        parser.add_argument(
+            "--guardar-base", action="store_true",
+            help="Sobrescribe --base con este resultado en lugar de comparar.",
+        )
+        parser.add_argument(
+            "--tolerancia", type=float, default=0.25,
+            help="Aumento del p95 permitido frente a la base (0.25 = 25%%).",
+        )
+
+    def handle(self, *args, **options):
+        if options["iteraciones"] < 1:
+            raise CommandError("--iteraciones debe ser mayor que cero.")
+        if options["guardar_base"] and not options["base"]:
+            raise CommandError("--guardar-base necesita --base.")
+
+        try:
+            informe = ejecutar(
+                iteraciones=options["iteraciones"],
+                calentamiento=options["calentamiento"],
+                nombres=options["escenario"],
+            )
+        except EscenarioFallido as error:
+            raise CommandError(str(error))
+
+        if informe["debug"]:
+            self.stdout.write(self.style.WARNING("DEBUG=True: los tiempos no son representativos."))
+        self.stdout.write(f"{'escenario':<22}{'p50 ms':>10}{'p95 ms':>10}{'consultas':>11}")
+        for nombre, medida in informe["escenarios"].items():
+            self.stdout.write(
+                f"{nombre:<22}{medida['p50_ms']:>10.2f}{medida['p95_ms']:>10.2f}{medida['consultas']:>11}"
+            )
+
+        contenido = json.dumps(informe, indent=2, ensure_ascii=False)
+        if options["salida"]:
+            Path(options["salida"]).write_text(contenido, encoding="utf-8")
+
+        if not options["base"]:
+            return
+        ruta_base = Path(options["base"])
+        if options["guardar_base"]:
+            ruta_base.parent.mkdir(parents=True, exist_ok=True)
+            ruta_base.write_text(contenido, encoding="utf-8")
+            self.stdout.write(self.style.SUCCESS(f"Base guardada en {ruta_base}."))
+            return
+        if not ruta_base.exists():
+            raise CommandError(f"No existe la base {ruta_base} (créala con --guardar-base).")
+
+        regresiones = comparar(
+            informe, json.loads(ruta_base.read_text(encoding="utf-8")), options["tolerancia"],
+        )
+        if regresiones:
+            for texto in regresiones:
+                self.stderr.write(f"  {texto}")
+            raise CommandError(f"{len(regresiones)} regresión(es) frente a {ruta_base}.")
+        self.stdout.write(self.style.SUCCESS("Sin regresiones frente a la base."))
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from seguridad.datos_sinteticos import generar
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea datos sintéticos (libros, clientes, préstamos, ventas, compras…) "
+        "con popularidad sesgada, para medir rendimiento con volúmenes reales"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--libros", type=int, default=2000)
+        parser.add_argument("--ejemplares-por-libro", type=int, default=2)
+        parser.add_argument("--clientes", type=int, default=1000)
+        parser.add_argument("--prestamos", type=int, default=20000)
+        parser.add_argument("--reservas", type=int, default=2000)
+        parser.add_argument("--ventas", type=int, default=10000)
+        parser.add_argument("--compras", type=int, default=500)
+        parser.add_argument("--solicitudes", type=int, default=200, help="Solicitudes de venta pendientes.")
+        parser.add_argument(
+            "--sesgo", type=float, default=1.1,
+            help="Exponente de Zipf de la popularidad (0 = uniforme, 1.1 = pocos títulos concentran casi todo).",
+        )
+        parser.add_argument("--dias", type=int, default=365, help="Los movimientos se reparten en los últimos N días.")
+        parser.add_argument("--semilla", type=int, default=42)
+        parser.add_argument("--bloque", type=int, default=2000, help="Filas por INSERT.")
+
+    def handle(self, *args, **options):
+        if options["libros"] < 1 or options["clientes"] < 1:
+            raise CommandError("Se necesita al menos un libro y un cliente.")
+        if options["bloque"] < 1:
+            raise CommandError("--bloque debe ser mayor que cero.")
+
+        creados = generar(
+            libros=options["libros"],
+            ejemplares_por_libro=options["ejemplares_por_libro"],
+            clientes=options["clientes"],
+            prestamos=options["prestamos"],
+            reservas=options["reservas"],
+            ventas=options["ventas"],
+            compras=options["compras"],
+            solicitudes=options["solicitudes"],
+            sesgo=options["sesgo"],
+            dias=options["dias"],
+            semilla=options["semilla"],
+            tamano_bloque=options["bloque"],
+        )
+
+        for tabla, filas in creados.items():
+            self.stdout.write(f"  {tabla}: {filas}")
+        self.stdout.write(self.style.SUCCESS(f"Datos generados: {sum(creados.values())} filas."))
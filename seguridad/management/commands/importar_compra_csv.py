@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from biblio.models import Proveedores, Usuarios
+from seguridad.compras import CompraInvalida, importar_csv
+
+
+class Command(BaseCommand):
+    help = "Importa una factura de proveedor desde un CSV (isbn, cantidad, costo_unitario, …)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("archivo", help="Ruta del CSV.")
+        parser.add_argument("--proveedor", required=True, help="RTN o nombre comercial del proveedor.")
+        parser.add_argument("--usuario", required=True, help="Correo del empleado que registra la compra.")
+        parser.add_argument("--metodo-pago", default="Transferencia")
+        parser.add_argument(
+            "--simular",
+            action="store_true",
+            help="Solo valida el archivo e informa qué pasaría; no guarda nada.",
+        )
+
+    def handle(self, *args, **options):
+        proveedor = (
+            Proveedores.objects.filter(rtn=options["proveedor"], estado="activo").first()
+            or Proveedores.objects.filter(nombre_comercial=options["proveedor"], estado="activo").first()
+        )
+        if proveedor is None:
+            raise CommandError("El proveedor indicado no existe o no está activo.")
+
+        usuario = Usuarios.objects.filter(email=options["usuario"]).first()
+        if usuario is None:
+            raise CommandError("No existe un usuario con ese correo.")
+
+        try:
+            with open(options["archivo"], newline="", encoding="utf-8-sig") as archivo:
+                reporte = importar_csv(
+                    archivo, proveedor, usuario, options["metodo_pago"], simular=options["simular"],
+                )
+        except (OSError, CompraInvalida) as error:
+            raise CommandError(str(error))
+
+        for linea, mensaje in reporte.errores:
+            self.stdout.write(self.style.ERROR(f"Línea {linea}: {mensaje}"))
+
+        resumen = (
+            f"{reporte.lineas} líneas, {reporte.lineas_validas} válidas, "
+            f"{reporte.total_errores} con error, {reporte.libros_creados} títulos nuevos, "
+            f"{reporte.unidades} unidades, total L. {reporte.total}"
+        )
+        if reporte.compra:
+            self.stdout.write(self.style.SUCCESS(
+                f"Compra {reporte.compra.numero_factura} registrada: {resumen}"
+            ))
+        elif reporte.total_errores:
+            raise CommandError(f"No se guardó nada: {resumen}")
+        else:
+            self.stdout.write(self.style.WARNING(f"Simulación: {resumen}"))
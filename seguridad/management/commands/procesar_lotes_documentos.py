@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from biblio.models import LotesDocumentos
+from seguridad.lotes import ejecutar_lote, tomar_lote
+
+
+class Command(BaseCommand):
+    help = "Genera los ZIP de los lotes de documentos pendientes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reintentar",
+            action="store_true",
+            help="Incluye lotes con error o que siguen en curso (procesando), una vez cada uno.",
+        )
+        parser.add_argument(
+            "--continuo",
+            action="store_true",
+            help="No termina: espera lotes nuevos (el worker de producción).",
+        )
+        parser.add_argument(
+            "--espera",
+            type=float,
+            default=5,
+            help="Segundos entre revisiones sin lotes en modo --continuo (por defecto 5).",
+        )
+
+    def handle(self, *args, **options):
+        # Con --reintentar un lote que vuelve a fallar no se toma otra vez
+        intentados = set()
+        while True:
+            lote_id = tomar_lote(options["reintentar"], excluir=intentados)
+            if lote_id is None:
+                if not options["continuo"]:
+                    break
+                time.sleep(options["espera"])
+                continue
+
+            if options["reintentar"]:
+                intentados.add(lote_id)
+            try:
+                ejecutar_lote(lote_id)
+            except Exception as error:
+                self.stdout.write(self.style.ERROR(f"Lote {lote_id}: {error}"))
+                continue
+
+            lote = LotesDocumentos.objects.get(id=lote_id)
+            self.stdout.write(self.style.SUCCESS(
+                f"Lote {lote_id}: {lote.total} documentos -> {lote.archivo}"
+            ))
@@ -0,0 +1,30 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from seguridad.resumenes import reconstruir
+
+
+def _fecha(valor):
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise CommandError(f"Fecha inválida: {valor} (usa AAAA-MM-DD)")
+
+
+class Command(BaseCommand):
+    help = "Recalcula los resúmenes diarios y mensuales de ventas a partir de las ventas"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--desde", type=_fecha, help="Primer día a recalcular (AAAA-MM-DD).")
+        parser.add_argument("--hasta", type=_fecha, help="Último día a recalcular (AAAA-MM-DD).")
+
+    def handle(self, *args, **options):
+        desde, hasta = options["desde"], options["hasta"]
+        if desde and hasta and desde > hasta:
+            raise CommandError("--desde no puede ser posterior a --hasta.")
+
+        diarios, mensuales = reconstruir(desde, hasta)
+        self.stdout.write(self.style.SUCCESS(
+            f"Resúmenes reconstruidos: {diarios} filas diarias, {mensuales} mensuales."
+        ))
@@ -0,0 +1,221 @@
+# seguridad/resumenes.py
+"""
+Resúmenes de ventas por día y por mes (fecha × vendedor × método de pago ×
+categoría).
+
+facturar_solicitudes llama a registrar_ventas dentro de su transacción, así
+los totales del historial y del panel se leen de unas pocas filas en vez de
+recorrer toda la tabla de ventas. Si algo se desalinea (ventas cargadas a
+mano, migraciones de datos…) se reconstruyen con
+`manage.py reconstruir_resumen_ventas`.
+"""
+from datetime import date
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from biblio.models import DetalleVenta, ResumenVentasDiario, ResumenVentasMensual, Ventas
+
+_MEDIDAS = ("num_ventas", "unidades", "total")
+
+# Claves por SELECT … FOR UPDATE: el OR de todas las de un bloque de
+# reconstruir() pasa el límite de profundidad de expresiones de SQLite (1000)
+CLAVES_POR_CONSULTA = 200
+
+
+def _fecha_local(momento):
+    if timezone.is_aware(momento):
+        momento = timezone.localtime(momento)
+    return momento.date()
+
+
+def _acumular(pares):
+    """
+    pares: iterable de (venta, detalles). Devuelve
+    {(fecha, vendedor_id, metodo_pago, categoria): [num_ventas, unidades, total]}.
+    """
+    acumulado = {}
+
+    def _sumar(clave, ventas, unidades, total):
+        fila = acumulado.setdefault(clave, [0, 0, Decimal("0.00")])
+        fila[0] += ventas
+        fila[1] += unidades
+        fila[2] += total
+
+    for venta, detalles in pares:
+        fecha = _fecha_local(venta.fecha_venta)
+        base = (fecha, venta.vendedor_id, venta.metodo_pago or "")
+
+        if not detalles:
+            _sumar(base + ("",), 1, 0, venta.total or Decimal("0.00"))
+            continue
+
+        for i, detalle in enumerate(detalles):
+            categoria = detalle.libro.categoria or ""
+            _sumar(
+                base + (categoria,),
+                1 if i == 0 else 0,
+                detalle.cantidad or 0,
+                detalle.total_linea or Decimal("0.00"),
+            )
+
+    return acumulado
+
+
+def _por_mes(acumulado):
+    meses = {}
+    for (fecha, vendedor_id, metodo_pago, categoria), valores in acumulado.items():
+        clave = (fecha.replace(day=1), vendedor_id, metodo_pago, categoria)
+        fila = meses.setdefault(clave, [0, 0, Decimal("0.00")])
+        for i, valor in enumerate(valores):
+            fila[i] += valor
+    return meses
+
+
+def _incrementar(modelo, campo_fecha, acumulado):
+    """
+    Suma los valores a las filas existentes. Son tres consultas (INSERT …
+    IGNORE de las claves que falten, SELECT … FOR UPDATE y un UPDATE
+    masivo) por cada CLAVES_POR_CONSULTA claves, no por venta.
+    """
+    claves = list(acumulado)
+    for i in range(0, len(claves), CLAVES_POR_CONSULTA):
+        _incrementar_claves(modelo, campo_fecha, acumulado, claves[i:i + CLAVES_POR_CONSULTA])
+
+
+def _incrementar_claves(modelo, campo_fecha, acumulado, claves):
+    def _clave(fila):
+        return (getattr(fila, campo_fecha), fila.vendedor_id, fila.metodo_pago, fila.categoria)
+
+    # Si otra transacción crea la misma clave a la vez, el INSERT espera a
+    # que termine y la ignora; el SELECT FOR UPDATE ya ve su fila.
+    modelo.objects.bulk_create(
+        [
+            modelo(**{campo_fecha: fecha}, vendedor_id=vendedor_id,
+                   metodo_pago=metodo_pago, categoria=categoria)
+            for fecha, vendedor_id, metodo_pago, categoria in claves
+        ],
+        ignore_conflicts=True,
+    )
+
+    filtro = reduce(or_, (
+        Q(**{campo_fecha: fecha}, vendedor_id=vendedor_id,
+          metodo_pago=metodo_pago, categoria=categoria)
+        for fecha, vendedor_id, metodo_pago, categoria in claves
+    ))
+    filas = list(modelo.objects.select_for_update().filter(filtro))
+
+    for fila in filas:
+        num_ventas, unidades, total = acumulado[_clave(fila)]
+        fila.num_ventas += num_ventas
+        fila.unidades += unidades
+        fila.total += total
+
+    modelo.objects.bulk_update(filas, _MEDIDAS)
+
+
+def registrar_ventas(pares):
+    """
+    Suma a los resúmenes las ventas recién creadas. Debe llamarse dentro de
+    la transacción de la venta.
+
+    pares: iterable de (venta, [detalles]) con detalle.libro cargado.
+    """
+    diario = _acumular(pares)
+    _incrementar(ResumenVentasDiario, "fecha", diario)
+    _incrementar(ResumenVentasMensual, "mes", _por_mes(diario))
+
+
+def reconstruir(desde=None, hasta=None, tamano_bloque=2000):
+    """
+    Recalcula los resúmenes diarios del rango [desde, hasta] (ambos
+    opcionales) a partir de las ventas, y luego los meses que toca ese rango
+    a partir de los diarios. Devuelve (filas_diarias, filas_mensuales).
+    """
+    ventas = Ventas.objects.order_by("id")
+    diarios = ResumenVentasDiario.objects.all()
+    if desde:
+        ventas = ventas.filter(fecha_venta__date__gte=desde)
+        diarios = diarios.filter(fecha__gte=desde)
+    if hasta:
+        ventas = ventas.filter(fecha_venta__date__lte=hasta)
+        diarios = diarios.filter(fecha__lte=hasta)
+
+    with transaction.atomic():
+        diarios.delete()
+
+        ultimo_id = 0
+        while True:
+            bloque = list(
+                ventas.filter(id__gt=ultimo_id)
+                .only("id", "fecha_venta", "vendedor_id", "metodo_pago", "total")[:tamano_bloque]
+            )
+            if not bloque:
+                break
+            ultimo_id = bloque[-1].id
+
+            detalles = {}
+            for detalle in (
+                DetalleVenta.objects
+                .filter(venta_id__in=[v.id for v in bloque])
+                .select_related("libro")
+                .only("venta_id", "cantidad", "total_linea", "libro__categoria")
+                .order_by("id")
+            ):
+                detalles.setdefault(detalle.venta_id, []).append(detalle)
+
+            acumulado = _acumular((v, detalles.get(v.id, [])) for v in bloque)
+            _incrementar(ResumenVentasDiario, "fecha", acumulado)
+
+        mensuales = _reconstruir_meses(desde, hasta)
+
+    return diarios.count(), mensuales
+
+
+def _reconstruir_meses(desde, hasta):
+    meses = ResumenVentasMensual.objects.all()
+    diarios = ResumenVentasDiario.objects.all()
+    if desde:
+        inicio = desde.replace(day=1)
+        meses = meses.filter(mes__gte=inicio)
+        diarios = diarios.filter(fecha__gte=inicio)
+    if hasta:
+        meses = meses.filter(mes__lte=hasta)
+        siguiente = (
+            date(hasta.year + 1, 1, 1) if hasta.month == 12
+            else date(hasta.year, hasta.month + 1, 1)
+        )
+        diarios = diarios.filter(fecha__lt=siguiente)
+
+    meses.delete()
+
+    acumulado = {
+        (fecha, vendedor_id, metodo_pago, categoria): [num_ventas, unidades, total]
+        for fecha, vendedor_id, metodo_pago, categoria, num_ventas, unidades, total in (
+            diarios.values_list("fecha", "vendedor_id", "metodo_pago", "categoria", *_MEDIDAS)
+            .iterator()
+        )
+    }
+
+    por_mes = _por_mes(acumulado)
+    ResumenVentasMensual.objects.bulk_create(
+        [
+            ResumenVentasMensual(
+                mes=mes, vendedor_id=vendedor_id, metodo_pago=metodo_pago, categoria=categoria,
+                num_ventas=num_ventas, unidades=unidades, total=total,
+            )
+            for (mes, vendedor_id, metodo_pago, categoria), (num_ventas, unidades, total) in por_mes.items()
+        ],
+        batch_size=1000,
+    )
+    return len(por_mes)
+
+
+def totales(**filtros):
+    """(num_ventas, total) leído de los resúmenes mensuales."""
+    datos = ResumenVentasMensual.objects.filter(**filtros).aggregate(v=Sum("num_ventas"), t=Sum("total"))
+    return datos["v"] or 0, datos["t"] or Decimal("0.00")
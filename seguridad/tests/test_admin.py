@@ -0,0 +1,98 @@
+# seguridad/tests/test_admin.py
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from biblio.models import Bitacora, Ejemplares, Prestamos
+
+from .utilidades import crear_cliente, crear_empleado, crear_libro
+
+
+class AdminTablasGrandesTests(TestCase):
+    def setUp(self):
+        self.client.force_login(
+            User.objects.create_superuser("root", "root@biblionet.test", "x")
+        )
+        self.empleado = crear_empleado("bibliotecario")
+        self.siguiente = 0
+
+    def _crear_prestamos(self, cantidad):
+        for _ in range(cantidad):
+            self.siguiente += 1
+            libro = crear_libro(isbn=f"97800000{self.siguiente:05d}")
+            ejemplar = Ejemplares.objects.create(
+                libro=libro, codigo_interno=f"EJ-{self.siguiente}", estado="prestado",
+            )
+            Prestamos.objects.create(
+                cliente=crear_cliente(dni=f"0801{self.siguiente:09d}"),
+                ejemplar=ejemplar,
+                fecha_inicio=date.today(),
+                fecha_fin=date.today() + timedelta(days=7),
+                estado="activo",
+            )
+
+    def _consultas(self, nombre_url):
+        with CaptureQueriesContext(connection) as consultas:
+            res = self.client.get(reverse(nombre_url))
+        self.assertEqual(res.status_code, 200)
+        return len(consultas.captured_queries)
+
+    def test_listados_sin_consultas_por_fila(self):
+        for nombre_url in (
+            "admin:biblio_prestamos_changelist",
+            "admin:biblio_ejemplares_changelist",
+            "admin:biblio_clientes_changelist",
+        ):
+            self._crear_prestamos(2)
+            pocas = self._consultas(nombre_url)
+            self._crear_prestamos(8)
+            muchas = self._consultas(nombre_url)
+
+            self.assertEqual(pocas, muchas, nombre_url)
+
+    def test_formulario_de_prestamo_no_lista_todos_los_clientes(self):
+        self._crear_prestamos(3)
+
+        res = self.client.get(reverse("admin:biblio_prestamos_add"))
+
+        self.assertEqual(res.status_code, 200)
+        # autocomplete: el <select> solo trae la opción vacía
+        self.assertNotContains(res, "EJ-1 -")
+
+    def test_filtro_de_prestamos_solo_ofrece_sus_estados(self):
+        self._crear_prestamos(1)
+
+        res = self.client.get(reverse("admin:biblio_prestamos_changelist"), {"estado": "activo"})
+
+        self.assertContains(res, "?estado=devuelto")
+        self.assertNotContains(res, "?estado=terminado")
+
+    def test_bitacora_es_solo_lectura(self):
+        entrada = Bitacora.objects.create(usuario=self.empleado, accion="x", codigo="cliente.bloqueado")
+
+        res = self.client.get(
+            reverse("admin:biblio_bitacora_changelist"), {"codigo": "cliente.bloqueado"}
+        )
+
+        self.assertContains(res, f">{entrada.id}<")
+        self.assertEqual(
+            self.client.get(reverse("admin:biblio_bitacora_add")).status_code, 403
+        )
+
+    def test_bitacora_no_se_borra(self):
+        entrada = Bitacora.objects.create(usuario=self.empleado, accion="x", codigo="cliente.bloqueado")
+        url = reverse("admin:biblio_bitacora_changelist")
+
+        self.assertNotContains(self.client.get(url), 'value="delete_selected"')
+        self.assertNotContains(
+            self.client.get(reverse("admin:biblio_bitacoraarchivo_changelist")), 'value="delete_selected"'
+        )
+        res = self.client.post(reverse("admin:biblio_bitacora_delete", args=[entrada.id]), {"post": "yes"})
+        self.assertEqual(res.status_code, 403)
+        self.client.post(url, {"action": "delete_selected", "_selected_action": [entrada.id], "post": "yes"})
+
+        self.assertTrue(Bitacora.objects.filter(id=entrada.id).exists())
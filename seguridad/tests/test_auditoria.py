@@ -0,0 +1,130 @@
+# seguridad/tests/test_auditoria.py
+import io
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from biblio import auditoria
+from biblio.models import Bitacora, BitacoraArchivo
+
+from .utilidades import crear_empleado
+
+
+class AuditoriaTests(TestCase):
+    def setUp(self):
+        self.empleado = crear_empleado("bibliotecario")
+
+    def test_duradero_se_guarda_en_la_transaccion(self):
+        with transaction.atomic():
+            auditoria.registrar(self.empleado, "REGISTRÓ COMPRA id=1", duradero=True)
+            self.assertEqual(Bitacora.objects.count(), 1)
+
+    def test_se_guarda_al_confirmar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            auditoria.registrar(self.empleado.id, "BLOQUEÓ CLIENTE ID=3")
+            self.assertFalse(Bitacora.objects.exists())
+
+        entrada = Bitacora.objects.get()
+        self.assertEqual(entrada.usuario_id, self.empleado.id)
+        self.assertIsNotNone(entrada.fecha)
+
+    def test_se_descarta_si_la_transaccion_se_deshace(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    auditoria.registrar(self.empleado, "RENOVÓ PRÉSTAMO id=1")
+                    raise ValueError
+            except ValueError:
+                pass
+
+        auditoria.vaciar()
+        self.assertFalse(Bitacora.objects.exists())
+
+    def test_middleware_guarda_la_peticion_con_un_insert(self):
+        def vista(request):
+            with self.captureOnCommitCallbacks(execute=True):
+                for i in range(3):
+                    auditoria.registrar(self.empleado, f"ACCIÓN {i}")
+            self.assertFalse(Bitacora.objects.exists())
+            return HttpResponse("ok")
+
+        middleware = auditoria.AuditoriaMiddleware(vista)
+        with CaptureQueriesContext(connection) as consultas:
+            middleware(RequestFactory().get("/"))
+
+        inserts = [q for q in consultas.captured_queries if q["sql"].startswith('INSERT INTO "bitacora"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(Bitacora.objects.count(), 3)
+
+    def test_accion_larga_se_recorta(self):
+        entrada = auditoria.entrada(None, "x" * 400)
+
+        self.assertEqual(len(entrada.accion), 255)
+
+
+class BitacoraEstructuradaTests(TestCase):
+    def setUp(self):
+        self.empleado = crear_empleado("bibliotecario")
+
+    def _entrada(self, dias, entidad_id=1):
+        return Bitacora.objects.create(
+            usuario=self.empleado,
+            accion=f"RENOVÓ PRÉSTAMO id={entidad_id}",
+            fecha=timezone.now() - timedelta(days=dias),
+            codigo="prestamo.renovado",
+            entidad="prestamo",
+            entidad_id=entidad_id,
+        )
+
+    def test_guarda_campos_estructurados(self):
+        auditoria.registrar(
+            self.empleado,
+            "RENOVÓ PRÉSTAMO id=9",
+            codigo="prestamo.renovado",
+            entidad="prestamo",
+            entidad_id=9,
+            datos={"nueva_fecha": "2026-01-31"},
+            duradero=True,
+        )
+
+        entrada = Bitacora.objects.get(entidad="prestamo", entidad_id=9)
+        self.assertEqual(entrada.codigo, "prestamo.renovado")
+        self.assertEqual(entrada.datos, {"nueva_fecha": "2026-01-31"})
+
+    def test_archivar_mueve_solo_lo_anterior_al_corte(self):
+        viejas = [self._entrada(400), self._entrada(390)]
+        reciente = self._entrada(1)
+
+        movidas = auditoria.archivar(timezone.now() - timedelta(days=365), tamano_bloque=1)
+
+        self.assertEqual(movidas, 2)
+        self.assertEqual(list(Bitacora.objects.values_list("id", flat=True)), [reciente.id])
+        self.assertEqual(
+            sorted(BitacoraArchivo.objects.values_list("id", flat=True)),
+            [e.id for e in viejas],
+        )
+
+    def test_historial_une_tabla_y_archivo(self):
+        self._entrada(400)
+        self._entrada(1)
+        self._entrada(1, entidad_id=2)
+        auditoria.archivar(timezone.now() - timedelta(days=365))
+
+        historial = list(auditoria.historial_entidad("prestamo", 1))
+
+        self.assertEqual(len(historial), 2)
+        self.assertGreater(historial[0]["fecha"], historial[1]["fecha"])
+
+    def test_comando_rotar_bitacora(self):
+        self._entrada(800)
+        self._entrada(5)
+
+        call_command("rotar_bitacora", "--meses", "12", "--purgar-anios", "1", stdout=io.StringIO())
+
+        self.assertEqual(Bitacora.objects.count(), 1)
+        self.assertFalse(BitacoraArchivo.objects.exists())
@@ -0,0 +1,104 @@
+# seguridad/tests/test_benchmark.py
+import io
+import json
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Sum
+from django.test import TestCase
+
+from biblio.models import (
+    Clientes,
+    DetalleVenta,
+    Libros,
+    Prestamos,
+    ResumenVentasDiario,
+    SolicitudVenta,
+    Ventas,
+)
+from seguridad import benchmark
+from seguridad.datos_sinteticos import generar
+
+VOLUMEN = dict(
+    libros=40, ejemplares_por_libro=2, clientes=15, prestamos=300, reservas=20,
+    ventas=60, compras=5, solicitudes=5,
+)
+
+
+class GenerarDatosTests(TestCase):
+    def test_crea_los_volumenes_pedidos(self):
+        creados = generar(**VOLUMEN)
+
+        self.assertEqual(Libros.objects.count(), 40)
+        self.assertEqual(Clientes.objects.count(), 15)
+        self.assertEqual(Ventas.objects.count(), 60)
+        self.assertEqual(creados["ejemplares"], 80)
+        self.assertTrue(DetalleVenta.objects.exists())
+        self.assertEqual(SolicitudVenta.objects.filter(estado="pendiente").count(), 5)
+        # Las ventas quedan también en los resúmenes
+        self.assertTrue(ResumenVentasDiario.objects.exists())
+
+    def test_resumenes_con_mas_de_mil_claves(self):
+        # Un bloque de reconstruir() con más claves que la profundidad
+        # máxima de una expresión en SQLite
+        generar(**{**VOLUMEN, "ventas": 1500})
+
+        self.assertGreater(ResumenVentasDiario.objects.count(), 1000)
+        self.assertEqual(ResumenVentasDiario.objects.aggregate(n=Sum("num_ventas"))["n"], 1500)
+
+    def test_popularidad_sesgada(self):
+        generar(**VOLUMEN)
+
+        por_libro = Counter(Prestamos.objects.values_list("ejemplar__libro_id", flat=True))
+        mas_prestado = por_libro.most_common(1)[0][1]
+
+        # Uniforme serían ~7 préstamos por libro
+        self.assertGreater(mas_prestado, 300 / 40 * 4)
+
+    def test_se_puede_correr_dos_veces(self):
+        generar(**VOLUMEN)
+        generar(**VOLUMEN)
+
+        self.assertEqual(Libros.objects.count(), 80)
+
+
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        generar(**VOLUMEN)
+
+    def test_mide_todos_los_escenarios_sin_dejar_cambios(self):
+        ventas = Ventas.objects.count()
+
+        informe = benchmark.ejecutar(iteraciones=2, calentamiento=0)
+
+        self.assertEqual(set(informe["escenarios"]), {e.nombre for e in benchmark.ESCENARIOS})
+        for medida in informe["escenarios"].values():
+            self.assertGreater(medida["consultas"], 0)
+        self.assertEqual(Ventas.objects.count(), ventas)
+        self.assertEqual(SolicitudVenta.objects.filter(estado="pendiente").count(), 5)
+
+    def test_comparar_detecta_regresiones(self):
+        base = {"escenarios": {"catalogo": {"p95_ms": 10.0, "consultas": 3}}}
+
+        self.assertEqual(
+            benchmark.comparar({"escenarios": {"catalogo": {"p95_ms": 12.0, "consultas": 3}}}, base), []
+        )
+        self.assertEqual(
+            len(benchmark.comparar({"escenarios": {"catalogo": {"p95_ms": 40.0, "consultas": 4}}}, base)), 2
+        )
+
+    def test_comando_falla_con_regresion(self):
+        with tempfile.TemporaryDirectory() as carpeta:
+            ruta = Path(carpeta) / "base.json"
+            ruta.write_text(json.dumps(
+                {"escenarios": {"catalogo": {"p95_ms": 10_000.0, "consultas": 0}}}
+            ))
+
+            with self.assertRaisesMessage(CommandError, "regresión"):
+                call_command(
+                    "benchmark", "--escenario", "catalogo", "--iteraciones", "1",
+                    "--base", str(ruta), stdout=io.StringIO(), stderr=io.StringIO(),
+                )
@@ -0,0 +1,100 @@
+# seguridad/tests/test_bitacora.py
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from biblio.models import Bitacora, BitacoraArchivo
+from seguridad import views
+
+from .utilidades import crear_empleado, iniciar_sesion_empleado
+
+
+class NavegadorBitacoraTests(TestCase):
+    def setUp(self):
+        self.admin = crear_empleado("administrador")
+        self.bibliotecario = crear_empleado("bibliotecario")
+        iniciar_sesion_empleado(self.client, self.admin)
+
+        ahora = timezone.now()
+        # Varias entradas con la misma fecha: el cursor desempata por id
+        self.entradas = [
+            Bitacora.objects.create(
+                usuario=self.bibliotecario if i % 2 else self.admin,
+                accion=f"RENOVÓ PRÉSTAMO id={i}",
+                fecha=ahora - timedelta(minutes=i // 2),
+                codigo="prestamo.renovado" if i % 2 else "cliente.bloqueado",
+                entidad="prestamo" if i % 2 else "cliente",
+                entidad_id=i,
+            )
+            for i in range(7)
+        ]
+
+        original = views.TAMANO_PAGINA_BITACORA
+        views.TAMANO_PAGINA_BITACORA = 3
+        self.addCleanup(setattr, views, "TAMANO_PAGINA_BITACORA", original)
+
+    def _recorrer(self, **filtros):
+        vistas = []
+        res = self.client.get(reverse("bitacora"), filtros)
+        while True:
+            self.assertEqual(res.status_code, 200)
+            vistas.extend(e.id for e in res.context["entradas"])
+            if not res.context["siguiente"]:
+                return vistas
+            res = self.client.get(reverse("bitacora") + "?" + res.context["siguiente"])
+
+    def test_cursor_recorre_todo_sin_repetir(self):
+        esperado = [
+            e.id for e in sorted(self.entradas, key=lambda e: (e.fecha, e.id), reverse=True)
+        ]
+
+        self.assertEqual(self._recorrer(), esperado)
+
+    def test_filtros_se_conservan_entre_paginas(self):
+        vistas = self._recorrer(usuario=self.bibliotecario.id, codigo="prestamo.renovado")
+
+        self.assertEqual(
+            sorted(vistas),
+            sorted(e.id for e in self.entradas if e.usuario_id == self.bibliotecario.id),
+        )
+
+    def test_filtra_por_entidad(self):
+        res = self.client.get(reverse("bitacora"), {"entidad": "prestamo", "entidad_id": 3})
+
+        self.assertEqual([e.entidad_id for e in res.context["entradas"]], [3])
+
+    def test_no_cuenta_filas(self):
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(reverse("bitacora"))
+
+        self.assertFalse(
+            [q for q in consultas.captured_queries if "COUNT(" in q["sql"].upper()]
+        )
+
+    def test_busca_en_el_archivo(self):
+        BitacoraArchivo.objects.create(
+            id=999, accion="vieja", fecha=timezone.now() - timedelta(days=900),
+        )
+
+        res = self.client.get(reverse("bitacora"), {"archivo": "1"})
+
+        self.assertEqual([e.id for e in res.context["entradas"]], [999])
+
+    def test_exportar_respeta_filtros(self):
+        res = self.client.get(
+            reverse("exportar_bitacora"), {"codigo": "cliente.bloqueado", "formato": "csv"}
+        )
+
+        filas = b"".join(res.streaming_content).decode("utf-8-sig").strip().splitlines()
+        self.assertEqual(len(filas) - 1, 4)
+
+    def test_solo_administrador(self):
+        iniciar_sesion_empleado(self.client, self.bibliotecario)
+
+        res = self.client.get(reverse("bitacora"))
+
+        self.assertNotEqual(res.status_code, 200)
@@ -0,0 +1,20 @@
+# seguridad/tests/test_catalogo_publico.py
+from django.test import TestCase
+
+from biblio.models import CatalogoPublico, Ejemplares
+
+from .utilidades import crear_libro
+
+
+class CatalogoPublicoTests(TestCase):
+    def test_la_vista_cuenta_ejemplares_por_libro(self):
+        libro = crear_libro()
+        sin_ejemplares = crear_libro(isbn="9780000000002")
+        for i, estado in enumerate(("disponible", "disponible", "prestado")):
+            Ejemplares.objects.create(libro=libro, codigo_interno=f"EJ-{i}", estado=estado)
+
+        fila = CatalogoPublico.objects.get(id_libro=libro.id)
+        vacia = CatalogoPublico.objects.get(id_libro=sin_ejemplares.id)
+
+        self.assertEqual((fila.titulo, fila.total_ejemplares, fila.disponibles), (libro.titulo, 3, 2))
+        self.assertEqual(vacia.total_ejemplares, 0)
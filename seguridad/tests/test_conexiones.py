@@ -0,0 +1,57 @@
+# seguridad/tests/test_conexiones.py
+from unittest import mock
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.test import TestCase
+from django.urls import reverse
+
+from biblio import metricas
+from biblio.bd import ConexionMedida
+
+
+def _contador(resultado):
+    return metricas._almacen.copia().get(
+        ("bd_conexiones", (("alias", DEFAULT_DB_ALIAS), ("resultado", resultado))), 0
+    )
+
+
+class ConexionesMedidasTests(TestCase):
+    def setUp(self):
+        metricas._almacen._reiniciar()
+        self.addCleanup(metricas._almacen._reiniciar)
+
+    def _nueva(self):
+        # Otra conexión al mismo alias, sin tocar la del test (BD en memoria)
+        conexion = connections.create_connection(DEFAULT_DB_ALIAS)
+        self.addCleanup(BaseDatabaseWrapper.close, conexion)
+        return conexion
+
+    def test_el_backend_es_el_medido(self):
+        self.assertIsInstance(connections[DEFAULT_DB_ALIAS], ConexionMedida)
+
+    def test_cuenta_las_conexiones_abiertas_y_su_duracion(self):
+        self._nueva().ensure_connection()
+
+        self.assertEqual(_contador("abierta"), 1)
+        self.assertIn("biblionet_bd_conexion_segundos_count", metricas.exposicion())
+
+    def test_cuenta_las_fallidas(self):
+        conexion = self._nueva()
+        error = OperationalError("sin servidor")
+
+        with mock.patch.object(type(conexion), "get_new_connection", side_effect=error):
+            with self.assertRaises(OperationalError):
+                conexion.ensure_connection()
+
+        self.assertEqual(_contador("fallida"), 1)
+        self.assertEqual(_contador("abierta"), 0)
+
+    def test_peticion_con_la_conexion_ya_abierta_cuenta_como_reutilizada(self):
+        connection.ensure_connection()
+
+        self.client.get(reverse("salud_vivo"))
+        self.client.get(reverse("salud_vivo"))
+
+        self.assertEqual(_contador("reutilizada"), 2)
+        self.assertEqual(_contador("abierta"), 0)
@@ -0,0 +1,115 @@
+# seguridad/tests/test_consultas_listados.py
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from biblio.models import Compras, DetalleCompras
+
+from .utilidades import (
+    crear_cliente,
+    crear_empleado,
+    crear_libro,
+    crear_proveedor,
+    crear_venta,
+    iniciar_sesion_empleado,
+)
+
+
+class HistorialComprasClienteTests(TestCase):
+    def setUp(self):
+        self.cliente = crear_cliente()
+        self.vendedor = crear_empleado("bibliotecario")
+        self.siguiente = 0
+
+        session = self.client.session
+        session["cliente_id"] = self.cliente.id
+        session.save()
+
+    def _crear_ventas(self, cantidad):
+        for _ in range(cantidad):
+            self.siguiente += 1
+            crear_venta(self.cliente, self.vendedor, crear_libro(isbn=f"97800000{self.siguiente:05d}"))
+
+    def _consultas(self):
+        with CaptureQueriesContext(connection) as consultas:
+            res = self.client.get(reverse("historial_compras_cliente"))
+        self.assertEqual(res.status_code, 200)
+        return res, len(consultas.captured_queries)
+
+    def test_consultas_constantes_por_pagina(self):
+        self._crear_ventas(1)
+        _, pocas = self._consultas()
+        self._crear_ventas(9)
+        res, muchas = self._consultas()
+
+        self.assertEqual(pocas, muchas)
+        self.assertEqual(len(res.context["page_obj"]), 10)
+
+    def test_muestra_los_libros_de_cada_venta(self):
+        self._crear_ventas(2)
+
+        res, _ = self._consultas()
+
+        self.assertContains(res, "Libro 9780000000001 (x1)")
+        self.assertNotContains(res, "Sin detalle")
+
+
+class GestionComprasTests(TestCase):
+    def setUp(self):
+        self.empleado = crear_empleado("administrador")
+        self.proveedor = crear_proveedor()
+        self.siguiente = 0
+        iniciar_sesion_empleado(self.client, self.empleado)
+
+    def _crear_compras(self, cantidad):
+        for _ in range(cantidad):
+            self.siguiente += 1
+            compra = Compras.objects.create(
+                proveedor=self.proveedor,
+                usuario=self.empleado,
+                numero_factura=f"FAC-{self.siguiente}",
+                fecha=timezone.now(),
+                total=Decimal("100.00"),
+                metodo_pago="Efectivo",
+            )
+            for i in range(2):
+                DetalleCompras.objects.create(
+                    compra=compra,
+                    libro=crear_libro(isbn=f"9781{self.siguiente:05d}{i:04d}"),
+                    cantidad=1,
+                    costo_unitario=Decimal("50.00"),
+                    subtotal=Decimal("50.00"),
+                )
+
+    def _consultas(self):
+        with CaptureQueriesContext(connection) as consultas:
+            res = self.client.get(reverse("gestion_compras"))
+        self.assertEqual(res.status_code, 200)
+        return res, len(consultas.captured_queries)
+
+    def test_consultas_constantes_por_pagina(self):
+        self._crear_compras(1)
+        _, pocas = self._consultas()
+        self._crear_compras(9)
+        res, muchas = self._consultas()
+
+        self.assertEqual(pocas, muchas)
+        self.assertEqual(len(res.context["compras"]), 10)
+
+    def test_solo_precarga_detalles_de_la_pagina(self):
+        self._crear_compras(12)
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(reverse("gestion_compras"))
+
+        detalles = [
+            q["sql"] for q in consultas.captured_queries
+            if 'FROM "detalle_compras"' in q["sql"]
+        ]
+        self.assertEqual(len(detalles), 1)
+        ids = detalles[0].split(" IN (")[1].split(")")[0]
+        self.assertEqual(len(ids.split(",")), 10)
@@ -0,0 +1,115 @@
+# seguridad/tests/test_documentos.py
+import shutil
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from biblio.models import DocumentosGenerados, SolicitudVenta, Ventas
+from seguridad import documentos
+from seguridad.compras import LineaCompra, registrar_compra
+
+from .utilidades import (
+    crear_cliente,
+    crear_empleado,
+    crear_libro,
+    crear_proveedor,
+    crear_venta,
+    iniciar_sesion_empleado,
+)
+
+
+class AlmacenDocumentosTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(
+            MEDIA_ROOT=self.media,
+            DOCUMENTOS_ROOT=Path(self.media) / "documentos",
+            DOCUMENTOS_SENDFILE="",
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.vendedor = crear_empleado("bibliotecario")
+        self.cliente = crear_cliente()
+        self.libro = crear_libro()
+
+    def test_factura_se_dibuja_una_sola_vez(self):
+        venta = crear_venta(self.cliente, self.vendedor, self.libro)
+
+        primero = documentos.documento_factura(venta.id)
+        ruta = documentos.ruta_absoluta(primero)
+        self.assertTrue(ruta.exists())
+        self.assertEqual(ruta.stem, primero.sha256)
+
+        with self.assertNumQueries(1):
+            segundo = documentos.documento_factura(venta.id)
+        self.assertEqual(primero.pk, segundo.pk)
+
+    def test_facturar_solicitud_guarda_y_sirve_el_archivo(self):
+        iniciar_sesion_empleado(self.client, self.vendedor)
+        solicitud = SolicitudVenta.objects.create(
+            cliente=self.cliente, libro=self.libro, cantidad=1,
+        )
+
+        res = self.client.post(
+            reverse("facturar_solicitud", args=[solicitud.id]),
+            {"metodo_pago": "Tarjeta"},
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res["Content-Type"], "application/pdf")
+        contenido = b"".join(res.streaming_content)
+        self.assertTrue(contenido.startswith(b"%PDF"))
+
+        venta = Ventas.objects.get()
+        registro = DocumentosGenerados.objects.get(tipo="factura", objeto_id=venta.id)
+        self.assertEqual(registro.tamano, len(contenido))
+
+        reimpresion = self.client.get(reverse("factura_venta_pdf", args=[venta.id]))
+        self.assertEqual(b"".join(reimpresion.streaming_content), contenido)
+
+    def test_x_accel_redirect(self):
+        venta = crear_venta(self.cliente, self.vendedor, self.libro)
+        iniciar_sesion_empleado(self.client, self.vendedor)
+
+        with override_settings(
+            DOCUMENTOS_SENDFILE="x-accel-redirect",
+            DOCUMENTOS_ACCEL_PREFIX="/interno/",
+        ):
+            res = self.client.get(reverse("factura_venta_pdf", args=[venta.id]))
+
+        registro = DocumentosGenerados.objects.get(tipo="factura", objeto_id=venta.id)
+        self.assertEqual(res["X-Accel-Redirect"], f"/interno/{registro.ruta}")
+        self.assertEqual(res.content, b"")
+
+    def test_editar_compra_vuelve_a_dibujar_el_comprobante(self):
+        admin = crear_empleado("administrador")
+        alfa = crear_proveedor(rtn="08011999000011")
+        beta = crear_proveedor(rtn="08011999000022")
+        compra = registrar_compra(
+            alfa, admin, "Efectivo",
+            [LineaCompra(libro_id=self.libro.id, cantidad=2, costo_unitario=Decimal("10"))],
+        )
+        iniciar_sesion_empleado(self.client, admin)
+        url = reverse("comprobante_compra_pdf", args=[compra.id])
+
+        # Sin compresión el texto del PDF se puede buscar tal cual
+        with mock.patch("reportlab.rl_config.pageCompression", 0):
+            antes = b"".join(self.client.get(url).streaming_content)
+            self.client.post(reverse("gestion_compras"), {
+                "editar_compra": "1",
+                "compra_id": compra.id,
+                "proveedor_nombre": beta.nombre_comercial,
+                "metodo_pago": "Tarjeta",
+            })
+            despues = b"".join(self.client.get(url).streaming_content)
+
+        self.assertIn(alfa.nombre_comercial.encode(), antes)
+        self.assertIn(beta.nombre_comercial.encode(), despues)
+        self.assertNotIn(alfa.nombre_comercial.encode(), despues)
+        self.assertEqual(DocumentosGenerados.objects.filter(objeto_id=compra.id).count(), 1)
+        self.assertEqual(len(list(Path(self.media, "documentos").rglob("*.pdf"))), 1)
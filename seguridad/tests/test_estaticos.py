@@ -0,0 +1,106 @@
+# seguridad/tests/test_estaticos.py
+import gzip
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.templatetags.static import static
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from biblio.estaticos import EstaticosMiddleware, elegir_codificacion, minificar_css
+
+ALMACEN = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "biblio.estaticos.AlmacenEstaticos"},
+}
+
+
+class MinificarCssTests(SimpleTestCase):
+    def test_quita_comentarios_y_espacios(self):
+        css = "/* titulo */\n.a  >  b {\n    color : red ;\n    margin: 0 auto;\n}\n"
+
+        self.assertEqual(minificar_css(css), ".a > b{color :red;margin:0 auto}")
+
+    def test_no_toca_cadenas_ni_pseudoclases_de_descendiente(self):
+        css = 'a :hover { content: "x ; /* no */ }"; }'
+
+        self.assertEqual(minificar_css(css), 'a :hover{content:"x ; /* no */ }"}')
+
+
+class ElegirCodificacionTests(SimpleTestCase):
+    def test_respeta_q(self):
+        disponibles = {"": 1, "gzip": 1, "br": 1}
+
+        self.assertEqual(elegir_codificacion("gzip, deflate, br", disponibles), "br")
+        self.assertEqual(elegir_codificacion("br;q=0.5, gzip", disponibles), "gzip")
+        self.assertEqual(elegir_codificacion("gzip;q=0, br;q=0", disponibles), "")
+        self.assertEqual(elegir_codificacion("", disponibles), "")
+        self.assertEqual(elegir_codificacion("*", {"": 1, "gzip": 1}), "gzip")
+
+
+class PipelineEstaticosTests(SimpleTestCase):
+    """collectstatic con AlmacenEstaticos y el middleware sirviendo el resultado."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.raiz = Path(cls.enterClassContext(tempfile.TemporaryDirectory()))
+        cls.enterClassContext(override_settings(
+            STATIC_ROOT=cls.raiz, STORAGES=ALMACEN, ESTATICOS_VERSIONADOS=True,
+        ))
+        call_command("collectstatic", interactive=False, verbosity=0)
+        cls.url = static("css/inventario.css")
+        cls.middleware = EstaticosMiddleware(lambda request: HttpResponse("vista", status=404))
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def _pedir(self, url, **encabezados):
+        return self.middleware(self.factory.get(url, **encabezados))
+
+    def test_nombres_con_hash_minificados_y_comprimidos(self):
+        manifiesto = json.loads((self.raiz / "staticfiles.json").read_text())
+        con_hash = manifiesto["paths"]["css/inventario.css"]
+        ruta = self.raiz / con_hash
+
+        self.assertEqual(self.url, f"/static/{con_hash}")
+        self.assertNotIn("/* inventario.css */", ruta.read_text())
+        self.assertEqual(gzip.decompress((self.raiz / f"{con_hash}.gz").read_bytes()), ruta.read_bytes())
+
+    def test_sirve_gzip_con_cache_de_un_anio(self):
+        res = self._pedir(self.url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+        cuerpo = b"".join(res.streaming_content)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertEqual(res["Vary"], "Accept-Encoding")
+        self.assertIn("immutable", res["Cache-Control"])
+        self.assertTrue(res["Content-Type"].startswith("text/css"))
+        self.assertNotIn("Content-Disposition", res)
+        self.assertIn(b".navbar-custom{", gzip.decompress(cuerpo))
+
+    def test_sin_accept_encoding_sirve_el_original(self):
+        res = self._pedir(self.url)
+
+        self.assertNotIn("Content-Encoding", res)
+        self.assertIn(b".navbar-custom{", b"".join(res.streaming_content))
+
+    def test_if_none_match_devuelve_304(self):
+        etag = self._pedir(self.url, HTTP_ACCEPT_ENCODING="gzip")["ETag"]
+
+        res = self._pedir(self.url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+        self.assertIn("immutable", res["Cache-Control"])
+
+    def test_nombre_sin_hash_con_cache_corta(self):
+        res = self._pedir("/static/css/inventario.css")
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res["Cache-Control"], "public, max-age=60")
+
+    def test_lo_que_no_es_estatico_sigue_a_la_vista(self):
+        self.assertEqual(self._pedir("/static/css/no-existe.css").content, b"vista")
+        self.assertEqual(self._pedir("/catalogo/").content, b"vista")
@@ -0,0 +1,107 @@
+# seguridad/tests/test_exportaciones.py
+import csv
+import io
+import zipfile
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from biblio.models import Bitacora, Ventas
+from seguridad.exportaciones import filas_por_bloques
+
+from .utilidades import (
+    crear_cliente,
+    crear_empleado,
+    crear_libro,
+    crear_venta,
+    iniciar_sesion_empleado,
+)
+
+
+class ExportacionesTests(TestCase):
+    def setUp(self):
+        self.admin = crear_empleado("administrador")
+        self.libro = crear_libro()
+        self.ana = crear_cliente(dni="0801199900001")
+        self.otro = crear_cliente(dni="0801199900002")
+        self.ventas = [
+            crear_venta(self.ana, self.admin, self.libro),
+            crear_venta(self.otro, self.admin, self.libro, metodo_pago="Tarjeta"),
+            crear_venta(self.ana, self.admin, self.libro, cantidad=2),
+        ]
+        iniciar_sesion_empleado(self.client, self.admin)
+
+    def _csv(self, res):
+        self.assertTrue(res.streaming)
+        contenido = b"".join(res.streaming_content).decode("utf-8-sig")
+        return list(csv.reader(io.StringIO(contenido)))
+
+    def _hoja(self, res):
+        with zipfile.ZipFile(io.BytesIO(b"".join(res.streaming_content))) as zf:
+            return zf.read("xl/worksheets/sheet1.xml").decode("utf-8")
+
+    def test_csv_de_ventas_respeta_filtros(self):
+        res = self.client.get(reverse("exportar_ventas"), {"q": "0801199900001"})
+
+        self.assertEqual(res["Content-Type"], "text/csv; charset=utf-8")
+        filas = self._csv(res)
+        self.assertEqual(filas[0][:3], ["ID", "Factura", "Fecha"])
+        self.assertEqual(
+            [int(f[0]) for f in filas[1:]],
+            [self.ventas[2].id, self.ventas[0].id],
+        )
+
+    def test_fecha_invalida_se_ignora(self):
+        res = self.client.get(reverse("exportar_ventas"), {"fecha_desde": "abc", "fecha_hasta": "2024-13-40"})
+        self.assertEqual(len(self._csv(res)), 1 + len(self.ventas))
+
+        res = self.client.get(reverse("historial_ventas"), {"fecha_desde": "abc"})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.context["total_ventas"], len(self.ventas))
+
+    def test_texto_que_parece_formula_se_escapa(self):
+        usuario = self.ana.usuario
+        usuario.nombre = '=HYPERLINK("http://x.test","clic")'
+        usuario.save()
+
+        filas = self._csv(self.client.get(reverse("exportar_ventas"), {"q": "0801199900001"}))
+        hoja = self._hoja(self.client.get(reverse("exportar_ventas"), {"formato": "xlsx"}))
+
+        self.assertIn("'=HYPERLINK(\"http://x.test\",\"clic\")", filas[1])
+        self.assertIn("'=HYPERLINK(", hoja)
+        self.assertNotIn(">=HYPERLINK(", hoja)
+
+    def test_xlsx_es_un_libro_valido(self):
+        res = self.client.get(reverse("exportar_ventas"), {"formato": "xlsx"})
+
+        self.assertTrue(res.streaming)
+        with zipfile.ZipFile(io.BytesIO(b"".join(res.streaming_content))) as zf:
+            self.assertIn("xl/workbook.xml", zf.namelist())
+            hoja = zf.read("xl/worksheets/sheet1.xml").decode("utf-8")
+        self.assertEqual(hoja.count("<row>"), 1 + len(self.ventas))
+        self.assertIn("Tarjeta", hoja)
+
+    def test_formato_desconocido(self):
+        res = self.client.get(reverse("exportar_ventas"), {"formato": "pdf"})
+        self.assertEqual(res.status_code, 404)
+
+    def test_bloques_recorren_todo_sin_repetir(self):
+        ids = [fila[0] for fila in filas_por_bloques(Ventas.objects.all(), ["id"], tamano=2)]
+        self.assertEqual(ids, sorted((v.id for v in self.ventas), reverse=True))
+
+    def test_bitacora_filtra_por_fecha(self):
+        hoy = timezone.now()
+        Bitacora.objects.create(usuario=self.admin, accion="Inicio de sesión", fecha=hoy)
+        Bitacora.objects.create(
+            usuario=self.admin, accion="Antigua", fecha=hoy - timedelta(days=30),
+        )
+
+        res = self.client.get(
+            reverse("exportar_bitacora"),
+            {"fecha_desde": timezone.localdate().isoformat()},
+        )
+
+        filas = self._csv(res)
+        self.assertEqual([f[3] for f in filas[1:]], ["Inicio de sesión"])
@@ -0,0 +1,104 @@
+# seguridad/tests/test_facturacion_lote.py
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from biblio.models import Bitacora, DetalleVenta, Libros, LotesDocumentos, Reservas, SolicitudVenta, Ventas
+from seguridad.ventas import facturar_solicitudes
+
+from .utilidades import crear_cliente, crear_empleado, crear_libro, iniciar_sesion_empleado
+
+
+class FacturacionLoteTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(
+            MEDIA_ROOT=self.media,
+            DOCUMENTOS_ROOT=Path(self.media) / "documentos",
+            DOCUMENTOS_LOTES_EN_PROCESO=False,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.vendedor = crear_empleado("bibliotecario")
+        self.libro = crear_libro(stock=2)
+        self.otro_libro = crear_libro(isbn="9780000000002", stock=5)
+        self.solicitudes = [
+            SolicitudVenta.objects.create(
+                cliente=crear_cliente(dni=f"080119990000{i}"),
+                libro=self.libro,
+                cantidad=1,
+            )
+            for i in range(3)
+        ]
+
+    def test_factura_hasta_agotar_stock_y_rechaza_el_resto(self):
+        resultado = facturar_solicitudes(
+            [s.id for s in self.solicitudes], self.vendedor, "Tarjeta"
+        )
+
+        self.assertEqual(len(resultado.ventas), 2)
+        self.assertEqual(len(resultado.rechazadas), 1)
+        self.assertEqual(resultado.rechazadas[0][0].id, self.solicitudes[2].id)
+
+        self.assertEqual(Libros.objects.get(id=self.libro.id).stock_total, 0)
+        self.assertEqual(DetalleVenta.objects.count(), 2)
+        self.assertEqual(
+            list(SolicitudVenta.objects.order_by("id").values_list("estado", flat=True)),
+            ["atendida", "atendida", "pendiente"],
+        )
+        # El registro de cada venta se guarda en la misma transacción
+        self.assertEqual(
+            Bitacora.objects.filter(accion__startswith="FACTURÓ VENTA").count(), 2
+        )
+
+    def test_consultas_constantes_por_lote(self):
+        otro_cliente = self.solicitudes[0].cliente
+        pocas = [self.solicitudes[0]]
+        muchas = self.solicitudes[1:] + [
+            SolicitudVenta.objects.create(cliente=otro_cliente, libro=self.otro_libro, cantidad=2),
+            SolicitudVenta.objects.create(cliente=otro_cliente, libro=self.otro_libro, cantidad=1),
+        ]
+        self.libro.stock_total = 10
+        self.libro.save()
+
+        with CaptureQueriesContext(connection) as una:
+            facturar_solicitudes([s.id for s in pocas], self.vendedor)
+        with CaptureQueriesContext(connection) as varias:
+            resultado = facturar_solicitudes([s.id for s in muchas], self.vendedor)
+
+        self.assertEqual(len(resultado.ventas), 4)
+        if connection.features.can_return_rows_from_bulk_insert:
+            self.assertEqual(len(varias), len(una))
+
+    def test_reserva_queda_facturada(self):
+        cliente = self.solicitudes[0].cliente
+        reserva = Reservas.objects.create(cliente=cliente, libro=self.otro_libro, estado="activa")
+        solicitud = SolicitudVenta.objects.create(
+            cliente=cliente, libro=self.otro_libro, reserva=reserva, origen="reserva",
+        )
+
+        facturar_solicitudes([solicitud.id], self.vendedor)
+
+        reserva.refresh_from_db()
+        self.assertEqual(reserva.estado, "facturada")
+
+    def test_vista_muestra_resumen_y_encola_pdfs(self):
+        iniciar_sesion_empleado(self.client, self.vendedor)
+
+        res = self.client.post(
+            reverse("facturar_lote"),
+            {"solicitud_ids": [s.id for s in self.solicitudes[:2]], "metodo_pago": "Efectivo"},
+        )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTemplateUsed(res, "seguridad/resumen_facturacion.html")
+        venta_ids = sorted(Ventas.objects.values_list("id", flat=True))
+        lote = LotesDocumentos.objects.get()
+        self.assertEqual(sorted(lote.filtros["ids"]), venta_ids)
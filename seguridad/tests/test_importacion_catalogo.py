@@ -0,0 +1,165 @@
+# seguridad/tests/test_importacion_catalogo.py
+import importlib
+import io
+import json
+from decimal import Decimal
+
+from django.apps import apps
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from biblio import importacion
+from biblio.models import Libros
+
+from .utilidades import crear_empleado, crear_libro, iniciar_sesion_empleado
+
+
+def _csv(*filas, encabezado="isbn,titulo,autor,editorial,stock"):
+    return [encabezado + "\n"] + [fila + "\n" for fila in filas]
+
+
+def _marc(campos):
+    """Registro ISO 2709 mínimo a partir de [(etiqueta, [(subcampo, valor)])]."""
+    directorio = b""
+    datos = b""
+    for etiqueta, subcampos in campos:
+        contenido = b"  " + b"".join(
+            b"\x1f" + codigo.encode() + valor.encode("utf-8") for codigo, valor in subcampos
+        ) + b"\x1e"
+        directorio += etiqueta.encode() + b"%04d%05d" % (len(contenido), len(datos))
+        datos += contenido
+    base = 24 + len(directorio) + 1
+    largo = base + len(datos) + 1
+    cabecera = b"%05dnam a22%05d a 4500" % (largo, base)
+    return cabecera + directorio + b"\x1e" + datos + b"\x1d"
+
+
+class ImportacionCatalogoTests(TestCase):
+    def setUp(self):
+        self.libro = crear_libro(isbn="9780306406157", stock=4)
+
+    def test_inserta_actualiza_y_rechaza(self):
+        reporte = importacion.importar(importacion.leer_csv(_csv(
+            "0-306-40615-2,Título corregido,Autor,Editorial A,",
+            "0-19-852663-6,Libro nuevo,Autora,,7",
+            "9780000000000,ISBN malo,Autor,,",
+            "9781861972712,,Sin título,,",
+        )))
+
+        self.assertEqual(reporte.leidos, 4)
+        self.assertEqual(reporte.insertados, 1)
+        self.assertEqual(reporte.actualizados, 1)
+        self.assertEqual(reporte.rechazados, 2)
+        self.assertEqual([numero for numero, _ in reporte.errores], [4, 5])
+
+        self.libro.refresh_from_db()
+        self.assertEqual(self.libro.titulo, "Título corregido")
+        self.assertEqual(self.libro.editorial, "Editorial A")
+        # Sin stock en el archivo no se toca el existente
+        self.assertEqual(self.libro.stock_total, 4)
+        self.assertEqual(Libros.objects.get(isbn="9780198526636").stock_total, 7)
+
+    def test_actualiza_libro_guardado_con_guiones(self):
+        viejo = crear_libro(isbn="0-19-852663-6", stock=2)
+
+        reporte = importacion.importar(importacion.leer_csv(_csv("0-19-852663-6,Nuevo título,Autora,,")))
+
+        self.assertEqual((reporte.insertados, reporte.actualizados), (0, 1))
+        self.assertEqual(Libros.objects.count(), 2)
+        viejo.refresh_from_db()
+        self.assertEqual(viejo.isbn, "9780198526636")
+        self.assertEqual(viejo.titulo, "Nuevo título")
+        self.assertEqual(viejo.stock_total, 2)
+
+    def test_migracion_canoniza_isbn_guardados(self):
+        migracion = importlib.import_module("biblio.migrations.0014_isbn_canonico")
+        guiones = crear_libro(isbn="0-19-852663-6")
+        # Su forma canónica ya la tiene self.libro: se deja como está
+        repetido = crear_libro(isbn="0-306-40615-2")
+
+        migracion.canonizar_isbn(apps, None)
+
+        guiones.refresh_from_db()
+        repetido.refresh_from_db()
+        self.assertEqual(guiones.isbn, "9780198526636")
+        self.assertEqual(repetido.isbn, "0-306-40615-2")
+
+    def test_jsonl(self):
+        lineas = [
+            json.dumps({"isbn": "9780198526636", "titulo": "Nuevo", "autor": "A", "precio": "12.5"}),
+            "no es json",
+        ]
+
+        reporte = importacion.importar(importacion.leer_jsonl(lineas))
+
+        self.assertEqual((reporte.insertados, reporte.rechazados), (1, 1))
+        self.assertEqual(Libros.objects.get(isbn="9780198526636").precio_venta, Decimal("12.50"))
+
+    def test_marc(self):
+        datos = _marc([
+            ("020", [("a", "0198526636 (pbk.)")]),
+            ("100", [("a", "García Márquez, Gabriel,")]),
+            ("245", [("a", "Cien años de soledad :"), ("b", "novela /")]),
+            ("264", [("b", "Sudamericana,"), ("c", "c1967.")]),
+            ("650", [("a", "Novela colombiana.")]),
+        ])
+
+        reporte = importacion.importar(importacion.leer_marc(io.BytesIO(datos)))
+
+        self.assertEqual(reporte.insertados, 1)
+        libro = Libros.objects.get(isbn="9780198526636")
+        self.assertEqual(libro.titulo, "Cien años de soledad: novela")
+        self.assertEqual(libro.autor, "García Márquez, Gabriel")
+        self.assertEqual(libro.editorial, "Sudamericana")
+        self.assertEqual(libro.anio_publicacion, "1967")
+        self.assertEqual(libro.categoria, "Novela colombiana")
+
+    def test_dos_consultas_por_bloque(self):
+        isbns = ["9780306406157", "9780198526636", "9781861972712"]
+        filas = [f"{isbn},T,A,," for isbn in isbns * 2]
+
+        with CaptureQueriesContext(connection) as consultas:
+            reporte = importacion.importar(importacion.leer_csv(_csv(*filas)), tamano_bloque=2)
+
+        sql = [q["sql"] for q in consultas.captured_queries]
+        self.assertEqual(len([s for s in sql if s.startswith('SELECT "libros"')]), 3)
+        self.assertEqual(len([s for s in sql if s.startswith('INSERT INTO "libros"')]), 3)
+        self.assertEqual((reporte.insertados, reporte.actualizados), (2, 4))
+        self.assertEqual(Libros.objects.count(), 3)
+
+    def test_vista_muestra_reporte(self):
+        empleado = crear_empleado("bibliotecario")
+        iniciar_sesion_empleado(self.client, empleado)
+        archivo = SimpleUploadedFile(
+            "catalogo.csv",
+            "".join(_csv("9780198526636,Nuevo,Autora,,2")).encode("utf-8-sig"),
+            content_type="text/csv",
+        )
+
+        res = self.client.post(reverse("importar_catalogo"), {"archivo": archivo})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTemplateUsed(res, "seguridad/importacion_catalogo.html")
+        self.assertEqual(res.context["reporte"].insertados, 1)
+
+    def test_alta_manual_guarda_isbn_canonico(self):
+        iniciar_sesion_empleado(self.client, crear_empleado("bibliotecario"))
+        datos = {"agregar_libro": "1", "titulo": "Manual", "autor": "Autora", "stock": "1"}
+
+        self.client.post(reverse("inventario"), {**datos, "isbn": "0-19-852663-6"})
+        # El ISBN-13 del mismo libro ya existe
+        self.client.post(reverse("inventario"), {**datos, "isbn": "978-0-19-852663-6"})
+
+        self.assertEqual(Libros.objects.filter(titulo="Manual").get().isbn, "9780198526636")
+
+    def test_vista_rechaza_extension_desconocida(self):
+        iniciar_sesion_empleado(self.client, crear_empleado("bibliotecario"))
+        archivo = SimpleUploadedFile("catalogo.xls", b"x")
+
+        res = self.client.post(reverse("importar_catalogo"), {"archivo": archivo})
+
+        self.assertRedirects(res, reverse("inventario"), fetch_redirect_response=False)
+        self.assertEqual(Libros.objects.count(), 1)
@@ -0,0 +1,114 @@
+# seguridad/tests/test_importacion_compras.py
+import shutil
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from biblio.models import Compras, DetalleCompras, Libros
+from seguridad import compras
+from seguridad.compras import importar_csv
+
+from .utilidades import crear_empleado, crear_libro, crear_proveedor, iniciar_sesion_empleado
+
+
+def _csv(*filas, encabezado="isbn,cantidad,costo_unitario,titulo,autor"):
+    return [encabezado + "\n"] + [fila + "\n" for fila in filas]
+
+
+class ImportacionComprasTests(TestCase):
+    def setUp(self):
+        self.admin = crear_empleado("administrador")
+        self.proveedor = crear_proveedor()
+        self.libro = crear_libro(isbn="9780306406157", stock=1)
+
+    def test_importa_existentes_y_crea_titulos_nuevos(self):
+        reporte = importar_csv(
+            _csv(
+                "0-306-40615-2,3,10.00,,",
+                "0-19-852663-6,2,5.50,Libro nuevo,Autora",
+                "9780198526636,1,5.50,,",
+            ),
+            self.proveedor, self.admin, "Transferencia",
+        )
+
+        self.assertTrue(reporte.ok)
+        self.assertEqual(reporte.libros_creados, 1)
+        self.assertEqual(reporte.total, Decimal("46.50"))
+        self.assertEqual(reporte.compra.total, Decimal("46.50"))
+        self.assertEqual(Libros.objects.get(id=self.libro.id).stock_total, 4)
+        # El ISBN-10 se guarda como ISBN-13
+        self.assertEqual(Libros.objects.get(isbn="9780198526636").stock_total, 3)
+
+    def test_simulacion_no_guarda_nada(self):
+        reporte = importar_csv(
+            _csv("9780306406157,3,10.00,,", "0198526636,1,5.50,Nuevo,Autor"),
+            self.proveedor, self.admin, "Efectivo", simular=True,
+        )
+
+        self.assertTrue(reporte.ok)
+        self.assertIsNone(reporte.compra)
+        self.assertEqual(reporte.lineas_validas, 2)
+        self.assertFalse(Compras.objects.exists())
+        self.assertEqual(Libros.objects.count(), 1)
+        self.assertEqual(Libros.objects.get().stock_total, 1)
+
+    def test_errores_se_reportan_por_linea_y_no_guardan(self):
+        reporte = importar_csv(
+            _csv(
+                "9780306406157,3,10.00,,",
+                "9780306406157,cero,10.00,,",
+                "9781111111111,1,1.00,,",
+                "0198526636,1,5.50,,",
+            ),
+            self.proveedor, self.admin, "Efectivo",
+        )
+
+        self.assertFalse(reporte.ok)
+        self.assertEqual([linea for linea, _ in reporte.errores], [3, 4, 5])
+        self.assertFalse(Compras.objects.exists())
+        self.assertEqual(Libros.objects.get().stock_total, 1)
+
+    def test_una_consulta_de_libros_por_bloque(self):
+        filas = [f"9780306406157,1,1.00,," for _ in range(25)]
+        original = compras.TAMANO_BLOQUE_IMPORTACION
+        compras.TAMANO_BLOQUE_IMPORTACION = 10
+        self.addCleanup(setattr, compras, "TAMANO_BLOQUE_IMPORTACION", original)
+
+        with CaptureQueriesContext(connection) as consultas:
+            reporte = importar_csv(_csv(*filas), self.proveedor, self.admin, "Efectivo")
+
+        self.assertTrue(reporte.ok)
+        selects_libros = [
+            q for q in consultas.captured_queries
+            if q["sql"].startswith('SELECT "libros"')
+        ]
+        self.assertEqual(len(selects_libros), 3)
+        self.assertEqual(DetalleCompras.objects.count(), 25)
+        self.assertEqual(Libros.objects.get().stock_total, 26)
+
+    def test_vista_muestra_reporte(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        iniciar_sesion_empleado(self.client, self.admin)
+        archivo = SimpleUploadedFile(
+            "factura.csv",
+            "".join(_csv("9780306406157,2,7.25,,")).encode("utf-8-sig"),
+            content_type="text/csv",
+        )
+
+        with override_settings(MEDIA_ROOT=media, DOCUMENTOS_ROOT=Path(media) / "documentos"):
+            res = self.client.post(reverse("importar_compra_csv"), {
+                "proveedor_nombre": self.proveedor.nombre_comercial,
+                "metodo_pago": "Transferencia",
+                "archivo": archivo,
+            })
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTemplateUsed(res, "seguridad/importacion_compras.html")
+        self.assertEqual(res.context["reporte"].compra.total, Decimal("14.50"))
@@ -0,0 +1,126 @@
+# seguridad/tests/test_indices.py
+"""
+Cada vista caliente usa su índice compuesto (biblio/migrations/0013).
+
+Se hace la petición real, se toman las consultas que ejecutó sobre la
+tabla y se pasa cada una por EXPLAIN (EXPLAIN QUERY PLAN en SQLite, la
+columna "key" en MySQL). Si un cambio en la vista o en el índice hace que
+el planificador deje de usarlo, el test lo dice.
+"""
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from biblio.models import Libros, ReglasPrestamo
+from seguridad.datos_sinteticos import generar
+
+from .utilidades import crear_cliente, crear_empleado, crear_venta, iniciar_sesion_empleado
+
+VOLUMEN = dict(
+    libros=60, ejemplares_por_libro=2, clientes=20, prestamos=400, reservas=60,
+    ventas=150, compras=30, solicitudes=20, semilla=3,
+)
+
+
+def _plan(sql):
+    with connection.cursor() as cursor:
+        if connection.vendor == "mysql":
+            cursor.execute(f"EXPLAIN {sql}")
+            columnas = [c[0] for c in cursor.description]
+            return " ".join(str(dict(zip(columnas, fila))["key"]) for fila in cursor.fetchall())
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return " ".join(str(fila[-1]) for fila in cursor.fetchall())
+
+
+def _sin_comillas(sql):
+    return sql.replace('"', "").replace("`", "")
+
+
+class IndicesCompuestosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generar(**VOLUMEN)
+        ReglasPrestamo.objects.create(
+            plazo_dias=14, limite_prestamos=3, tarifa_mora_diaria=5, fecha_actualizacion=timezone.now(),
+        )
+        cls.bibliotecario = crear_empleado("bibliotecario")
+        cls.administrador = crear_empleado("administrador")
+        cls.cliente = crear_cliente()
+        cls.libro = Libros.objects.filter(stock_total__gt=0).order_by("id").first()
+        for _ in range(3):
+            crear_venta(cls.cliente, cls.bibliotecario, cls.libro)
+
+    def _sesion(self, rol):
+        if rol == "cliente":
+            session = self.client.session
+            session["cliente_id"] = self.cliente.id
+            session.save()
+        else:
+            iniciar_sesion_empleado(self.client, getattr(self, rol))
+
+    def _consultas(self, rol, metodo, url, datos=None):
+        self._sesion(rol)
+        with CaptureQueriesContext(connection) as capturadas:
+            respuesta = getattr(self.client, metodo)(url, datos or {})
+        self.assertIn(respuesta.status_code, (200, 302))
+        return [q["sql"] for q in capturadas.captured_queries]
+
+    def assertUsaIndice(self, consultas, desde, fragmento, indice):
+        elegidas = [
+            sql for sql in consultas
+            if f"FROM {desde}" in _sin_comillas(sql) and fragmento in _sin_comillas(sql)
+        ]
+        self.assertTrue(elegidas, f"Ninguna consulta sobre {desde} con «{fragmento}»")
+        planes = [_plan(sql) for sql in elegidas]
+        self.assertTrue(
+            any(indice in plan for plan in planes),
+            f"{indice} no aparece en el plan:\n" + "\n".join(planes),
+        )
+
+    def test_gestion_prestamos(self):
+        consultas = self._consultas("bibliotecario", "get", reverse("gestion_prestamos"))
+
+        self.assertUsaIndice(consultas, "prestamos", "prestamos.estado =", "prestamos_estado_inicio_idx")
+
+    def test_registrar_prestamo(self):
+        consultas = self._consultas("bibliotecario", "post", reverse("registrar_prestamo"), {
+            "dni": self.cliente.dni,
+            "isbn": self.libro.isbn,
+            "fecha_inicio": timezone.localdate().isoformat(),
+        })
+
+        # Límite de préstamos activos del cliente
+        self.assertUsaIndice(consultas, "prestamos", "prestamos.estado =", "prestamos_cliente_estado_idx")
+        # Bloqueo por mora
+        self.assertUsaIndice(
+            consultas, "prestamos", "fecha_devolucion IS NULL", "prestamos_cli_devol_fin_idx"
+        )
+
+    def test_reservar_libro(self):
+        consultas = self._consultas("cliente", "post", reverse("reservar_libro", args=[self.libro.id]))
+
+        self.assertUsaIndice(consultas, "reservas", "reservas.libro_id =", "reservas_cli_libro_est_idx")
+
+    def test_realizar_venta(self):
+        consultas = self._consultas("bibliotecario", "get", reverse("realizar_venta"))
+
+        self.assertUsaIndice(
+            consultas, "solicitudes_venta", "solicitudes_venta.estado =", "solventa_estado_fecha_idx"
+        )
+
+    def test_historial_compras_cliente(self):
+        consultas = self._consultas("cliente", "get", reverse("historial_compras_cliente"))
+
+        self.assertUsaIndice(consultas, "ventas", "ventas.estado =", "ventas_cli_estado_id_idx")
+
+    def test_inventario(self):
+        consultas = self._consultas("bibliotecario", "get", reverse("inventario"))
+
+        self.assertUsaIndice(consultas, "libros", "ORDER BY", "libros_registro_titulo_idx")
+
+    def test_gestion_compras(self):
+        consultas = self._consultas("administrador", "get", reverse("gestion_compras"))
+
+        self.assertUsaIndice(consultas, "compras", "ORDER BY", "compras_fecha_id_idx")
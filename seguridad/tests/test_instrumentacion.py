@@ -0,0 +1,65 @@
+# seguridad/tests/test_instrumentacion.py
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from biblio import instrumentacion
+from biblio.models import Libros
+
+from .utilidades import crear_empleado, iniciar_sesion_empleado
+
+
+def _vista_con_n1(request):
+    for libro_id in range(1, 13):
+        Libros.objects.filter(id=libro_id).first()
+    return HttpResponse("ok")
+
+
+class InstrumentacionTests(TestCase):
+    def setUp(self):
+        instrumentacion.limpiar()
+        self.addCleanup(instrumentacion.limpiar)
+
+    def test_huella_ignora_literales_y_listas_in(self):
+        a = 'SELECT * FROM "libros" WHERE "id" IN (%s, %s, %s) LIMIT 21'
+        b = 'SELECT  * FROM "libros"\nWHERE "id" IN (%s) LIMIT 5'
+
+        self.assertEqual(instrumentacion.huella(a), instrumentacion.huella(b))
+
+    @override_settings(INSTRUMENTACION_UMBRAL_N1=10)
+    def test_detecta_sentencia_repetida(self):
+        middleware = instrumentacion.InstrumentacionMiddleware(_vista_con_n1)
+
+        with self.assertLogs("biblio.instrumentacion", "WARNING"):
+            middleware(RequestFactory().get("/libros/"))
+
+        peticion = instrumentacion.peticiones()[0]
+        self.assertEqual(peticion["consultas"], 12)
+        self.assertEqual(len(peticion["repetidas"]), 1)
+        self.assertEqual(peticion["repetidas"][0][1], 12)
+
+    def test_server_timing_solo_para_el_personal(self):
+        self.assertNotIn("Server-Timing", self.client.get(reverse("inicio_sesion")))
+
+        iniciar_sesion_empleado(self.client, crear_empleado("administrador"))
+        res = self.client.get(reverse("bitacora"))
+
+        self.assertIn("consultas", res["Server-Timing"])
+
+    def test_resumen_por_vista(self):
+        iniciar_sesion_empleado(self.client, crear_empleado("administrador"))
+        self.client.get(reverse("bitacora"))
+        self.client.get(reverse("bitacora"))
+
+        res = self.client.get(reverse("diagnostico_consultas"))
+
+        fila = next(v for v in res.context["vistas"] if v["vista"] == "bitacora")
+        self.assertEqual(fila["peticiones"], 2)
+        self.assertGreater(fila["prom_consultas"], 0)
+
+    def test_buffer_acotado(self):
+        middleware = instrumentacion.InstrumentacionMiddleware(lambda r: HttpResponse())
+        for _ in range(instrumentacion._buffer.maxlen + 5):
+            middleware(RequestFactory().get("/"))
+
+        self.assertEqual(len(instrumentacion.peticiones()), instrumentacion._buffer.maxlen)
@@ -0,0 +1,118 @@
+# seguridad/tests/test_lotes_documentos.py
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from biblio.models import LotesDocumentos
+from seguridad import lotes
+
+from .utilidades import (
+    crear_cliente,
+    crear_empleado,
+    crear_libro,
+    crear_venta,
+    iniciar_sesion_empleado,
+)
+
+
+class LotesDocumentosTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(
+            MEDIA_ROOT=self.media,
+            DOCUMENTOS_ROOT=Path(self.media) / "documentos",
+            DOCUMENTOS_LOTES_WORKERS=1,
+            DOCUMENTOS_LOTES_EN_PROCESO=False,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.admin = crear_empleado("administrador")
+        vendedor = crear_empleado("bibliotecario")
+        cliente = crear_cliente()
+        libro = crear_libro()
+        self.ventas = [crear_venta(cliente, vendedor, libro) for _ in range(3)]
+
+    def test_lote_genera_zip_con_todas_las_facturas(self):
+        iniciar_sesion_empleado(self.client, self.admin)
+        res = self.client.post(reverse("lotes_documentos"), {"tipo": "factura"})
+        self.assertEqual(res.status_code, 302)
+
+        lote = LotesDocumentos.objects.get()
+        self.assertEqual(lote.estado, "pendiente")
+
+        lotes.ejecutar_lote(lote.id)
+
+        estado = self.client.get(reverse("estado_lote_documentos", args=[lote.id])).json()
+        self.assertEqual(estado["estado"], "terminado")
+        self.assertEqual(estado["procesados"], 3)
+        self.assertEqual(estado["porcentaje"], 100)
+
+        descarga = self.client.get(estado["descarga"])
+        ruta_zip = Path(self.media) / "lote.zip"
+        ruta_zip.write_bytes(b"".join(descarga.streaming_content))
+        with zipfile.ZipFile(ruta_zip) as zf:
+            self.assertEqual(
+                sorted(zf.namelist()),
+                sorted(f"factura_{v.id}.pdf" for v in self.ventas),
+            )
+
+    def test_filtro_por_ids(self):
+        lote = LotesDocumentos.objects.create(
+            tipo="factura", filtros={"ids": [self.ventas[0].id]},
+        )
+        self.assertEqual(lotes.ids_del_lote(lote), [self.ventas[0].id])
+
+    def test_tomar_lote_retoma_solo_los_abandonados(self):
+        hace_un_rato = timezone.now() - timedelta(minutes=1)
+        hace_mucho = timezone.now() - timedelta(hours=1)
+        en_curso = LotesDocumentos.objects.create(
+            tipo="factura", estado="procesando", fecha_progreso=hace_un_rato,
+        )
+        abandonado = LotesDocumentos.objects.create(
+            tipo="factura", estado="procesando", fecha_progreso=hace_mucho,
+        )
+        pendiente = LotesDocumentos.objects.create(tipo="factura")
+
+        self.assertEqual(lotes.tomar_lote(), abandonado.id)
+        self.assertEqual(lotes.tomar_lote(), pendiente.id)
+        self.assertIsNone(lotes.tomar_lote())
+        en_curso.refresh_from_db()
+        self.assertEqual(en_curso.fecha_progreso, hace_un_rato)
+
+    def test_comando_procesa_pendientes_y_abandonados(self):
+        pendiente = LotesDocumentos.objects.create(tipo="factura")
+        abandonado = LotesDocumentos.objects.create(
+            tipo="factura", estado="procesando",
+            fecha_progreso=timezone.now() - timedelta(hours=1),
+        )
+
+        call_command("procesar_lotes_documentos", stdout=StringIO())
+
+        for lote in (pendiente, abandonado):
+            lote.refresh_from_db()
+            self.assertEqual((lote.estado, lote.procesados), ("terminado", 3))
+            self.assertIsNotNone(lote.fecha_progreso)
+
+    def test_en_un_worker_web_no_abre_pool_de_procesos(self):
+        lote = LotesDocumentos.objects.create(tipo="factura")
+
+        # close_all() dentro de la transacción del test la invalidaría
+        with override_settings(DOCUMENTOS_LOTES_WORKERS=8), \
+                mock.patch.object(lotes, "ProcessPoolExecutor") as pool, \
+                mock.patch.object(lotes.connections, "close_all"):
+            lotes._ejecutar_en_hilo(lote.id)
+
+        pool.assert_not_called()
+        lote.refresh_from_db()
+        self.assertEqual(lote.estado, "terminado")
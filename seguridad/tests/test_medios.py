@@ -0,0 +1,93 @@
+# seguridad/tests/test_medios.py
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from .utilidades import crear_libro
+
+CONTENIDO = b"0123456789abcdef"
+
+
+class MediaTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media, MEDIA_SENDFILE="")
+        override.enable()
+        self.addCleanup(override.disable)
+
+        libro = crear_libro()
+        libro.portada = SimpleUploadedFile("mi portada.jpg", CONTENIDO, content_type="image/jpeg")
+        libro.save()
+        self.url = libro.portada.url
+
+    def _cuerpo(self, res):
+        return b"".join(res.streaming_content)
+
+    def test_nombre_unico_por_subida(self):
+        otro = crear_libro(isbn="9780000000002")
+        otro.portada = SimpleUploadedFile("mi portada.jpg", b"otra", content_type="image/jpeg")
+        otro.save()
+
+        self.assertRegex(self.url, r"^/media/portadas/[0-9a-f]{12}-mi_portada\.jpg$")
+        self.assertNotEqual(otro.portada.url, self.url)
+
+    def test_archivo_completo_con_cache_larga(self):
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self._cuerpo(res), CONTENIDO)
+        self.assertEqual(res["Content-Type"], "image/jpeg")
+        self.assertEqual(res["Accept-Ranges"], "bytes")
+        self.assertIn("immutable", res["Cache-Control"])
+        self.assertNotIn("Content-Disposition", res)
+
+    def test_rango(self):
+        res = self.client.get(self.url, HTTP_RANGE="bytes=2-5")
+
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(self._cuerpo(res), b"2345")
+        self.assertEqual(res["Content-Range"], "bytes 2-5/16")
+        self.assertEqual(res["Content-Length"], "4")
+
+    def test_rango_final_y_abierto(self):
+        self.assertEqual(self._cuerpo(self.client.get(self.url, HTTP_RANGE="bytes=-3")), b"def")
+        self.assertEqual(self._cuerpo(self.client.get(self.url, HTTP_RANGE="bytes=14-")), b"ef")
+
+    def test_rango_imposible_416(self):
+        res = self.client.get(self.url, HTTP_RANGE="bytes=99-")
+
+        self.assertEqual(res.status_code, 416)
+        self.assertEqual(res["Content-Range"], "bytes */16")
+
+    def test_if_range_con_otro_etag_manda_todo(self):
+        res = self.client.get(self.url, HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE='"viejo"')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self._cuerpo(res), CONTENIDO)
+
+    def test_if_none_match_304(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+        self.assertIn("immutable", res["Cache-Control"])
+
+    def test_x_accel_redirect(self):
+        with override_settings(MEDIA_SENDFILE="x-accel-redirect", MEDIA_ACCEL_PREFIX="/interno/"):
+            res = self.client.get(self.url)
+
+        self.assertEqual(res["X-Accel-Redirect"], "/interno/" + self.url.removeprefix("/media/"))
+        self.assertEqual(res.content, b"")
+
+    def test_no_sirve_documentos_privados(self):
+        privado = Path(self.media, "documentos", "factura.pdf")
+        privado.parent.mkdir()
+        privado.write_bytes(b"%PDF")
+
+        self.assertEqual(self.client.get("/media/documentos/factura.pdf").status_code, 404)
+        self.assertEqual(self.client.get("/media/portadas/../documentos/factura.pdf").status_code, 404)
@@ -0,0 +1,80 @@
+# seguridad/tests/test_metricas.py
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from biblio import auditoria, metricas
+
+from .utilidades import crear_empleado
+
+
+@override_settings(METRICAS_IPS=["127.0.0.1"], METRICAS_TOKEN="")
+class MetricasTests(TestCase):
+    def setUp(self):
+        metricas._almacen._reiniciar()
+        self.addCleanup(metricas._almacen._reiniciar)
+
+    def _texto(self, **extra):
+        res = self.client.get(reverse("metricas"), **extra)
+        self.assertEqual(res.status_code, 200)
+        return res.content.decode()
+
+    def test_peticiones_por_vista(self):
+        self.client.get(reverse("catalogo"))
+        self.client.get(reverse("catalogo"))
+
+        texto = self._texto()
+
+        self.assertIn("# TYPE biblionet_http_duracion_segundos histogram", texto)
+        self.assertIn(
+            'biblionet_http_peticiones_total{estado="200",metodo="GET",vista="catalogo"} 2', texto
+        )
+        self.assertIn('biblionet_http_duracion_segundos_bucket{vista="catalogo",le="+Inf"} 2', texto)
+        self.assertIn('biblionet_http_duracion_segundos_count{vista="catalogo"} 2', texto)
+        self.assertIn('biblionet_bd_consultas_total{vista="catalogo"}', texto)
+
+    def test_suma_los_archivos_de_otros_procesos(self):
+        with tempfile.TemporaryDirectory() as directorio, override_settings(METRICAS_DIR=directorio):
+            otro_worker = metricas._Almacen()
+            otro_worker.sumar([("eventos", 3, {"codigo": "venta.facturada"})])
+            otro_worker.guardar()
+            metricas.contar("eventos", 2, codigo="venta.facturada")
+
+            texto = self._texto()
+
+        self.assertIn('biblionet_eventos_total{codigo="venta.facturada"} 5', texto)
+
+    def test_eventos_desde_la_bitacora(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            auditoria.registrar(
+                crear_empleado(), "REGISTRO PRÉSTAMO", codigo="prestamo.registrado", duradero=True,
+            )
+
+        self.assertIn('biblionet_eventos_total{codigo="prestamo.registrado"} 1', self._texto())
+
+    def test_aciertos_y_fallos_de_cache(self):
+        cache.get("no-existe")
+        cache.set("libro:1", "x")
+        cache.get("libro:1")
+        cache.get("libro:1")
+
+        texto = self._texto()
+
+        self.assertIn('biblionet_cache_operaciones_total{cache="biblionet",resultado="hit"} 2', texto)
+        self.assertIn('biblionet_cache_operaciones_total{cache="biblionet",resultado="miss"} 1', texto)
+
+    @override_settings(METRICAS_IPS=["10.0.0.9"])
+    def test_ip_no_autorizada(self):
+        self.assertEqual(self.client.get(reverse("metricas")).status_code, 403)
+
+    @override_settings(METRICAS_IPS=[])
+    def test_sin_ips_ni_token_nadie_lee(self):
+        # Producción detrás de nginx: sin token, ni 127.0.0.1 pasa
+        self.assertEqual(self.client.get(reverse("metricas")).status_code, 403)
+
+    @override_settings(METRICAS_TOKEN="secreto")
+    def test_token(self):
+        self.assertEqual(self.client.get(reverse("metricas")).status_code, 403)
+        self._texto(HTTP_AUTHORIZATION="Bearer secreto")
@@ -0,0 +1,89 @@
+# seguridad/tests/test_presupuesto_consultas.py
+"""
+Presupuesto de consultas SQL por vista.
+
+Si un cambio sube el número de consultas de una vista, este test falla:
+o se corrige la vista, o se sube su número en PRESUPUESTOS a propósito
+(y se revisa en el PR). Cada vista se mide con dos volúmenes de datos
+para que un N+1 no pase por debajo del presupuesto con pocos registros.
+"""
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from biblio.models import Clientes
+from seguridad.datos_sinteticos import generar
+
+from .utilidades import crear_empleado, iniciar_sesion_empleado
+
+# vista (nombre de URL) -> (rol con el que se pide, máximo de consultas)
+PRESUPUESTOS = {
+    # Cliente
+    "inicio": ("cliente", 2),
+    "catalogo": ("cliente", 4),
+    "acerca_de": ("cliente", 3),
+    "pantalla_inicio_cliente": ("cliente", 2),
+    "historial_prestamos_cliente": ("cliente", 4),
+    "lista_reservas_clientes": ("cliente", 4),
+    "historial_compras_cliente": ("cliente", 5),
+    "configuracion_cliente": ("cliente", 2),
+    # Bibliotecario
+    "inventario": ("bibliotecario", 5),
+    "gestion_prestamos": ("bibliotecario", 4),
+    "registrar_prestamo": ("bibliotecario", 3),
+    "realizar_venta": ("bibliotecario", 4),
+    # Administrador
+    "panel_administrador": ("administrador", 6),
+    "panel_bibliotecario": ("administrador", 4),
+    "gestion_clientes": ("administrador", 3),
+    "configurar_reglas_prestamo": ("administrador", 3),
+    "historial_ventas": ("administrador", 5),
+    "gestion_proveedores": ("administrador", 4),
+    "gestion_compras": ("administrador", 7),
+    "bitacora": ("administrador", 4),
+    "lotes_documentos": ("administrador", 4),
+    "diagnostico_consultas": ("administrador", 2),
+}
+
+POCOS = dict(libros=30, clientes=10, prestamos=100, reservas=20, ventas=40, compras=5, solicitudes=5, semilla=1)
+MAS = dict(libros=60, clientes=20, prestamos=400, reservas=60, ventas=150, compras=20, solicitudes=15, semilla=2)
+
+
+class PresupuestoConsultasTests(TestCase):
+    def setUp(self):
+        self.empleados = {
+            "bibliotecario": crear_empleado("bibliotecario"),
+            "administrador": crear_empleado("administrador"),
+        }
+
+    def _iniciar_sesion(self, rol):
+        self.client.logout()
+        if rol == "cliente":
+            session = self.client.session
+            session["cliente_id"] = Clientes.objects.order_by("id").values_list("id", flat=True).first()
+            session.save()
+        else:
+            iniciar_sesion_empleado(self.client, self.empleados[rol])
+
+    def _medir(self):
+        medidas = {}
+        for nombre, (rol, _) in PRESUPUESTOS.items():
+            self._iniciar_sesion(rol)
+            with CaptureQueriesContext(connection) as consultas:
+                res = self.client.get(reverse(nombre))
+            self.assertEqual(res.status_code, 200, nombre)
+            medidas[nombre] = len(consultas.captured_queries)
+        return medidas
+
+    def test_ninguna_vista_supera_su_presupuesto(self):
+        generar(**POCOS)
+        pocos = self._medir()
+        generar(**MAS)
+        muchos = self._medir()
+
+        for nombre, (_, maximo) in PRESUPUESTOS.items():
+            with self.subTest(vista=nombre):
+                self.assertLessEqual(muchos[nombre], maximo)
+                # El número no depende del volumen de datos
+                self.assertEqual(pocos[nombre], muchos[nombre])
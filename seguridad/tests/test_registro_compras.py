@@ -0,0 +1,83 @@
+# seguridad/tests/test_registro_compras.py
+import shutil
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from biblio.models import Compras, DetalleCompras, Libros
+from seguridad.compras import CompraInvalida, LineaCompra, leer_lineas, registrar_compra
+
+from .utilidades import crear_empleado, crear_libro, crear_proveedor, iniciar_sesion_empleado
+
+
+class RegistroComprasTests(TestCase):
+    def setUp(self):
+        self.admin = crear_empleado("administrador")
+        self.proveedor = crear_proveedor()
+        self.libros = [crear_libro(isbn=f"97800000{i:05d}", stock=1) for i in range(30)]
+
+    def test_consultas_no_dependen_del_numero_de_lineas(self):
+        lineas = [
+            LineaCompra(libro_id=libro.id, cantidad=2, costo_unitario=Decimal("10.10"))
+            for libro in self.libros
+        ]
+        # in_bulk, número (2), compra, detalles, stock, bitácora + savepoint
+        with self.assertNumQueries(9):
+            compra = registrar_compra(self.proveedor, self.admin, "Efectivo", lineas)
+
+        self.assertEqual(compra.total, Decimal("606.00"))
+        self.assertEqual(DetalleCompras.objects.filter(compra=compra).count(), 30)
+        self.assertEqual(
+            set(Libros.objects.values_list("stock_total", flat=True)), {3},
+        )
+
+    def test_stock_nulo_cuenta_como_cero(self):
+        Libros.objects.filter(id=self.libros[0].id).update(stock_total=None)
+        lineas = [LineaCompra(libro_id=self.libros[0].id, cantidad=5, costo_unitario=Decimal("5"))]
+
+        registrar_compra(self.proveedor, self.admin, "Efectivo", lineas)
+
+        self.assertEqual(Libros.objects.get(id=self.libros[0].id).stock_total, 5)
+
+    def test_libro_inexistente_no_registra_nada(self):
+        lineas = [
+            LineaCompra(libro_id=self.libros[0].id, cantidad=1, costo_unitario=Decimal("5")),
+            LineaCompra(libro_id=999999, cantidad=1, costo_unitario=Decimal("5")),
+        ]
+        with self.assertRaises(CompraInvalida):
+            registrar_compra(self.proveedor, self.admin, "Efectivo", lineas)
+
+        self.assertFalse(Compras.objects.exists())
+        self.assertEqual(Libros.objects.get(id=self.libros[0].id).stock_total, 1)
+
+    def test_leer_lineas_usa_decimal(self):
+        lineas = leer_lineas(["1", "", "2"], ["3", "", "1"], ["0.10", "", "0.205"])
+
+        self.assertEqual([l.costo_unitario for l in lineas], [Decimal("0.10"), Decimal("0.21")])
+        self.assertEqual(lineas[0].subtotal, Decimal("0.30"))
+
+        with self.assertRaises(CompraInvalida):
+            leer_lineas(["1"], ["2"], ["abc"])
+
+    def test_vista_registra_compra(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        iniciar_sesion_empleado(self.client, self.admin)
+
+        with override_settings(MEDIA_ROOT=media, DOCUMENTOS_ROOT=Path(media) / "documentos"):
+            res = self.client.post(reverse("gestion_compras"), {
+                "agregar_compra": "1",
+                "proveedor_nombre": self.proveedor.nombre_comercial,
+                "metodo_pago": "Transferencia",
+                "libro_id[]": [self.libros[0].id, self.libros[1].id],
+                "cantidad[]": ["4", "1"],
+                "costo_unitario[]": ["12.50", "7"],
+            })
+
+        self.assertRedirects(res, reverse("gestion_compras"), fetch_redirect_response=False)
+        compra = Compras.objects.get()
+        self.assertEqual(compra.total, Decimal("57.00"))
+        self.assertEqual(Libros.objects.get(id=self.libros[0].id).stock_total, 5)
@@ -0,0 +1,87 @@
+# seguridad/tests/test_replica.py
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from biblio import replica
+from biblio.models import Libros
+
+
+def _reiniciar_retraso():
+    replica._retraso.update(valor=None, medido=float("-inf"))
+
+
+class RouterReplicaTests(SimpleTestCase):
+    def tearDown(self):
+        replica._estado.alias = None
+
+    @override_settings(REPLICA_ALIAS="replica")
+    def test_lecturas_marcadas_van_a_la_replica_y_escrituras_al_primario(self):
+        router = replica.RouterReplica()
+
+        self.assertIsNone(router.db_for_read(Libros))
+        replica._estado.alias = "replica"
+        self.assertEqual(router.db_for_read(Libros), "replica")
+        self.assertEqual(router.db_for_write(Libros), "default")
+        self.assertFalse(router.allow_migrate("replica", "biblio"))
+        self.assertIsNone(router.allow_migrate("default", "biblio"))
+
+    def test_el_streaming_lee_de_la_replica_mientras_se_genera(self):
+        def generar():
+            yield replica._estado.alias
+            yield replica._estado.alias
+
+        self.assertEqual(list(replica._en_replica("replica", generar())), ["replica", "replica"])
+        self.assertIsNone(replica._estado.alias)
+
+
+# La "réplica" es la misma BD de pruebas: se mira a dónde decide leer el router
+@override_settings(
+    REPLICA_ACTIVA=True, REPLICA_ALIAS="default", REPLICA_VISTAS=["catalogo"],
+    REPLICA_RETRASO_MAX=5, REPLICA_RETRASO_CADA=60, REPLICA_FIJAR_SEGUNDOS=10,
+)
+class ReplicaMiddlewareTests(TestCase):
+    def setUp(self):
+        _reiniciar_retraso()
+        self.addCleanup(_reiniciar_retraso)
+        self.lecturas = []
+        original = replica.RouterReplica.db_for_read
+
+        def espiar(router, model, **hints):
+            alias = original(router, model, **hints)
+            self.lecturas.append(alias)
+            return alias
+
+        parche = mock.patch.object(replica.RouterReplica, "db_for_read", espiar)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def _lee_de_replica(self, nombre="catalogo"):
+        self.lecturas.clear()
+        self.assertEqual(self.client.get(reverse(nombre)).status_code, 200)
+        return "default" in self.lecturas
+
+    def test_vistas_de_la_lista_leen_de_la_replica(self):
+        self.assertTrue(self._lee_de_replica("catalogo"))
+        self.assertFalse(self._lee_de_replica("acerca_de"))
+
+    def test_tras_escribir_la_sesion_queda_en_el_primario(self):
+        self.client.post(reverse("inicio_sesion_cliente"), {"correo": "x@x.test", "clave": "x"})
+
+        self.assertFalse(self._lee_de_replica())
+
+    def test_con_mucho_retraso_lee_del_primario(self):
+        with mock.patch.object(replica, "_medir_retraso", return_value=60.0):
+            self.assertFalse(self._lee_de_replica())
+
+    def test_replicacion_parada_lee_del_primario(self):
+        with mock.patch.object(replica, "_medir_retraso", return_value=None):
+            self.assertFalse(self._lee_de_replica())
+
+    def test_el_retraso_se_mide_una_vez_por_intervalo(self):
+        with mock.patch.object(replica, "_medir_retraso", return_value=0.0) as medir:
+            self._lee_de_replica()
+            self._lee_de_replica()
+
+        medir.assert_called_once()
@@ -0,0 +1,175 @@
+# seguridad/tests/test_resumen_ventas.py
+import importlib
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from biblio.models import DetalleVenta, ResumenVentasDiario, ResumenVentasMensual, SolicitudVenta, Ventas
+from seguridad import resumenes
+from seguridad.ventas import facturar_solicitudes
+
+from .utilidades import (
+    crear_cliente,
+    crear_empleado,
+    crear_libro,
+    crear_venta,
+    iniciar_sesion_empleado,
+)
+
+
+class ResumenVentasTests(TestCase):
+    def setUp(self):
+        self.vendedor = crear_empleado("administrador")
+        self.cliente = crear_cliente()
+        self.novela = crear_libro(isbn="9780000000001", categoria="Novela")
+        self.historia = crear_libro(isbn="9780000000002", categoria="Historia")
+
+    def _facturar(self, libro, cantidad=1, metodo_pago="Efectivo"):
+        solicitud = SolicitudVenta.objects.create(
+            cliente=self.cliente, libro=libro, cantidad=cantidad,
+        )
+        return facturar_solicitudes([solicitud.id], self.vendedor, metodo_pago)
+
+    def test_la_venta_actualiza_resumen_diario_y_mensual(self):
+        self._facturar(self.novela, cantidad=2)
+        self._facturar(self.novela)
+        self._facturar(self.historia, metodo_pago="Tarjeta")
+
+        novela = ResumenVentasDiario.objects.get(categoria="Novela")
+        self.assertEqual(novela.fecha, timezone.localdate())
+        self.assertEqual(novela.metodo_pago, "Efectivo")
+        self.assertEqual((novela.num_ventas, novela.unidades), (2, 3))
+        self.assertEqual(novela.total, Decimal("345.00"))
+
+        mensual = ResumenVentasMensual.objects.get(categoria="Historia")
+        self.assertEqual(mensual.mes, timezone.localdate().replace(day=1))
+        self.assertEqual((mensual.metodo_pago, mensual.num_ventas), ("Tarjeta", 1))
+
+    def test_reconstruir_coincide_con_lo_incremental(self):
+        for libro in (self.novela, self.historia, self.novela):
+            self._facturar(libro)
+        incremental = sorted(
+            ResumenVentasDiario.objects.values_list(
+                "fecha", "vendedor_id", "metodo_pago", "categoria", "num_ventas", "unidades", "total",
+            )
+        )
+
+        # Una venta cargada sin pasar por el servicio, en otro mes
+        vieja = crear_venta(self.cliente, self.vendedor, self.historia, cantidad=3)
+        hace_dos_meses = timezone.now() - timedelta(days=62)
+        Ventas.objects.filter(id=vieja.id).update(fecha_venta=hace_dos_meses)
+
+        ResumenVentasDiario.objects.all().delete()
+        ResumenVentasMensual.objects.all().delete()
+        call_command("reconstruir_resumen_ventas", stdout=StringIO())
+
+        fecha_vieja = timezone.localtime(hace_dos_meses).date()
+        self.assertEqual(
+            sorted(
+                ResumenVentasDiario.objects.exclude(fecha=fecha_vieja).values_list(
+                    "fecha", "vendedor_id", "metodo_pago", "categoria", "num_ventas", "unidades", "total",
+                )
+            ),
+            incremental,
+        )
+        self.assertEqual(
+            ResumenVentasMensual.objects.get(mes=fecha_vieja.replace(day=1)).unidades, 3,
+        )
+
+    def test_reconstruir_rango_no_toca_otros_dias(self):
+        self._facturar(self.novela)
+        ayer = timezone.localdate() - timedelta(days=1)
+        ResumenVentasDiario.objects.create(
+            fecha=ayer, vendedor=self.vendedor, metodo_pago="Efectivo",
+            categoria="Novela", num_ventas=7, unidades=7, total=Decimal("700.00"),
+        )
+
+        call_command(
+            "reconstruir_resumen_ventas",
+            "--desde", timezone.localdate().isoformat(),
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(ResumenVentasDiario.objects.get(fecha=ayer).num_ventas, 7)
+        self.assertEqual(ResumenVentasDiario.objects.get(fecha=timezone.localdate()).num_ventas, 1)
+
+    def test_historial_sin_filtros_lee_los_resumenes(self):
+        self._facturar(self.novela)
+        self._facturar(self.historia)
+        iniciar_sesion_empleado(self.client, self.vendedor)
+
+        res = self.client.get(reverse("historial_ventas"))
+
+        self.assertEqual(res.context["total_ventas"], 2)
+        self.assertEqual(res.context["total_monto"], Decimal("230.00"))
+        self.assertEqual(res.context["page_obj"].paginator.count, 2)
+        self.assertEqual(DetalleVenta.objects.count(), 2)
+
+    def test_historial_filtrado_solo_por_fecha_no_usa_resumenes(self):
+        self._facturar(self.novela)
+        self._facturar(self.historia)
+        iniciar_sesion_empleado(self.client, self.vendedor)
+        manana = (timezone.localdate() + timedelta(days=1)).isoformat()
+
+        res = self.client.get(reverse("historial_ventas"), {"fecha_desde": manana})
+
+        self.assertEqual(res.context["total_ventas"], 0)
+        self.assertEqual(res.context["page_obj"].paginator.count, 0)
+        self.assertContains(res, f'name="fecha_desde" class="form-control" value="{manana}"')
+
+    def test_muchas_claves_en_un_lote(self):
+        # Más claves que la profundidad máxima de una expresión en SQLite
+        hoy = timezone.localdate()
+        acumulado = {
+            (hoy - timedelta(days=i), self.vendedor.id, "Efectivo", ""): [1, 1, Decimal("10.00")]
+            for i in range(1200)
+        }
+
+        resumenes._incrementar(ResumenVentasDiario, "fecha", acumulado)
+        resumenes._incrementar(ResumenVentasDiario, "fecha", acumulado)
+
+        self.assertEqual(ResumenVentasDiario.objects.count(), 1200)
+        self.assertEqual(set(ResumenVentasDiario.objects.values_list("num_ventas", flat=True)), {2})
+
+    def test_migracion_llena_resumenes_vacios(self):
+        migracion = importlib.import_module("biblio.migrations.0015_llenar_resumenes_ventas")
+        historicas = MigrationLoader(connection).project_state(
+            ("biblio", "0015_llenar_resumenes_ventas")
+        ).apps
+        self._facturar(self.novela, cantidad=2)
+        self._facturar(self.historia, metodo_pago="Tarjeta")
+        crear_venta(self.cliente, self.vendedor, self.novela)
+        resumenes.reconstruir()
+        esperado = sorted(ResumenVentasMensual.objects.values_list(
+            "mes", "vendedor_id", "metodo_pago", "categoria", "num_ventas", "unidades", "total",
+        ))
+        ResumenVentasDiario.objects.all().delete()
+        ResumenVentasMensual.objects.all().delete()
+
+        migracion.llenar_resumenes(historicas, None)
+
+        self.assertEqual(sorted(ResumenVentasMensual.objects.values_list(
+            "mes", "vendedor_id", "metodo_pago", "categoria", "num_ventas", "unidades", "total",
+        )), esperado)
+        self.assertEqual(ResumenVentasDiario.objects.count(), 2)
+
+    def test_paginas_cuentan_las_ventas_reales(self):
+        self._facturar(self.novela)
+        self._facturar(self.historia)
+        # Borrada sin pasar por los resúmenes (admin, shell…)
+        venta = Ventas.objects.order_by("id").first()
+        venta.detalles.all().delete()
+        venta.delete()
+        iniciar_sesion_empleado(self.client, self.vendedor)
+
+        res = self.client.get(reverse("historial_ventas"))
+
+        self.assertEqual(res.context["total_ventas"], 2)  # de los resúmenes
+        self.assertEqual(res.context["page_obj"].paginator.count, 1)
@@ -0,0 +1,77 @@
+# seguridad/tests/test_secuencias.py
+from django.db import transaction
+from django.test import TestCase
+
+from biblio import secuencias
+from biblio.models import SolicitudVenta, Secuencias
+from seguridad.ventas import facturar_solicitudes
+
+from .utilidades import crear_cliente, crear_empleado, crear_libro
+
+
+class SecuenciasTests(TestCase):
+    def setUp(self):
+        secuencias.olvidar_reservas()
+        self.addCleanup(secuencias.olvidar_reservas)
+
+    def test_series_creadas_por_la_migracion(self):
+        self.assertEqual(
+            set(Secuencias.objects.values_list("nombre", flat=True)),
+            {secuencias.FACTURA_VENTA, secuencias.COMPRA, secuencias.EJEMPLAR},
+        )
+
+    def test_numeros_consecutivos_con_prefijo(self):
+        self.assertEqual(secuencias.siguiente("COMP"), "COMP-000001")
+        self.assertEqual(
+            secuencias.reservar("COMP", 3),
+            ["COMP-000002", "COMP-000003", "COMP-000004"],
+        )
+
+    def test_sin_huecos_si_la_transaccion_se_revierte(self):
+        try:
+            with transaction.atomic():
+                self.assertEqual(secuencias.siguiente("FAC"), "FAC-00000001")
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        self.assertEqual(secuencias.siguiente("FAC"), "FAC-00000001")
+
+    def test_bloques_se_reparten_desde_memoria(self):
+        Secuencias.objects.filter(nombre="EJ").update(bloque=10)
+
+        # El sobrante del bloque solo queda en memoria al confirmar
+        with self.captureOnCommitCallbacks(execute=True):
+            primero = secuencias.siguiente("EJ")
+
+        with self.assertNumQueries(0):
+            siguientes = secuencias.reservar("EJ", 4)
+
+        self.assertEqual(primero, "EJ-00000001")
+        self.assertEqual(siguientes[-1], "EJ-00000005")
+        self.assertEqual(Secuencias.objects.get(nombre="EJ").ultimo_valor, 10)
+
+    def test_bloque_revertido_no_queda_en_memoria(self):
+        Secuencias.objects.filter(nombre="EJ").update(bloque=10)
+
+        with self.captureOnCommitCallbacks(execute=False):
+            secuencias.siguiente("EJ")
+
+        self.assertEqual(secuencias._reservados, {})
+
+    def test_ventas_en_lote_reciben_numeros_correlativos(self):
+        vendedor = crear_empleado()
+        libro = crear_libro()
+        ids = [
+            SolicitudVenta.objects.create(
+                cliente=crear_cliente(dni=f"080119990000{i}"), libro=libro,
+            ).id
+            for i in range(3)
+        ]
+
+        resultado = facturar_solicitudes(ids, vendedor)
+
+        self.assertEqual(
+            [v.numero_factura for v in resultado.ventas],
+            ["FAC-00000001", "FAC-00000002", "FAC-00000003"],
+        )
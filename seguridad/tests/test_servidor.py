@@ -0,0 +1,67 @@
+# seguridad/tests/test_servidor.py
+import os
+import runpy
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from biblio import metricas
+
+CONFIG = Path(settings.BASE_DIR) / "core" / "gunicorn.conf.py"
+
+
+class SaludTests(TestCase):
+    def test_vivo(self):
+        res = self.client.get(reverse("salud_vivo"))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {"estado": "ok"})
+        self.assertIn("no-cache", res["Cache-Control"])
+
+    def test_listo_con_bd(self):
+        self.assertEqual(self.client.get(reverse("salud_listo")).status_code, 200)
+
+    def test_listo_sin_bd_responde_503(self):
+        with mock.patch.object(connection, "cursor", side_effect=OperationalError("caída")):
+            res = self.client.get(reverse("salud_listo"))
+
+        self.assertEqual(res.status_code, 503)
+
+
+class ConfiguracionGunicornTests(SimpleTestCase):
+    def test_workers_segun_nucleos_o_variable(self):
+        with mock.patch.dict(os.environ, {"GUNICORN_WORKERS": ""}):
+            por_defecto = runpy.run_path(str(CONFIG))
+        with mock.patch.dict(os.environ, {"GUNICORN_WORKERS": "3"}):
+            fijo = runpy.run_path(str(CONFIG))
+
+        self.assertEqual(por_defecto["workers"], 2 * por_defecto["_nucleos"]() + 1)
+        self.assertEqual(fijo["workers"], 3)
+        self.assertTrue(fijo["preload_app"])
+
+    def test_al_arrancar_vacia_metricas_dir(self):
+        with tempfile.TemporaryDirectory() as carpeta, override_settings(METRICAS_DIR=carpeta):
+            Path(carpeta, "123-abc.json").write_text("[]")
+            servidor = mock.Mock()
+
+            with mock.patch.dict(os.environ):
+                os.environ.pop("GUNICORN_PID", None)
+                runpy.run_path(str(CONFIG))["on_starting"](servidor)
+
+            self.assertEqual(list(Path(carpeta).iterdir()), [])
+            servidor.log.info.assert_called_once()
+
+    def test_reejecucion_con_usr2_no_vacia_metricas_dir(self):
+        with tempfile.TemporaryDirectory() as carpeta, override_settings(METRICAS_DIR=carpeta):
+            volcado = Path(carpeta, "123-abc.json")
+            volcado.write_text("[]")
+
+            with mock.patch.dict(os.environ, {"GUNICORN_PID": "4242"}):
+                runpy.run_path(str(CONFIG))["on_starting"](mock.Mock())
+
+            self.assertTrue(volcado.exists())
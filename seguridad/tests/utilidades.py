@@ -0,0 +1,93 @@
+# seguridad/tests/utilidades.py
+from decimal import Decimal
+
+from django.utils import timezone
+
+from biblio.models import (
+    Clientes,
+    DetalleVenta,
+    Libros,
+    Proveedores,
+    Roles,
+    Usuarios,
+    Ventas,
+)
+
+
+def crear_empleado(rol_nombre="bibliotecario", email=None):
+    rol, _ = Roles.objects.get_or_create(nombre=rol_nombre)
+    return Usuarios.objects.create(
+        rol=rol,
+        nombre="ana",
+        apellido="lopez",
+        email=email or f"{rol_nombre}@biblionet.test",
+        clave="x",
+        estado="activo",
+        primer_ingreso=False,
+        fecha_creacion=timezone.now(),
+    )
+
+
+def crear_cliente(dni="0801199900001"):
+    rol, _ = Roles.objects.get_or_create(nombre="cliente")
+    usuario = Usuarios.objects.create(
+        rol=rol,
+        nombre="luis",
+        apellido="perez",
+        email=f"cliente{dni}@biblionet.test",
+        clave="x",
+        estado="activo",
+    )
+    return Clientes.objects.create(usuario=usuario, dni=dni, estado="activo")
+
+
+def crear_libro(isbn="9780000000001", stock=10, precio="100.00", categoria="Novela"):
+    return Libros.objects.create(
+        isbn=isbn,
+        titulo=f"Libro {isbn}",
+        autor="Autor",
+        categoria=categoria,
+        stock_total=stock,
+        precio_venta=Decimal(precio),
+        impuesto_porcentaje=Decimal("15.00"),
+        fecha_registro=timezone.now(),
+    )
+
+
+def crear_proveedor(rtn="08011999000011"):
+    return Proveedores.objects.create(
+        nombre_comercial=f"Proveedor {rtn}",
+        rtn=rtn,
+        estado="activo",
+    )
+
+
+def crear_venta(cliente, vendedor, libro, cantidad=1, metodo_pago="Efectivo"):
+    subtotal = libro.precio_venta * cantidad
+    impuesto = (subtotal * libro.impuesto_porcentaje / 100).quantize(Decimal("0.01"))
+    venta = Ventas.objects.create(
+        cliente=cliente,
+        vendedor=vendedor,
+        metodo_pago=metodo_pago,
+        subtotal=subtotal,
+        impuesto=impuesto,
+        total=subtotal + impuesto,
+        estado="pagada",
+    )
+    DetalleVenta.objects.create(
+        venta=venta,
+        libro=libro,
+        cantidad=cantidad,
+        precio_unitario=libro.precio_venta,
+        impuesto_unitario=libro.impuesto_porcentaje,
+        total_linea=venta.total,
+    )
+    return venta
+
+
+def iniciar_sesion_empleado(client, usuario):
+    session = client.session
+    session["id_usuario"] = usuario.id
+    session["correo_usuario"] = usuario.email
+    session["rol_usuario"] = usuario.rol.nombre
+    session.save()
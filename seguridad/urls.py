@@ -11,10 +11,12 @@ urlpatterns = [
     path("empleados/registrar/", views.registrar_empleado, name="registrar_empleado"),
     path("empleados/editar/<int:empleado_id>/", views.editar_empleado, name="editar_empleado"),
     path("empleados/inventario/", views.inventario, name="inventario"),
+    path("empleados/inventario/importar/", views.importar_catalogo, name="importar_catalogo"),
     path('empleados/recuperar-contrasena/', views.recuperar_contrasena_empleado, name='recuperar_contrasena_empleado'),
 
     # Gestión de préstamos
     path("prestamos/gestion/", views.gestion_prestamos, name="gestion_prestamos"),
+    path("prestamos/exportar/", views.exportar_prestamos, name="exportar_prestamos"),
     path("prestamos/registrar/", views.registrar_prestamo, name="registrar_prestamo"),
     path("prestamos/<int:prestamo_id>/devolver/", views.devolver_prestamo, name="devolver_prestamo"),
     path("prestamos/<int:prestamo_id>/renovar/", views.renovar_prestamo, name="renovar_prestamo"),
@@ -28,12 +30,29 @@ urlpatterns = [
     #Ventas
     path("ventas/realizar/", views.realizar_venta, name="realizar_venta"),
     path("ventas/facturar/<int:solicitud_id>/", views.facturar_solicitud, name="facturar_solicitud"),
+    path("ventas/facturar-lote/", views.facturar_lote, name="facturar_lote"),
     path("ventas/historial/", views.historial_ventas, name="historial_ventas"),
+    path("ventas/exportar/", views.exportar_ventas, name="exportar_ventas"),
+    path("ventas/factura/<int:venta_id>/", views.factura_venta_pdf, name="factura_venta_pdf"),
     path("cliente/historial-compras/",views.historial_compras_cliente, name="historial_compras_cliente"),
 
     #Compras
     path("proveedores/", views.gestion_proveedores, name="gestion_proveedores"),
     path("compras/comprobante/<int:compra_id>/", views.comprobante_compra_pdf,name="comprobante_compra_pdf"),
     path("compras/", views.gestion_compras, name="gestion_compras"),
+    path("compras/exportar/", views.exportar_compras, name="exportar_compras"),
+    path("compras/importar/", views.importar_compra_csv, name="importar_compra_csv"),
     path("compras/comprobante/<int:compra_id>/", views.comprobante_compra_pdf, name="comprobante_compra_pdf"),
+
+    # Bitácora
+    path("bitacora/", views.bitacora, name="bitacora"),
+    path("bitacora/exportar/", views.exportar_bitacora, name="exportar_bitacora"),
+
+    # Consultas SQL por vista (buffer de instrumentación)
+    path("diagnostico/consultas/", views.diagnostico_consultas, name="diagnostico_consultas"),
+
+    # Lotes de documentos (ZIP de facturas / comprobantes)
+    path("documentos/lotes/", views.lotes_documentos, name="lotes_documentos"),
+    path("documentos/lotes/<int:lote_id>/estado/", views.estado_lote_documentos, name="estado_lote_documentos"),
+    path("documentos/lotes/<int:lote_id>/descargar/", views.descargar_lote_documentos, name="descargar_lote_documentos"),
 ]
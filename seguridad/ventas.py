@@ -0,0 +1,170 @@
+# seguridad/ventas.py
+"""
+Facturación de solicitudes de venta.
+
+Sirve tanto para facturar una sola solicitud (facturar_solicitud) como
+para vaciar la cola de pendientes de una vez: valida el stock de todos
+los libros con una sola consulta, crea ventas y detalles en una única
+transacción y deja los PDF en cola para generarse fuera de la petición.
+"""
+from dataclasses import dataclass, field
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import connection, transaction
+
+from biblio import auditoria, secuencias
+from biblio.models import DetalleVenta, Libros, Reservas, SolicitudVenta, Ventas
+from biblio.utils import ajustar_stock
+
+from .resumenes import registrar_ventas
+
+CENTAVOS = Decimal("0.01")
+
+
+@dataclass
+class ResultadoFacturacion:
+    ventas: list = field(default_factory=list)
+    # (solicitud o id, motivo)
+    rechazadas: list = field(default_factory=list)
+
+    @property
+    def total_facturado(self):
+        return sum((v.total for v in self.ventas), Decimal("0.00"))
+
+
+def calcular_importes(libro, cantidad):
+    """Devuelve (precio_unitario, impuesto_pct, subtotal, impuesto, total)."""
+    precio_unit = libro.precio_venta or Decimal("0.00")
+    impuesto_pct = libro.impuesto_porcentaje or Decimal("0.00")
+
+    subtotal = (precio_unit * cantidad).quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+    impuesto = (subtotal * (impuesto_pct / Decimal("100"))).quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+    return precio_unit, impuesto_pct, subtotal, impuesto, subtotal + impuesto
+
+
+def facturar_solicitudes(solicitud_ids, vendedor, metodo_pago="Efectivo"):
+    """
+    Factura las solicitudes pendientes indicadas. Las que no se pueden
+    atender (ya procesadas, sin stock suficiente) se devuelven en
+    `rechazadas` y no impiden facturar el resto.
+    """
+    resultado = ResultadoFacturacion()
+    ids = {int(i) for i in solicitud_ids}
+    if not ids:
+        return resultado
+
+    with transaction.atomic():
+        solicitudes = list(
+            SolicitudVenta.objects
+            .select_for_update()
+            .filter(id__in=ids, estado="pendiente")
+            .order_by("fecha_solicitud", "id")
+        )
+
+        encontradas = {s.id for s in solicitudes}
+        for faltante in sorted(ids - encontradas):
+            resultado.rechazadas.append(
+                (faltante, "La solicitud ya fue procesada, cancelada o no existe.")
+            )
+
+        # Todos los libros involucrados, bloqueados, en una sola consulta
+        libros = Libros.objects.select_for_update().in_bulk(
+            {s.libro_id for s in solicitudes}
+        )
+        disponible = {libro_id: libro.stock_total or 0 for libro_id, libro in libros.items()}
+
+        aceptadas = []
+        for solicitud in solicitudes:
+            libro = libros[solicitud.libro_id]
+            solicitud.libro = libro
+            cantidad = solicitud.cantidad or 1
+
+            if disponible[libro.id] < cantidad:
+                resultado.rechazadas.append((
+                    solicitud,
+                    f"No hay suficiente stock para '{libro.titulo}'. "
+                    f"Stock actual: {disponible[libro.id]}.",
+                ))
+                continue
+
+            disponible[libro.id] -= cantidad
+            aceptadas.append(solicitud)
+
+        if not aceptadas:
+            return resultado
+
+        numeros = secuencias.reservar(secuencias.FACTURA_VENTA, len(aceptadas))
+
+        ventas = []
+        for solicitud, numero_factura in zip(aceptadas, numeros):
+            _, _, subtotal, impuesto, total = calcular_importes(
+                solicitud.libro, solicitud.cantidad or 1
+            )
+            ventas.append(Ventas(
+                cliente_id=solicitud.cliente_id,
+                vendedor=vendedor,
+                metodo_pago=metodo_pago,
+                subtotal=subtotal,
+                impuesto=impuesto,
+                total=total,
+                estado="pagada",
+                numero_factura=numero_factura,
+            ))
+
+        if connection.features.can_return_rows_from_bulk_insert:
+            ventas = Ventas.objects.bulk_create(ventas)
+        else:
+            # MySQL no devuelve los ids de un INSERT múltiple
+            for venta in ventas:
+                venta.save(force_insert=True)
+
+        detalles = []
+        for solicitud, venta in zip(aceptadas, ventas):
+            cantidad = solicitud.cantidad or 1
+            precio_unit, impuesto_pct, _, _, total = calcular_importes(solicitud.libro, cantidad)
+            detalles.append(DetalleVenta(
+                venta=venta,
+                libro=solicitud.libro,
+                cantidad=cantidad,
+                precio_unitario=precio_unit,
+                impuesto_unitario=impuesto_pct,
+                total_linea=total,
+            ))
+        DetalleVenta.objects.bulk_create(detalles)
+        registrar_ventas((venta, [detalle]) for venta, detalle in zip(ventas, detalles))
+
+        # Un solo UPDATE para descontar el stock de todos los libros
+        vendidos = {}
+        for solicitud in aceptadas:
+            vendidos[solicitud.libro_id] = vendidos.get(solicitud.libro_id, 0) + (solicitud.cantidad or 1)
+        ajustar_stock({libro_id: -cantidad for libro_id, cantidad in vendidos.items()})
+        for libro_id, cantidad in vendidos.items():
+            libros[libro_id].stock_total = (libros[libro_id].stock_total or 0) - cantidad
+
+        SolicitudVenta.objects.filter(id__in=[s.id for s in aceptadas]).update(estado="atendida")
+        reservas = [s.reserva_id for s in aceptadas if s.reserva_id]
+        if reservas:
+            Reservas.objects.filter(id__in=reservas).update(estado="facturada")
+
+        # Dentro de la transacción: no puede quedar una venta sin su registro
+        auditoria.registrar_lote(
+            (
+                auditoria.entrada(
+                    vendedor,
+                    f"FACTURÓ VENTA id={venta.id} factura={venta.numero_factura} total={venta.total}",
+                    codigo="venta.facturada",
+                    entidad="venta",
+                    entidad_id=venta.id,
+                    datos={"cliente_id": venta.cliente_id, "total": str(venta.total)},
+                )
+                for venta in ventas
+            ),
+            duradero=True,
+        )
+
+        for solicitud, venta in zip(aceptadas, ventas):
+            solicitud.estado = "atendida"
+            venta.solicitud = solicitud
+
+    resultado.ventas = ventas
+    return resultado
@@ -1,11 +1,12 @@
 from functools import wraps
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
 import random
 import re
-from io import BytesIO
-from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
-from django.db import transaction, DatabaseError
-from django.http import HttpResponse
+from pathlib import Path
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.db import DatabaseError
+from django.http import FileResponse, Http404, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.decorators.csrf import csrf_protect
 from django.contrib.auth.hashers import check_password, make_password
@@ -13,8 +14,10 @@ from django.contrib.auth import logout as auth_logout
 from django.utils import timezone
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db.models import Q, Sum
+from django.db.models import Q
 from django.urls import reverse
+from biblio import auditoria, importacion, instrumentacion, secuencias
+from biblio.isbn import canonico as isbn_canonico
 from biblio.utils import actualizar_bloqueo_por_mora
 
 from biblio.models import (
@@ -22,18 +25,20 @@ from biblio.models import (
     Roles,
     Libros,
     Prestamos,
-    Bitacora,
     ReglasPrestamo,
     Clientes,
     Ejemplares,
     SolicitudVenta,
     Ventas,
-    DetalleVenta,
     Proveedores,
     Compras,
-    DetalleCompras,
+    LotesDocumentos,
 )
 
+from . import consultas, documentos, exportaciones, filtros, lotes, resumenes
+from .compras import CompraInvalida, importar_csv, leer_lineas, registrar_compra
+from .ventas import facturar_solicitudes
+
 # ---------- Helpers de sesión / roles ----------
 
 def _usuario_autenticado(request):
@@ -169,6 +174,9 @@ def panel_administrador(request):
         return redirect("cerrar_sesion")
 
     total_libros = Libros.objects.count()
+    ventas_mensuales, monto_mensual = resumenes.totales(
+        mes=timezone.localdate().replace(day=1)
+    )
 
     # Filtros de búsqueda
     query = (request.GET.get("q") or "").strip()
@@ -184,16 +192,19 @@ def panel_administrador(request):
     if estado_filtro in ["activo", "inactivo"]:
         empleados_qs = empleados_qs.filter(estado__iexact=estado_filtro)
 
-    empleados_activos = empleados_qs.filter(estado__iexact="activo").count()
+    # Activos y total (para el paginador) en un solo COUNT
+    cuenta = consultas.conteos(empleados_qs, activos=Q(estado__iexact="activo"))
+    empleados_activos = cuenta["activos"]
 
-    paginator = Paginator(empleados_qs.order_by("-fecha_creacion"), 10)
-    page_number = request.GET.get("page")
-    empleados_page = paginator.get_page(page_number)
+    empleados_page = consultas.paginar(
+        empleados_qs.order_by("-fecha_creacion"), request.GET, 10, total=cuenta["total"]
+    )
 
     contexto = {
         "usuario_actual": usuario_actual,
         "total_libros": total_libros,
-        "ventas_mensuales": None,
+        "ventas_mensuales": ventas_mensuales,
+        "monto_mensual": monto_mensual,
         "empleados_activos": empleados_activos,
         "empleados": empleados_page,
         "query": query,
@@ -275,9 +286,14 @@ def panel_bibliotecario(request):
         .order_by("-fecha_inicio")
     )
 
-    prestamos_total = prestamos_qs.count()
-    prestamos_activos = prestamos_qs.filter(estado__iexact="activo").count()
-    prestamos_en_mora = prestamos_qs.filter(estado__iexact="mora").count()
+    cuenta = consultas.conteos(
+        Prestamos.objects.all(),
+        activos=Q(estado__iexact="activo"),
+        en_mora=Q(estado__iexact="mora"),
+    )
+    prestamos_total = cuenta["total"]
+    prestamos_activos = cuenta["activos"]
+    prestamos_en_mora = cuenta["en_mora"]
 
     prestamos_bibliotecario = prestamos_qs[:20]
 
@@ -356,7 +372,7 @@ def registrar_empleado(request):
             return render(request, "seguridad/registrar_empleados.html", contexto)
 
         try:
-            Usuarios.objects.create(
+            nuevo_empleado = Usuarios.objects.create(
                 rol=objeto_rol,
                 nombre=nombre,
                 apellido=apellido,
@@ -366,10 +382,13 @@ def registrar_empleado(request):
                 fecha_creacion=timezone.localtime(),
             )
 
-            Bitacora.objects.create(
-                usuario=contexto["usuario_actual"],
-                accion=f"REGISTRO EMPLEADO: {correo} como {rol_bd}",
-                fecha=timezone.now(),
+            auditoria.registrar(
+                contexto["usuario_actual"],
+                f"REGISTRO EMPLEADO: {correo} como {rol_bd}",
+                codigo="usuario.registrado",
+                entidad="usuario",
+                entidad_id=nuevo_empleado.id,
+                datos={"email": correo, "rol": rol_bd},
             )
 
             contexto["exito"] = (
@@ -451,14 +470,13 @@ def bloquear_cliente(request, cliente_id):
 
     cliente.save()
 
-    try:
-        Bitacora.objects.create(
-            usuario=usuario_actual,
-            accion=f"BLOQUEÓ CLIENTE ID={cliente.id}",
-            fecha=timezone.now(),
-        )
-    except Exception:
-        pass
+    auditoria.registrar(
+        usuario_actual,
+        f"BLOQUEÓ CLIENTE ID={cliente.id}",
+        codigo="cliente.bloqueado",
+        entidad="cliente",
+        entidad_id=cliente.id,
+    )
 
     messages.success(request, "Cliente bloqueado correctamente.")
     return redirect("gestion_clientes")
@@ -485,14 +503,13 @@ def desbloquear_cliente(request, cliente_id):
 
     cliente.save()
 
-    try:
-        Bitacora.objects.create(
-            usuario=usuario_actual,
-            accion=f"DESBLOQUEÓ CLIENTE ID={cliente.id}",
-            fecha=timezone.now(),
-        )
-    except Exception:
-        pass
+    auditoria.registrar(
+        usuario_actual,
+        f"DESBLOQUEÓ CLIENTE ID={cliente.id}",
+        codigo="cliente.desbloqueado",
+        entidad="cliente",
+        entidad_id=cliente.id,
+    )
 
     messages.success(request, "Cliente desbloqueado correctamente.")
     return redirect("gestion_clientes")
@@ -538,15 +555,22 @@ def configurar_reglas_prestamo(request):
                     fecha_actualizacion=timezone.now(),
                 )
 
-                Bitacora.objects.create(
-                    usuario=usuario_actual,
-                    accion=(
+                auditoria.registrar(
+                    usuario_actual,
+                    (
                         "ACTUALIZÓ REGLAS DE PRÉSTAMO: "
                         f"plazo={nueva_regla.plazo_dias} días, "
                         f"límite={nueva_regla.limite_prestamos}, "
                         f"mora={nueva_regla.tarifa_mora_diaria}"
                     ),
-                    fecha=timezone.now(),
+                    codigo="reglas_prestamo.actualizadas",
+                    entidad="reglas_prestamo",
+                    entidad_id=nueva_regla.id,
+                    datos={
+                        "plazo_dias": nueva_regla.plazo_dias,
+                        "limite_prestamos": nueva_regla.limite_prestamos,
+                        "tarifa_mora_diaria": str(nueva_regla.tarifa_mora_diaria),
+                    },
                 )
 
                 messages.success(
@@ -589,7 +613,7 @@ def inventario(request):
     if request.method == "POST":
 
         if "agregar_libro" in request.POST:
-            isbn = (request.POST.get("isbn") or "").strip()
+            isbn = isbn_canonico((request.POST.get("isbn") or "").strip())
             titulo = (request.POST.get("titulo") or "").strip()
             autor = (request.POST.get("autor") or "").strip()
             categoria = (request.POST.get("categoria") or "").strip()
@@ -722,6 +746,60 @@ def inventario(request):
     return render(request, "seguridad/inventario.html", contexto)
 
 
+@requerir_rol("bibliotecario")
+@csrf_protect
+def importar_catalogo(request):
+    try:
+        usuario_actual = Usuarios.objects.select_related("rol").get(
+            id=request.session.get("id_usuario")
+        )
+    except Usuarios.DoesNotExist:
+        return redirect("cerrar_sesion")
+
+    if request.method != "POST":
+        return redirect("inventario")
+
+    archivo = request.FILES.get("archivo")
+    if archivo is None:
+        messages.error(request, "Debe adjuntar el archivo del catálogo.")
+        return redirect("inventario")
+
+    try:
+        formato = importacion.formato_por_nombre(archivo.name)
+        # El archivo se recorre por partes, sin cargarlo entero en memoria
+        reporte = importacion.importar(importacion.registros_de_archivo(formato, archivo))
+    except importacion.ImportacionInvalida as error:
+        messages.error(request, str(error))
+        return redirect("inventario")
+    except UnicodeDecodeError:
+        messages.error(request, "El archivo debe estar codificado en UTF-8.")
+        return redirect("inventario")
+
+    auditoria.registrar(
+        usuario_actual,
+        (
+            f"IMPORTÓ CATÁLOGO {archivo.name}: "
+            f"{reporte.insertados} nuevos, {reporte.actualizados} actualizados, "
+            f"{reporte.rechazados} rechazados"
+        ),
+        codigo="catalogo.importado",
+        entidad="libro",
+        datos={
+            "archivo": archivo.name,
+            "insertados": reporte.insertados,
+            "actualizados": reporte.actualizados,
+            "rechazados": reporte.rechazados,
+        },
+    )
+
+    contexto = {
+        "usuario_actual": usuario_actual,
+        "reporte": reporte,
+        "nombre_archivo": archivo.name,
+    }
+    return render(request, "seguridad/importacion_catalogo.html", contexto)
+
+
 @requerir_rol("bibliotecario")
 def gestion_prestamos(request):
 
@@ -735,18 +813,11 @@ def gestion_prestamos(request):
     query = (request.GET.get("q") or "").strip()
 
     prestamos_qs = (
-        Prestamos.objects.select_related("cliente__usuario", "ejemplar__libro")
-        .filter(estado="activo")
+        filtros.prestamos(request.GET)
+        .select_related("cliente__usuario", "ejemplar__libro")
         .order_by("-fecha_inicio")
     )
 
-    if query:
-        prestamos_qs = prestamos_qs.filter(
-            Q(cliente__usuario__nombre__icontains=query)
-            | Q(cliente__usuario__apellido__icontains=query)
-            | Q(cliente__dni__icontains=query)
-        )
-
     paginator = Paginator(prestamos_qs, 10)
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
@@ -768,18 +839,7 @@ UBICACIONES_PREDEFINIDAS = [
 
 def _crear_ejemplar_para_libro(libro):
 
-    base = f"EJ-{libro.id}-"
-    codigo = None
-
-    for _ in range(10):
-        sufijo = random.randint(1000, 9999)
-        candidato = f"{base}{sufijo}"
-        if not Ejemplares.objects.filter(codigo_interno=candidato).exists():
-            codigo = candidato
-            break
-
-    if codigo is None:
-        codigo = f"{base}{timezone.now().strftime('%H%M%S')}"
+    codigo = secuencias.siguiente(secuencias.EJEMPLAR)
 
     ubicacion = random.choice(UBICACIONES_PREDEFINIDAS)
     estado = random.choice(["nuevo", "usado"])
@@ -929,7 +989,7 @@ def registrar_prestamo(request):
             )
 
         try:
-            libro = Libros.objects.get(isbn=isbn)
+            libro = Libros.objects.get(isbn=isbn_canonico(isbn))
         except Libros.DoesNotExist:
             messages.error(request, "No se encontró un libro con ese ISBN.")
             return render(
@@ -974,15 +1034,18 @@ def registrar_prestamo(request):
             estado="activo",
         )
 
-        Bitacora.objects.create(
-            usuario=usuario_actual,
-            accion=(
+        auditoria.registrar(
+            usuario_actual,
+            (
                 "REGISTRO PRÉSTAMO: "
                 f"cliente={cliente.dni}, "
                 f"ejemplar={ejemplar.codigo_interno}, "
                 f"id_prestamo={prestamo.id}"
             ),
-            fecha=timezone.now(),
+            codigo="prestamo.registrado",
+            entidad="prestamo",
+            entidad_id=prestamo.id,
+            datos={"cliente_id": cliente.id, "ejemplar_id": ejemplar.id},
         )
 
         messages.success(request, "Préstamo registrado correctamente.")
@@ -1054,13 +1117,16 @@ def devolver_prestamo(request, prestamo_id):
         cliente.fecha_bloqueo = timezone.now()
         cliente.save()
 
-        Bitacora.objects.create(
-            usuario=usuario_actual,
-            accion=(
+        auditoria.registrar(
+            usuario_actual,
+            (
                 "DEVOLVIÓ PRÉSTAMO CON MORA "
                 f"id={prestamo.id}, cliente={cliente.dni}, días_mora={dias_mora}"
             ),
-            fecha=timezone.now(),
+            codigo="prestamo.devuelto_con_mora",
+            entidad="prestamo",
+            entidad_id=prestamo.id,
+            datos={"cliente_id": cliente.id, "dias_mora": dias_mora},
         )
 
         messages.warning(
@@ -1070,10 +1136,12 @@ def devolver_prestamo(request, prestamo_id):
             "El cliente ha sido bloqueado hasta que regularice la situación.",
         )
     else:
-        Bitacora.objects.create(
-            usuario=usuario_actual,
-            accion=f"DEVOLVIÓ PRÉSTAMO id={prestamo.id} sin mora",
-            fecha=timezone.now(),
+        auditoria.registrar(
+            usuario_actual,
+            f"DEVOLVIÓ PRÉSTAMO id={prestamo.id} sin mora",
+            codigo="prestamo.devuelto",
+            entidad="prestamo",
+            entidad_id=prestamo.id,
         )
         messages.success(request, "El préstamo se marcó como devuelto.")
 
@@ -1122,13 +1190,16 @@ def renovar_prestamo(request, prestamo_id):
     prestamo.fecha_fin = nueva_fecha
     prestamo.save()
 
-    Bitacora.objects.create(
-        usuario=Usuarios.objects.get(id=request.session.get("id_usuario")),
-        accion=(
+    auditoria.registrar(
+        request.session.get("id_usuario"),
+        (
             f"RENOVÓ PRÉSTAMO id={prestamo.id} "
             f"nueva_fecha={nueva_fecha}"
         ),
-        fecha=timezone.now(),
+        codigo="prestamo.renovado",
+        entidad="prestamo",
+        entidad_id=prestamo.id,
+        datos={"nueva_fecha": nueva_fecha.isoformat()},
     )
 
     messages.success(request, "El préstamo se renovó correctamente.")
@@ -1155,180 +1226,112 @@ def realizar_venta(request):
             messages.error(request, "Debes seleccionar la solicitud y el método de pago.")
             return redirect("realizar_venta")
 
-        solicitud = get_object_or_404(
-            SolicitudVenta.objects.select_related(
-                "cliente",
-                "cliente__usuario",
-                "libro",
-                "reserva",
-            ),
-            id=solicitud_id,
-        )
+        get_object_or_404(SolicitudVenta, id=solicitud_id)
 
-        if solicitud.estado != "pendiente":
-            messages.error(request, "Esta solicitud ya fue atendida o cancelada.")
+        resultado = facturar_solicitudes([solicitud_id], usuario_actual, metodo_pago)
+        if not resultado.ventas:
+            _, motivo = resultado.rechazadas[0]
+            messages.error(request, motivo)
             return redirect("realizar_venta")
 
-        libro = solicitud.libro
-        cliente = solicitud.cliente
-        cantidad = solicitud.cantidad or 1
+        venta = resultado.ventas[0]
+        cliente = venta.solicitud.cliente
 
-        stock_disponible = libro.stock_total or 0
-        if stock_disponible < cantidad:
-            messages.error(
-                request,
-                f"No hay suficiente stock para '{libro.titulo}'. "
-                f"Disponible: {stock_disponible}, requerido: {cantidad}."
-            )
-            return redirect("realizar_venta")
-
-        precio_unitario = libro.precio_venta or Decimal("0.00")
-        porcentaje_impuesto = libro.impuesto_porcentaje or Decimal("0.00")
-
-        impuesto_unitario = precio_unitario * porcentaje_impuesto / Decimal("100")
-        subtotal = precio_unitario * cantidad
-        impuesto_total = impuesto_unitario * cantidad
-        total = subtotal + impuesto_total
-
-        with transaction.atomic():
-            venta = Ventas.objects.create(
-                cliente=cliente,
-                vendedor=usuario_actual,
-                metodo_pago=metodo_pago,
-                subtotal=subtotal,
-                impuesto=impuesto_total,
-                total=total,
-                estado="pagada",
-            )
-
-            DetalleVenta.objects.create(
-                venta=venta,
-                libro=libro,
-                cantidad=cantidad,
-                precio_unitario=precio_unitario,
-                impuesto_unitario=impuesto_unitario,
-                total_linea=total,
-            )
-
-            libro.stock_total = stock_disponible - cantidad
-            libro.save()
-
-            solicitud.estado = "atendida"
-            solicitud.save()
-
-            if solicitud.reserva:
-                solicitud.reserva.estado = "facturada"
-                solicitud.reserva.save()
+        # La factura se dibuja ahora; reimprimirla luego es solo leer el archivo
+        try:
+            documentos.documento_factura(venta.id)
+        except ImportError:
+            pass
 
         messages.success(
             request,
             f"Venta #{venta.id} registrada para {cliente.usuario.nombre} "
-            f"{cliente.usuario.apellido}. Total L. {total}."
+            f"{cliente.usuario.apellido}. Total L. {venta.total}."
         )
         return redirect("realizar_venta")
 
-    solicitudes = (
+    solicitudes_qs = (
         SolicitudVenta.objects
         .select_related("cliente", "cliente__usuario", "libro")
         .filter(estado="pendiente")
-        .order_by("fecha_solicitud")
+        .order_by("fecha_solicitud", "id")
     )
 
+    paginator = Paginator(solicitudes_qs, 50)
+    page_number = request.GET.get("page")
+    solicitudes = paginator.get_page(page_number)
+
     contexto = {
         "usuario_actual": usuario_actual,
         "solicitudes": solicitudes,
+        "total_pendientes": paginator.count,
     }
     return render(request, "seguridad/realizar_venta.html", contexto)
 
+
+@requerir_rol("bibliotecario")
+@csrf_protect
+def facturar_lote(request):
+    """
+    Factura de una vez todas las solicitudes marcadas en realizar_venta.
+    Los PDF se generan en segundo plano (lote de documentos).
+    """
+    if request.method != "POST":
+        return redirect("realizar_venta")
+
+    try:
+        usuario_actual = Usuarios.objects.select_related("rol").get(
+            id=request.session.get("id_usuario")
+        )
+    except Usuarios.DoesNotExist:
+        return redirect("cerrar_sesion")
+
+    solicitud_ids = [i for i in request.POST.getlist("solicitud_ids") if i.isdigit()]
+    metodo_pago = (request.POST.get("metodo_pago") or "Efectivo").strip() or "Efectivo"
+
+    if not solicitud_ids:
+        messages.error(request, "Selecciona al menos una solicitud para facturar.")
+        return redirect("realizar_venta")
+
+    resultado = facturar_solicitudes(solicitud_ids, usuario_actual, metodo_pago)
+
+    lote = None
+    if resultado.ventas:
+        lote = lotes.crear_lote(
+            documentos.TIPO_FACTURA,
+            {"ids": [venta.id for venta in resultado.ventas]},
+            usuario=usuario_actual,
+        )
+
+    contexto = {
+        "usuario_actual": usuario_actual,
+        "resultado": resultado,
+        "metodo_pago": metodo_pago,
+        "lote": lote,
+    }
+    return render(request, "seguridad/resumen_facturacion.html", contexto)
+
 def _generar_factura_pdf(venta):
+    """
+    Respuesta con el PDF de la factura. Se dibuja una sola vez y luego
+    se sirve desde el almacén de documentos.
+    """
+    registro = documentos.documento_factura(venta.id)
+    return documentos.respuesta_documento(registro, f"factura_{venta.id}.pdf")
 
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.pagesizes import letter
-
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
-
-    width, height = letter
-    x_margin = 40
-    y = height - 50
-
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(x_margin, y, "BiblioNet - Factura")
-    y -= 30
-
-    c.setFont("Helvetica", 10)
-    c.drawString(x_margin, y, f"N° factura: {venta.id}")
-    y -= 15
-    c.drawString(x_margin, y, f"Fecha: {venta.fecha_venta.strftime('%d/%m/%Y %H:%M')}")
-    y -= 15
-
-    cliente = venta.cliente
-    c.drawString(x_margin, y, f"Cliente: {cliente.usuario.nombre} {cliente.usuario.apellido}")
-    y -= 15
-    c.drawString(x_margin, y, f"DNI: {cliente.dni}")
-    y -= 15
-
-    c.drawString(x_margin, y, f"Vendedor: {venta.vendedor.nombre} {venta.vendedor.apellido}")
-    y -= 25
-
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(x_margin, y, "Detalle de la venta")
-    y -= 20
-
-    c.setFont("Helvetica-Bold", 9)
-    c.drawString(x_margin, y, "Libro")
-    c.drawString(x_margin + 220, y, "Cant.")
-    c.drawString(x_margin + 260, y, "P. Unit")
-    c.drawString(x_margin + 340, y, "Impuesto")
-    c.drawString(x_margin + 420, y, "Total")
-    y -= 15
-    c.line(x_margin, y, width - x_margin, y)
-    y -= 15
-
-    c.setFont("Helvetica", 9)
-    for det in venta.detalles.all():
-        if y < 100:
-            c.showPage()
-            y = height - 50
-            c.setFont("Helvetica", 9)
-
-        c.drawString(x_margin, y, det.libro.titulo[:30])
-        c.drawString(x_margin + 220, y, str(det.cantidad))
-        c.drawRightString(x_margin + 310, y, f"L. {det.precio_unitario:.2f}")
-        c.drawRightString(x_margin + 390, y, f"{det.impuesto_unitario:.2f}%")
-        c.drawRightString(x_margin + 480, y, f"L. {det.total_linea:.2f}")
-        y -= 15
-
-    y -= 20
-    c.line(x_margin, y, width - x_margin, y)
-    y -= 15
-
-    c.setFont("Helvetica-Bold", 10)
-    c.drawRightString(x_margin + 400, y, "Subtotal:")
-    c.drawRightString(x_margin + 480, y, f"L. {venta.subtotal:.2f}")
-    y -= 15
-
-    c.drawRightString(x_margin + 400, y, "Impuesto:")
-    c.drawRightString(x_margin + 480, y, f"L. {venta.impuesto:.2f}")
-    y -= 15
-
-    c.drawRightString(x_margin + 400, y, "Total:")
-    c.drawRightString(x_margin + 480, y, f"L. {venta.total:.2f}")
-    y -= 30
-
-    c.setFont("Helvetica-Oblique", 9)
-    c.drawString(x_margin, y, "Gracias por su compra.")
-
-    c.showPage()
-    c.save()
-
-    pdf = buffer.getvalue()
-    buffer.close()
-
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = f'inline; filename="factura_{venta.id}.pdf"'
-    response.write(pdf)
-    return response
+
+@requerir_rol("administrador", "bibliotecario")
+def factura_venta_pdf(request, venta_id):
+    venta = get_object_or_404(Ventas, id=venta_id)
+
+    try:
+        return _generar_factura_pdf(venta)
+    except ImportError:
+        messages.error(
+            request,
+            "Falta la librería reportlab para generar el PDF de la factura."
+        )
+        return redirect("historial_ventas")
 
 
 def historial_ventas(request):
@@ -1345,32 +1348,30 @@ def historial_ventas(request):
     if usuario_actual.rol.nombre != "administrador":
         return redirect("panel_bibliotecario")
 
+    q = (request.GET.get("q") or "").strip()
+    estado = (request.GET.get("estado") or "").strip()
+    fecha_desde = (request.GET.get("fecha_desde") or "").strip()
+    fecha_hasta = (request.GET.get("fecha_hasta") or "").strip()
+
     ventas_qs = (
-        Ventas.objects
+        filtros.ventas(request.GET)
         .select_related("cliente__usuario", "vendedor")
         .order_by("-id")
     )
 
-    q = (request.GET.get("q") or "").strip()
-    estado = (request.GET.get("estado") or "").strip()
-
-    if q:
-        ventas_qs = ventas_qs.filter(
-            Q(cliente__dni__icontains=q) |
-            Q(cliente__usuario__nombre__icontains=q) |
-            Q(cliente__usuario__apellido__icontains=q) |
-            Q(vendedor__nombre__icontains=q) |
-            Q(vendedor__apellido__icontains=q) |
-            Q(id__icontains=q)
-        )
-
-    if estado:
-        ventas_qs = ventas_qs.filter(estado__iexact=estado)
+    paginator = Paginator(ventas_qs, 20)
 
-    total_ventas = ventas_qs.count()
-    total_monto = ventas_qs.aggregate(suma=Sum("total"))["suma"] or Decimal("0.00")
+    if filtros.hay_filtros(request.GET):
+        total_ventas, total_monto = consultas.totales_ventas(ventas_qs)
+        total_monto = total_monto or Decimal("0.00")
+        # El paginador reutiliza el conteo en lugar de su propio COUNT(*)
+        paginator.count = total_ventas
+    else:
+        # Sin filtros, los totales salen de los resúmenes mensuales. Las
+        # páginas sí cuentan las filas reales: una venta creada o borrada
+        # fuera de facturar_solicitudes no pasa por los resúmenes.
+        total_ventas, total_monto = resumenes.totales()
 
-    paginator = Paginator(ventas_qs, 20)
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
 
@@ -1379,6 +1380,8 @@ def historial_ventas(request):
         "page_obj": page_obj,
         "query": q,
         "estado_filtro": estado,
+        "fecha_desde": fecha_desde,
+        "fecha_hasta": fecha_hasta,
         "total_ventas": total_ventas,
         "total_monto": total_monto,
     }
@@ -1395,14 +1398,15 @@ def historial_compras_cliente(request):
         messages.error(request, "Debes iniciar sesión para ver tu historial de compras.")
         return redirect("inicio_sesion_cliente")
 
-    cliente = get_object_or_404(Clientes, id=request.session["cliente_id"])
+    cliente = get_object_or_404(
+        Clientes.objects.select_related("usuario"), id=request.session["cliente_id"]
+    )
     usuario = cliente.usuario
 
     ventas_qs = (
         Ventas.objects
-        .select_related("cliente__usuario", "vendedor")
         .filter(cliente=cliente)
-        .filter(estado__iexact="pagada")
+        .filter(estado="pagada")
         .order_by("-id")
     )
 
@@ -1415,12 +1419,13 @@ def historial_compras_cliente(request):
             Q(vendedor__apellido__icontains=q)
         )
 
-    total_compras = ventas_qs.count()
-    total_gastado = ventas_qs.aggregate(suma=Sum("total"))["suma"] or Decimal("0.00")
+    total_compras, total_gastado = consultas.totales_ventas(ventas_qs)
+    total_gastado = total_gastado or Decimal("0.00")
 
-    paginator = Paginator(ventas_qs, 10)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    page_obj = consultas.paginar(
+        consultas.ventas_cliente(ventas_qs), request.GET, 10, consultas.detalles_venta(),
+        total=total_compras,
+    )
 
     contexto = {
         "cliente": cliente,
@@ -1450,15 +1455,7 @@ def facturar_solicitud(request, solicitud_id):
     except Usuarios.DoesNotExist:
         return redirect("cerrar_sesion")
 
-    solicitud = get_object_or_404(
-        SolicitudVenta.objects.select_related(
-            "cliente",
-            "cliente__usuario",
-            "libro",
-            "reserva",
-        ),
-        id=solicitud_id,
-    )
+    solicitud = get_object_or_404(SolicitudVenta, id=solicitud_id)
 
     if solicitud.estado != "pendiente":
         messages.info(
@@ -1467,58 +1464,15 @@ def facturar_solicitud(request, solicitud_id):
         )
         return redirect("realizar_venta")
 
-    cliente = solicitud.cliente
-    libro = solicitud.libro
-    cantidad = solicitud.cantidad or 1
-
-    if libro.stock_total is None or libro.stock_total < cantidad:
-        messages.error(
-            request,
-            f"No hay suficiente stock para '{libro.titulo}'. "
-            f"Stock actual: {libro.stock_total or 0}."
-        )
-        return redirect("realizar_venta")
-
-    precio_unit = libro.precio_venta or Decimal("0.00")
-    impuesto_pct = libro.impuesto_porcentaje or Decimal("0.00")
-
-    subtotal = (precio_unit * cantidad).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-    impuesto = (subtotal * (impuesto_pct / Decimal("100"))).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-    total = subtotal + impuesto
-
     metodo_pago = (request.POST.get("metodo_pago") or "Efectivo").strip() or "Efectivo"
 
-    with transaction.atomic():
-        venta = Ventas.objects.create(
-            cliente=cliente,
-            vendedor=usuario_actual,
-            metodo_pago=metodo_pago,
-            subtotal=subtotal,
-            impuesto=impuesto,
-            total=total,
-            estado="pagada",
-        )
-
-        DetalleVenta.objects.create(
-            venta=venta,
-            libro=libro,
-            cantidad=cantidad,
-            precio_unitario=precio_unit,
-            impuesto_unitario=impuesto_pct,
-            total_linea=total,
-        )
-
-        libro.stock_total = (libro.stock_total or 0) - cantidad
-        if libro.stock_total < 0:
-            libro.stock_total = 0
-        libro.save()
-
-        if solicitud.reserva:
-            solicitud.reserva.estado = "facturada"
-            solicitud.reserva.save()
+    resultado = facturar_solicitudes([solicitud.id], usuario_actual, metodo_pago)
+    if not resultado.ventas:
+        _, motivo = resultado.rechazadas[0]
+        messages.error(request, motivo)
+        return redirect("realizar_venta")
 
-        solicitud.estado = "atendida"
-        solicitud.save()
+    venta = resultado.ventas[0]
 
     try:
         return _generar_factura_pdf(venta)
@@ -1875,28 +1829,8 @@ def gestion_compras(request):
     fecha_desde = (request.GET.get("fecha_desde") or "").strip()
     fecha_hasta = (request.GET.get("fecha_hasta") or "").strip()
 
-    # Base queryset (ya con proveedor, usuario y detalles)
-    compras_qs = (
-        Compras.objects
-        .select_related("proveedor", "usuario")
-        .prefetch_related("detalles__libro")
-        .all()
-        .order_by("-fecha", "-id")
-    )
-
-    # Filtros de búsqueda
-    if query:
-        compras_qs = compras_qs.filter(
-            Q(proveedor__nombre_comercial__icontains=query) |
-            Q(proveedor__rtn__icontains=query) |
-            Q(numero_factura__icontains=query)
-        )
-
-    if fecha_desde:
-        compras_qs = compras_qs.filter(fecha__date__gte=fecha_desde)
-
-    if fecha_hasta:
-        compras_qs = compras_qs.filter(fecha__date__lte=fecha_hasta)
+    # Base queryset + filtros de búsqueda; los detalles se cargan solo para la página
+    compras_qs = consultas.compras(filtros.compras(request.GET)).order_by("-fecha", "-id")
 
     # ------------------------------
     # POST: crear o editar una compra
@@ -1940,105 +1874,23 @@ def gestion_compras(request):
                 messages.error(request, "Debe seleccionar un método de pago.")
                 return redirect("gestion_compras")
 
-            # Validar ítems
-            items = []
-            for idx, libro_id in enumerate(libro_ids):
-                libro_id = (libro_id or "").strip()
-                cant = (cantidades[idx] if idx < len(cantidades) else "").strip()
-                costo = (costos[idx] if idx < len(costos) else "").strip()
-
-                # Fila completamente vacía → la ignoramos
-                if not (libro_id or cant or costo):
-                    continue
-
-                if not (libro_id and cant and costo):
-                    messages.error(
-                        request,
-                        "Todas las filas deben tener libro, cantidad y costo unitario. "
-                        "Elimine las filas que no vaya a usar."
-                    )
-                    return redirect("gestion_compras")
-
-                libro = get_object_or_404(Libros, id=libro_id)
-
-                try:
-                    cant_int = int(cant)
-                    costo_dec = float(costo)
-                except ValueError:
-                    messages.error(request, "Cantidad y costo unitario deben ser numéricos.")
-                    return redirect("gestion_compras")
-
-                if cant_int <= 0:
-                    messages.error(request, "La cantidad debe ser mayor que cero.")
-                    return redirect("gestion_compras")
-
-                if costo_dec <= 0:
-                    messages.error(request, "El costo unitario debe ser mayor que cero.")
-                    return redirect("gestion_compras")
-
-                subtotal = cant_int * costo_dec
-                items.append({
-                    "libro": libro,
-                    "cantidad": cant_int,
-                    "costo_unitario": costo_dec,
-                    "subtotal": subtotal,
-                })
-
-            if not items:
-                messages.error(request, "Debe agregar al menos un libro a la compra.")
-                return redirect("gestion_compras")
-
-            # Número de factura: SIEMPRE automático
-            ultima = Compras.objects.order_by("-id").first()
-            siguiente = (ultima.id if ultima else 0) + 1
-            numero_factura = f"FAC-{siguiente:06d}"
-
-            total_compra = sum(i["subtotal"] for i in items)
-
-            # Guardar SOLO fecha (sin hora)
-            fecha_hoy = timezone.now().date()
-
             try:
-                compra = Compras.objects.create(
-                    proveedor=proveedor,
-                    usuario=usuario_actual,
-                    numero_factura=numero_factura,
-                    fecha=fecha_hoy,
-                    total=total_compra,
-                    metodo_pago=metodo_pago,
-                )
-            except Exception:
+                lineas = leer_lineas(libro_ids, cantidades, costos)
+                compra = registrar_compra(proveedor, usuario_actual, metodo_pago, lineas)
+            except CompraInvalida as error:
+                messages.error(request, str(error))
+                return redirect("gestion_compras")
+            except DatabaseError:
                 messages.error(
                     request,
                     "Error al registrar la compra. Verifique que los datos sean correctos."
                 )
                 return redirect("gestion_compras")
 
-            # Crear detalles y actualizar stock
-            for item in items:
-                DetalleCompras.objects.create(
-                    compra=compra,
-                    libro=item["libro"],
-                    cantidad=item["cantidad"],
-                    costo_unitario=item["costo_unitario"],
-                    subtotal=item["subtotal"],
-                )
-
-                libro = item["libro"]
-                libro.stock_total = (libro.stock_total or 0) + item["cantidad"]
-                libro.save()
-
-            # Bitácora
-            Bitacora.objects.create(
-                usuario=usuario_actual,
-                accion=(
-                    f"REGISTRÓ COMPRA id={compra.id} "
-                    f"factura={compra.numero_factura} "
-                    f"proveedor={compra.proveedor.nombre_comercial} "
-                    f"total={compra.total}"
-                ),
-                fecha=timezone.now(),
-            )
+            try:
+                documentos.documento_comprobante_compra(compra.id)
+            except ImportError:
+                pass
 
             messages.success(request, "La compra se registró correctamente.")
             return redirect("gestion_compras")
@@ -2083,16 +1935,22 @@ def gestion_compras(request):
             compra.proveedor = proveedor
             compra.metodo_pago = metodo_pago
             compra.save()
+            # El comprobante guardado muestra el proveedor y el método anteriores
+            documentos.invalidar_documento(documentos.TIPO_COMPROBANTE_COMPRA, compra.id)
 
-            Bitacora.objects.create(
-                usuario=usuario_actual,
-                accion=(
+            auditoria.registrar(
+                usuario_actual,
+                (
                     f"EDITÓ COMPRA id={compra.id} "
                     f"factura={compra.numero_factura} "
                     f"proveedor={compra.proveedor.nombre_comercial} "
                     f"total={compra.total}"
                 ),
-                fecha=timezone.now(),
+                codigo="compra.editada",
+                entidad="compra",
+                entidad_id=compra.id,
+                datos={"proveedor_id": proveedor.id, "metodo_pago": metodo_pago},
+                duradero=True,
             )
 
             messages.success(request, "La compra se actualizó correctamente.")
@@ -2101,13 +1959,11 @@ def gestion_compras(request):
     # ------------------------------
     # GET / después de procesar POST
     # ------------------------------
-    paginator = Paginator(compras_qs, 10)
-    page_number = request.GET.get("page")
-    compras = paginator.get_page(page_number)
+    compras = consultas.paginar(compras_qs, request.GET, 10, consultas.detalles_compra())
 
     # Solo proveedores ACTIVOS para los selects del HTML
     proveedores = Proveedores.objects.filter(estado="activo").order_by("nombre_comercial")
-    libros = Libros.objects.all().order_by("titulo")
+    libros = consultas.libros_para_select()
 
     context = {
         "compras": compras,
@@ -2122,145 +1978,289 @@ def gestion_compras(request):
     return render(request, "seguridad/gestion_compras.html", context)
 
 
+@requerir_rol("administrador", "bibliotecario")
+@csrf_protect
+def importar_compra_csv(request):
+    try:
+        usuario_actual = Usuarios.objects.select_related("rol").get(
+            id=request.session.get("id_usuario")
+        )
+    except Usuarios.DoesNotExist:
+        return redirect("cerrar_sesion")
+
+    if request.method != "POST":
+        return redirect("gestion_compras")
+
+    proveedor_nombre = (request.POST.get("proveedor_nombre") or "").strip()
+    metodo_pago = (request.POST.get("metodo_pago") or "").strip()
+    archivo = request.FILES.get("archivo")
+    simular = bool(request.POST.get("simular"))
+
+    proveedor = Proveedores.objects.filter(
+        nombre_comercial=proveedor_nombre, estado="activo"
+    ).first()
+    if proveedor is None:
+        messages.error(request, "El proveedor indicado no existe o no está activo.")
+        return redirect("gestion_compras")
+
+    if not metodo_pago:
+        messages.error(request, "Debe seleccionar un método de pago.")
+        return redirect("gestion_compras")
+
+    if archivo is None:
+        messages.error(request, "Debe adjuntar el archivo CSV del proveedor.")
+        return redirect("gestion_compras")
+
+    # El archivo se recorre línea por línea, sin cargarlo entero en memoria
+    lineas = (linea.decode("utf-8-sig") for linea in archivo)
+
+    try:
+        reporte = importar_csv(lineas, proveedor, usuario_actual, metodo_pago, simular=simular)
+    except CompraInvalida as error:
+        messages.error(request, str(error))
+        return redirect("gestion_compras")
+    except UnicodeDecodeError:
+        messages.error(request, "El archivo debe estar codificado en UTF-8.")
+        return redirect("gestion_compras")
+
+    if reporte.compra:
+        try:
+            documentos.documento_comprobante_compra(reporte.compra.id)
+        except ImportError:
+            pass
+
+    contexto = {
+        "usuario_actual": usuario_actual,
+        "reporte": reporte,
+        "proveedor": proveedor,
+        "metodo_pago": metodo_pago,
+        "nombre_archivo": archivo.name,
+    }
+    return render(request, "seguridad/importacion_compras.html", contexto)
+
+
 @requerir_rol("administrador")
 def comprobante_compra_pdf(request, compra_id):
-    compra = get_object_or_404(
-        Compras.objects
-        .select_related("proveedor", "usuario")
-        .prefetch_related("detalles__libro"),
-        id=compra_id,
-    )
+    compra = get_object_or_404(Compras, id=compra_id)
 
     return _generar_comprobante_compra_pdf(compra)
 
 
 def _generar_comprobante_compra_pdf(compra):
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.pagesizes import letter
+    registro = documentos.documento_comprobante_compra(compra.id)
+    filename = f"comprobante_{compra.numero_factura}.pdf"
+    return documentos.respuesta_documento(registro, filename, adjunto=True)
 
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
 
-    width, height = letter
-    x_margin = 40
-    y = height - 50
+#------------------- Lotes de documentos ---------------------
 
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(x_margin, y, "BiblioNet")
-    y -= 22
-    c.setFont("Helvetica", 12)
-    c.drawString(x_margin, y, "Comprobante de compra")
-    y -= 30
+@requerir_rol("administrador")
+@csrf_protect
+def lotes_documentos(request):
+    try:
+        usuario_actual = Usuarios.objects.get(id=request.session.get("id_usuario"))
+    except Usuarios.DoesNotExist:
+        return redirect("cerrar_sesion")
 
-    c.setFont("Helvetica", 10)
-    c.drawString(x_margin, y, f"N° factura: {compra.numero_factura}")
-    y -= 15
+    if request.method == "POST":
+        tipo = (request.POST.get("tipo") or "").strip()
+        fecha_desde = (request.POST.get("fecha_desde") or "").strip()
+        fecha_hasta = (request.POST.get("fecha_hasta") or "").strip()
+        proveedor_id = (request.POST.get("proveedor_id") or "").strip()
+
+        if tipo not in (documentos.TIPO_FACTURA, documentos.TIPO_COMPROBANTE_COMPRA):
+            messages.error(request, "Selecciona el tipo de documento.")
+            return redirect("lotes_documentos")
+
+        criterios = {}
+        if fecha_desde:
+            criterios["fecha_desde"] = fecha_desde
+        if fecha_hasta:
+            criterios["fecha_hasta"] = fecha_hasta
+        if tipo == documentos.TIPO_COMPROBANTE_COMPRA and proveedor_id.isdigit():
+            criterios["proveedor_id"] = int(proveedor_id)
+
+        lote = lotes.crear_lote(tipo, criterios, usuario=usuario_actual)
+        messages.success(
+            request,
+            f"Lote #{lote.id} en cola. Puedes seguir trabajando mientras se genera el ZIP."
+        )
+        return redirect("lotes_documentos")
 
-    if compra.fecha:
-        c.drawString(x_margin, y, f"Fecha de compra: {compra.fecha.strftime('%d/%m/%Y')}")
-    else:
-        c.drawString(x_margin, y, "Fecha de compra: —")
-    y -= 15
-
-    metodo = compra.metodo_pago or "—"
-    c.drawString(x_margin, y, f"Método de pago: {metodo}")
-    y -= 15
-
-    if compra.usuario:
-        c.drawString(
-            x_margin,
-            y,
-            f"Registrado por: {compra.usuario.nombre} {compra.usuario.apellido}"
+    contexto = {
+        "usuario_actual": usuario_actual,
+        "lotes": LotesDocumentos.objects.order_by("-id")[:20],
+        "proveedores": Proveedores.objects.order_by("nombre_comercial"),
+    }
+    return render(request, "seguridad/lotes_documentos.html", contexto)
+
+
+@requerir_rol("administrador", "bibliotecario")
+def estado_lote_documentos(request, lote_id):
+    lote = get_object_or_404(LotesDocumentos, id=lote_id)
+
+    return JsonResponse({
+        "id": lote.id,
+        "estado": lote.estado,
+        "total": lote.total,
+        "procesados": lote.procesados,
+        "porcentaje": lote.porcentaje,
+        "error": lote.error,
+        "descarga": (
+            reverse("descargar_lote_documentos", args=[lote.id])
+            if lote.estado == "terminado" else None
+        ),
+    })
+
+
+@requerir_rol("administrador", "bibliotecario")
+def descargar_lote_documentos(request, lote_id):
+    lote = get_object_or_404(LotesDocumentos, id=lote_id, estado="terminado")
+
+    ruta = Path(settings.MEDIA_ROOT) / lote.archivo
+    if not ruta.exists():
+        raise Http404("El archivo del lote ya no existe.")
+
+    return FileResponse(
+        open(ruta, "rb"),
+        as_attachment=True,
+        filename=f"{lote.tipo}_lote_{lote.id}.zip",
+    )
+
+
+# ---------- Bitácora ----------
+
+TAMANO_PAGINA_BITACORA = 50
+_EPOCA = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _cursor_bitacora(entrada):
+    """(fecha, id) de la última fila mostrada, como texto para la URL."""
+    micros = (entrada.fecha - _EPOCA) // timedelta(microseconds=1)
+    return f"{micros}-{entrada.id}"
+
+
+def _leer_cursor_bitacora(valor):
+    try:
+        micros, entrada_id = (int(parte) for parte in valor.split("-", 1))
+    except ValueError:
+        return None
+    return _EPOCA + timedelta(microseconds=micros), entrada_id
+
+
+@requerir_rol("administrador")
+def bitacora(request):
+    """
+    Navegador de la bitácora. Pagina con un cursor sobre (fecha, id) en
+    lugar de OFFSET y sin COUNT: cada página es un rango del índice, sin
+    importar cuántos millones de filas tenga la tabla.
+    """
+    try:
+        usuario_actual = Usuarios.objects.select_related("rol").get(
+            id=request.session.get("id_usuario")
         )
-    else:
-        c.drawString(x_margin, y, "Registrado por: —")
-    y -= 25
-
-    proveedor = compra.proveedor
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(x_margin, y, "Proveedor")
-    y -= 18
-
-    c.setFont("Helvetica", 10)
-    c.drawString(x_margin, y, f"Nombre comercial: {proveedor.nombre_comercial}")
-    y -= 15
-    c.drawString(x_margin, y, f"RTN: {proveedor.rtn}")
-    y -= 15
-
-    tel = proveedor.telefono or "—"
-    c.drawString(x_margin, y, f"Teléfono: {tel}")
-    y -= 15
-
-    direccion = proveedor.direccion or "—"
-    c.drawString(x_margin, y, f"Dirección: {direccion}")
-    y -= 25
-
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(x_margin, y, "Libros de la compra")
-    y -= 20
-
-    c.setFont("Helvetica-Bold", 9)
-    c.drawString(x_margin, y, "Libro")
-    c.drawString(x_margin + 260, y, "Cant.")
-    c.drawRightString(x_margin + 360, y, "Costo unit.")
-    c.drawRightString(x_margin + 460, y, "Subtotal")
-    y -= 12
-    c.line(x_margin, y, width - x_margin, y)
-    y -= 14
-
-    c.setFont("Helvetica", 9)
-    detalles = list(compra.detalles.all())
-
-    if not detalles:
-        c.drawString(x_margin, y, "No hay libros registrados en esta compra.")
-        y -= 20
-    else:
-        for det in detalles:
-            if y < 80:
-                c.showPage()
-                y = height - 50
-                c.setFont("Helvetica", 9)
-
-            titulo = det.libro.titulo if det.libro else "—"
-            if det.libro and det.libro.isbn:
-                titulo = f"{titulo} ({det.libro.isbn})"
-            c.drawString(x_margin, y, titulo[:55])
-
-            c.drawString(x_margin + 260, y, str(det.cantidad))
-
-            c.drawRightString(
-                x_margin + 360,
-                y,
-                f"L. {det.costo_unitario:.2f}"
-            )
+    except Usuarios.DoesNotExist:
+        return redirect("cerrar_sesion")
 
-            c.drawRightString(
-                x_margin + 460,
-                y,
-                f"L. {det.subtotal:.2f}"
-            )
-            y -= 14
+    qs = (
+        filtros.bitacora(request.GET)
+        .filter(fecha__isnull=False)
+        .select_related("usuario")
+        .order_by("-fecha", "-id")
+    )
 
-    y -= 10
-    c.line(x_margin, y, width - x_margin, y)
-    y -= 18
+    cursor = _leer_cursor_bitacora(request.GET.get("cursor") or "")
+    if cursor:
+        fecha, entrada_id = cursor
+        qs = qs.filter(Q(fecha__lt=fecha) | Q(fecha=fecha, id__lt=entrada_id))
+
+    entradas = list(qs[:TAMANO_PAGINA_BITACORA + 1])
+    hay_mas = len(entradas) > TAMANO_PAGINA_BITACORA
+    entradas = entradas[:TAMANO_PAGINA_BITACORA]
+
+    # Los filtros se conservan en los enlaces de "siguiente" y exportar
+    parametros = request.GET.copy()
+    parametros.pop("cursor", None)
+    parametros.pop("formato", None)
+    siguiente = None
+    if hay_mas:
+        parametros_siguiente = parametros.copy()
+        parametros_siguiente["cursor"] = _cursor_bitacora(entradas[-1])
+        siguiente = parametros_siguiente.urlencode()
 
-    c.setFont("Helvetica-Bold", 10)
-    c.drawRightString(x_margin + 360, y, "Total compra (L.):")
-    c.drawRightString(x_margin + 460, y, f"L. {compra.total:.2f}")
-    y -= 25
+    contexto = {
+        "usuario_actual": usuario_actual,
+        "entradas": entradas,
+        "siguiente": siguiente,
+        "es_primera_pagina": cursor is None,
+        "filtros": parametros.urlencode(),
+        "f": request.GET,
+        "codigos": sorted(auditoria.CODIGOS.items(), key=lambda par: par[1]),
+        "entidades": auditoria.ENTIDADES,
+        "empleados": (
+            Usuarios.objects.exclude(rol__nombre="cliente")
+            .only("id", "nombre", "apellido", "email")
+            .order_by("nombre", "apellido")
+        ),
+    }
+    return render(request, "seguridad/bitacora.html", contexto)
 
-    c.setFont("Helvetica-Oblique", 9)
-    c.drawString(x_margin, y, "Comprobante generado por BiblioNet.")
 
-    c.showPage()
-    c.save()
+@requerir_rol("administrador")
+@csrf_protect
+def diagnostico_consultas(request):
+    """
+    Consultas SQL por vista en las últimas peticiones atendidas por este
+    proceso (ver biblio/instrumentacion.py).
+    """
+    try:
+        usuario_actual = Usuarios.objects.select_related("rol").get(
+            id=request.session.get("id_usuario")
+        )
+    except Usuarios.DoesNotExist:
+        return redirect("cerrar_sesion")
 
-    pdf = buffer.getvalue()
-    buffer.close()
+    if request.method == "POST" and "limpiar" in request.POST:
+        instrumentacion.limpiar()
+        messages.success(request, "Se vació el registro de consultas.")
+        return redirect("diagnostico_consultas")
 
-    filename = f"comprobante_{compra.numero_factura}.pdf"
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    response.write(pdf)
-    return response
+    recientes = instrumentacion.peticiones()
+    contexto = {
+        "usuario_actual": usuario_actual,
+        "vistas": instrumentacion.resumen_por_vista(),
+        "con_n1": [p for p in recientes if p["repetidas"]][:20],
+        "total_peticiones": len(recientes),
+        "umbral": getattr(settings, "INSTRUMENTACION_UMBRAL_N1", 10),
+        "activa": getattr(settings, "INSTRUMENTACION_ACTIVA", True),
+    }
+    return render(request, "seguridad/diagnostico_consultas.html", contexto)
+
+
+# ---------- Exportaciones CSV / XLSX ----------
+
+def _formato_exportacion(request):
+    formato = (request.GET.get("formato") or exportaciones.FORMATO_CSV).lower()
+    if formato not in exportaciones.FORMATOS:
+        raise Http404("Formato de exportación no soportado.")
+    return formato
+
+
+@requerir_rol("administrador")
+def exportar_ventas(request):
+    return exportaciones.exportar_ventas(request.GET, _formato_exportacion(request))
+
+
+@requerir_rol("administrador", "bibliotecario")
+def exportar_compras(request):
+    return exportaciones.exportar_compras(request.GET, _formato_exportacion(request))
+
+
+@requerir_rol("administrador", "bibliotecario")
+def exportar_prestamos(request):
+    return exportaciones.exportar_prestamos(request.GET, _formato_exportacion(request))
+
+
+@requerir_rol("administrador")
+def exportar_bitacora(request):
+    return exportaciones.exportar_bitacora(request.GET, _formato_exportacion(request))